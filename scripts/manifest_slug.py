@@ -1,27 +1,21 @@
 #!/usr/bin/env python3
-"""Print slug for a lesson manifest."""
+"""Print slug for a lesson manifest.
+
+Kept for existing callers; prefer ``python -m generate_lesson slug``.
+"""
 
 from __future__ import annotations
 
-import re
 import sys
 from pathlib import Path
 
-import yaml
-
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tools" / "generate-lesson"))
 
-def slugify(value: str) -> str:
-    value = re.sub(r"[^a-z0-9]+", "-", value.lower().strip())
-    return value.strip("-") or "lesson"
+from generate_lesson.slug import main as slug_main  # noqa: E402
 
 
 def main(path: str) -> int:
-    manifest_path = Path(path)
-    manifest = yaml.safe_load(manifest_path.read_text(encoding="utf-8"))
-    metadata = manifest["metadata"]
-    slug = "-".join(slugify(str(metadata[key])) for key in ("org", "course", "lesson") if metadata.get(key))
-    print(slug)
-    return 0
+    return slug_main([path])
 
 
 if __name__ == "__main__":
@@ -11,19 +11,56 @@ This helper performs a lightweight Mustache-style rendering for the
 Only defaults declared in `devcontainer-template.json` are considered, mirroring
 how the Dev Containers CLI materializes templates when no user input is
 provided.
+
+Each distinct file content is tokenized once and compiled into a flat program
+in which every section knows where it ends, so rendering is a single linear
+pass. Compiled programs are cached by content hash and reused across files and
+option sets. Templates whose tags are not cleanly nested (for example a section
+nested in another section on the same option) keep the original
+rescan-until-stable semantics so their output is unchanged.
+
+Files are pre-scanned as bytes: binaries and files without a
+`{{templateOption` tag are left untouched, and rendered files are only
+written back when their bytes change, through a temporary sibling plus
+``os.replace`` so readers never see a half-written file.
+
+`render_template_defaults.py batch` materializes many templates under a
+matrix of option overrides in parallel worker processes and records every
+output file's sha256 in a manifest. Each template's combinations are split
+into chunks so a single large matrix still spreads across the workers.
 """
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import math
+import mmap
+import os
 import pathlib
 import re
 import sys
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 SECTION_RE = re.compile(r"\{\{#templateOption\.([^}]+)\}\}(.*?)\{\{/templateOption.\1\}\}", re.DOTALL)
 INVERTED_RE = re.compile(r"\{\{\^templateOption\.([^}]+)\}\}(.*?)\{\{/templateOption.\1\}\}", re.DOTALL)
 PLACEHOLDER_RE = re.compile(r"\{\{templateOption\.([^}]+)\}\}")
+TOKEN_RE = re.compile(r"\{\{([#^/]?)templateOption\.([^}]+)\}\}")
+TOKEN_BYTES = b"{{templateOption"
+
+# Like git, treat a NUL byte in the first 8 KiB as the mark of a binary file.
+BINARY_SNIFF_BYTES = 8192
+# Below this size a plain read is cheaper than setting up a memory map.
+MMAP_THRESHOLD = 64 * 1024
+
+# Program instructions: (op, text_or_key, raw_token_or_jump_target).
+OP_TEXT = 0
+OP_PLACEHOLDER = 1
+OP_SECTION = 2
+OP_INVERTED = 3
+
+Instruction = Tuple[int, str, Any]
 
 
 def load_defaults(metadata_path: pathlib.Path) -> Dict[str, Any]:
@@ -59,7 +96,7 @@ def render_sections(text: str, pattern: re.Pattern[str], predicate) -> str:
     return text
 
 
-def render_text(content: str, defaults: Dict[str, Any]) -> str:
+def render_text_legacy(content: str, defaults: Dict[str, Any]) -> str:
     def is_truthy(key: str) -> bool:
         value = defaults.get(key)
         return bool(value)
@@ -76,23 +113,390 @@ def render_text(content: str, defaults: Dict[str, Any]) -> str:
     return PLACEHOLDER_RE.sub(replace_placeholder, rendered)
 
 
-def materialize_template(metadata_path: pathlib.Path, output_dir: pathlib.Path) -> None:
+class CompiledTemplate:
+    """A template tokenized once into a flat program with section jump targets."""
+
+    __slots__ = ("source", "program")
+
+    def __init__(self, source: str, program: Optional[List[Instruction]]) -> None:
+        self.source = source
+        # None means the tags are not cleanly nested; render with the legacy passes.
+        self.program = program
+
+    def render(self, defaults: Dict[str, Any]) -> str:
+        program = self.program
+        if program is None:
+            return render_text_legacy(self.source, defaults)
+        parts: List[str] = []
+        index = 0
+        end = len(program)
+        while index < end:
+            op, value, extra = program[index]
+            if op == OP_TEXT:
+                parts.append(value)
+            elif op == OP_PLACEHOLDER:
+                parts.append(format_value(defaults[value]) if value in defaults else extra)
+            elif bool(defaults.get(value)) != (op == OP_SECTION):
+                index = extra
+                continue
+            index += 1
+        return "".join(parts)
+
+
+def compile_program(content: str) -> Optional[List[Instruction]]:
+    """Compile ``content``, or return ``None`` when only the legacy passes reproduce it.
+
+    The single pass matches the rescanning substitution exactly when every
+    ``templateOption`` occurrence is part of a tag, sections are properly
+    nested, and no section contains another tag for its own option.
+    """
+    pieces = TOKEN_RE.split(content)
+    if content.count("templateOption") != len(pieces) // 3:
+        return None
+    program: List[Instruction] = []
+    # (option, index of the opening instruction) for every open section.
+    open_sections: List[Tuple[str, int]] = []
+    open_keys: set = set()
+    safe_keys: set = set()
+    # split() yields text, then (kind, key, text) for every tag.
+    if pieces[0]:
+        program.append((OP_TEXT, pieces[0], None))
+    for index in range(1, len(pieces), 3):
+        kind, key, text = pieces[index], pieces[index + 1], pieces[index + 2]
+        if not kind:
+            program.append((OP_PLACEHOLDER, key, "{{templateOption." + key + "}}"))
+        else:
+            if key not in safe_keys:
+                if re.escape(key) != key:
+                    return None  # the legacy closing pattern treats the key as a regex
+                safe_keys.add(key)
+            if kind == "/":
+                if not open_sections or open_sections[-1][0] != key:
+                    return None
+                _key, opener = open_sections.pop()
+                open_keys.discard(key)
+                program[opener] = (program[opener][0], key, len(program))
+            else:
+                if key in open_keys:
+                    return None
+                open_sections.append((key, len(program)))
+                open_keys.add(key)
+                program.append((OP_SECTION if kind == "#" else OP_INVERTED, key, None))
+        if text:
+            program.append((OP_TEXT, text, None))
+    if open_sections:
+        return None
+    return program
+
+
+_COMPILED: Dict[str, CompiledTemplate] = {}
+
+
+def compile_template(content: str) -> CompiledTemplate:
+    """Return the compiled form of ``content``, cached by content hash."""
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    compiled = _COMPILED.get(digest)
+    if compiled is None:
+        compiled = _COMPILED[digest] = CompiledTemplate(content, compile_program(content))
+    return compiled
+
+
+def render_text(content: str, defaults: Dict[str, Any]) -> str:
+    return compile_template(content).render(defaults)
+
+
+def needs_rendering(path: pathlib.Path) -> bool:
+    """Return True when ``path`` is a text file containing a ``{{templateOption`` tag.
+
+    Only the raw bytes are searched, through a memory map for large files, so
+    assets without tags are never decoded.
+    """
+    with path.open("rb") as handle:
+        size = handle.seek(0, 2)
+        if size < len(TOKEN_BYTES):
+            return False
+        handle.seek(0)
+        if size < MMAP_THRESHOLD:
+            data = handle.read()
+            return b"\0" not in data[:BINARY_SNIFF_BYTES] and TOKEN_BYTES in data
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped.find(b"\0", 0, BINARY_SNIFF_BYTES) != -1:
+                return False
+            return mapped.find(TOKEN_BYTES) != -1
+
+
+def decode_template(data: bytes) -> Optional[str]:
+    """Decode with universal newlines, as read_text() does; None for non-UTF-8 data."""
+    try:
+        return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    except UnicodeDecodeError:
+        return None
+
+
+def write_if_changed(path: pathlib.Path, data: bytes) -> bool:
+    """Atomically replace ``path`` with ``data`` unless it already holds those bytes."""
+    try:
+        if path.read_bytes() == data:
+            return False
+        mode: Optional[int] = path.stat().st_mode & 0o7777
+    except OSError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        mode = None
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+    # New files get 0o666 minus the umask, like a plain open(); existing ones keep their mode.
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def render_file(path: pathlib.Path, defaults: Dict[str, Any]) -> bool:
+    """Render ``path`` in place; return True when its bytes changed."""
+    if not needs_rendering(path):
+        return False
+    content = decode_template(path.read_bytes())
+    if content is None:
+        return False
+    return write_if_changed(path, render_text(content, defaults).encode("utf-8"))
+
+
+def materialize_template(metadata_path: pathlib.Path, output_dir: pathlib.Path) -> int:
+    """Render every templated file under ``output_dir``; return how many were rewritten."""
     defaults = load_defaults(metadata_path)
     if not defaults:
-        return
+        return 0
 
+    written = 0
     for path in output_dir.rglob("*"):
+        if path.is_file() and render_file(path, defaults):
+            written += 1
+    return written
+
+
+def load_options(metadata_path: pathlib.Path) -> Dict[str, Any]:
+    with metadata_path.open("r", encoding="utf-8") as handle:
+        options = json.load(handle).get("options", {}) or {}
+    return {key: spec for key, spec in options.items() if isinstance(spec, dict)}
+
+
+def option_matrix(options: Dict[str, Any], matrix: Any) -> List[Dict[str, Any]]:
+    """Expand ``matrix`` into the distinct override sets that apply to ``options``.
+
+    ``matrix`` is either a mapping of option name to candidate values (expanded
+    as a cartesian product) or a list of explicit override mappings. Options a
+    template does not declare are ignored. With no matrix, boolean options
+    cover ``true``/``false`` and enumerated options cover every enum value.
+    """
+    if matrix is None:
+        matrix = {}
+        for key, spec in options.items():
+            if spec.get("type") == "boolean":
+                matrix[key] = [True, False]
+            elif isinstance(spec.get("enum"), list):
+                matrix[key] = list(spec["enum"])
+    if isinstance(matrix, dict):
+        axes = [(key, list(values)) for key, values in matrix.items() if key in options and values]
+        combinations: List[Dict[str, Any]] = [{}]
+        for key, values in axes:
+            combinations = [dict(combination, **{key: value}) for combination in combinations for value in values]
+    elif isinstance(matrix, list):
+        combinations = [
+            {key: value for key, value in overrides.items() if key in options}
+            for overrides in matrix
+            if isinstance(overrides, dict)
+        ]
+    else:
+        raise ValueError("option matrix must be a mapping of option values or a list of overrides")
+
+    unique: Dict[str, Dict[str, Any]] = {}
+    for overrides in combinations:
+        unique.setdefault(json.dumps(overrides, sort_keys=True), overrides)
+    return list(unique.values()) or [{}]
+
+
+def combination_name(overrides: Dict[str, Any]) -> str:
+    if not overrides:
+        return "defaults"
+    digest = hashlib.sha256(json.dumps(overrides, sort_keys=True).encode("utf-8")).hexdigest()
+    return digest[:12]
+
+
+def materialize_combinations(
+    metadata_path: pathlib.Path,
+    source_dir: pathlib.Path,
+    output_dir: pathlib.Path,
+    combinations: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Render ``source_dir`` once per override set into ``output_dir/<name>/.devcontainer``.
+
+    Sources are read and compiled once; every combination reuses the compiled
+    programs. Returns one manifest record per combination.
+    """
+    defaults = load_defaults(metadata_path)
+    sources: List[Tuple[str, bytes, Optional[CompiledTemplate]]] = []
+    for path in sorted(source_dir.rglob("*")):
         if not path.is_file():
             continue
-        content = path.read_text(encoding="utf-8")
-        rendered = render_text(content, defaults)
-        path.write_text(rendered, encoding="utf-8")
+        data = path.read_bytes()
+        content = decode_template(data) if needs_rendering(path) else None
+        compiled = compile_template(content) if content is not None else None
+        sources.append((path.relative_to(source_dir).as_posix(), data, compiled))
+
+    records = []
+    for overrides in combinations:
+        options = dict(defaults, **overrides)
+        name = combination_name(overrides)
+        target = output_dir / name / ".devcontainer"
+        files: Dict[str, str] = {}
+        written = 0
+        for relative, data, compiled in sources:
+            # Like materialize_template, a template without option values is copied verbatim.
+            rendered = compiled.render(options).encode("utf-8") if compiled is not None and options else data
+            written += write_if_changed(target / relative, rendered)
+            files[relative] = hashlib.sha256(rendered).hexdigest()
+        records.append(
+            {
+                "name": name,
+                "overrides": overrides,
+                "options": options,
+                "path": target.as_posix(),
+                "written": written,
+                "files": files,
+            }
+        )
+    return records
+
+
+BatchJob = Tuple[str, str, str, List[Dict[str, Any]]]
+
+
+def plan_jobs(templates: List[BatchJob], workers: int) -> List[Tuple[int, BatchJob]]:
+    """Split every ``(metadata, source, output, combinations)`` template into worker jobs.
+
+    A template's combinations are cut into at most ``workers`` chunks, so one
+    large matrix is rendered in parallel too. Each chunk re-reads and compiles
+    its template, which costs far less than rendering its combinations.
+    Returns ``(template index, job)`` pairs in template and combination order.
+    """
+    planned: List[Tuple[int, BatchJob]] = []
+    for template_index, (metadata_path, source_dir, output_dir, combinations) in enumerate(templates):
+        size = max(1, math.ceil(len(combinations) / max(1, workers)))
+        for start in range(0, len(combinations), size):
+            chunk = combinations[start : start + size]
+            planned.append((template_index, (metadata_path, source_dir, output_dir, chunk)))
+    return planned
+
+
+def _materialize_job(job: BatchJob) -> List[Dict[str, Any]]:
+    metadata_path, source_dir, output_dir, combinations = job
+    return materialize_combinations(
+        pathlib.Path(metadata_path), pathlib.Path(source_dir), pathlib.Path(output_dir), combinations
+    )
+
+
+def resolve_template(value: str) -> pathlib.Path:
+    path = pathlib.Path(value)
+    metadata_path = path / "devcontainer-template.json" if path.is_dir() else path
+    if not metadata_path.is_file():
+        raise FileNotFoundError(f"Template metadata not found: {metadata_path}")
+    return metadata_path
+
+
+def load_matrix(value: Optional[str]) -> Any:
+    if value is None:
+        return None
+    candidate = pathlib.Path(value)
+    if candidate.is_file():
+        return json.loads(candidate.read_text(encoding="utf-8"))
+    return json.loads(value)
+
+
+def batch_main(argv: List[str]) -> int:
+    from concurrent.futures import ProcessPoolExecutor
+
+    parser = argparse.ArgumentParser(
+        prog="render_template_defaults.py batch",
+        description="Materialize templates under a matrix of option overrides.",
+    )
+    parser.add_argument(
+        "templates",
+        nargs="*",
+        help="Template directories or devcontainer-template.json files (default: templates/*).",
+    )
+    parser.add_argument(
+        "--matrix",
+        help="JSON file or inline JSON: {option: [values]} or [{option: value}, ...]"
+        " (default: every boolean and enum value).",
+    )
+    parser.add_argument("--output", required=True, help="Directory receiving <template-id>/<combination>/.devcontainer.")
+    parser.add_argument("--manifest", help="Where to write the output manifest (default: <output>/manifest.json).")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count).")
+    args = parser.parse_args(argv)
+
+    root = pathlib.Path(__file__).resolve().parent.parent
+    if args.templates:
+        metadata_paths = [resolve_template(value) for value in args.templates]
+    else:
+        metadata_paths = sorted((root / "templates").glob("*/devcontainer-template.json"))
+    matrix = load_matrix(args.matrix)
+    output_dir = pathlib.Path(args.output)
+
+    templates = []
+    template_ids = []
+    for metadata_path in metadata_paths:
+        source_dir = metadata_path.parent / ".template" / ".devcontainer"
+        if not source_dir.is_dir():
+            continue
+        template_id = metadata_path.parent.name
+        combinations = option_matrix(load_options(metadata_path), matrix)
+        template_ids.append(template_id)
+        templates.append((str(metadata_path), str(source_dir), str((output_dir / template_id)), combinations))
+
+    workers = max(1, args.jobs)
+    planned = plan_jobs(templates, workers)
+    jobs = [job for _template_index, job in planned]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            chunks = list(executor.map(_materialize_job, jobs))
+    else:
+        chunks = [_materialize_job(job) for job in jobs]
+
+    results: List[List[Dict[str, Any]]] = [[] for _template in templates]
+    for (template_index, _job), records in zip(planned, chunks):
+        results[template_index].extend(records)
+
+    manifest = {
+        "templates": [
+            {"id": template_id, "metadata": template[0], "combinations": records}
+            for template_id, template, records in zip(template_ids, templates, results)
+        ]
+    }
+    manifest_path = pathlib.Path(args.manifest) if args.manifest else output_dir / "manifest.json"
+    write_if_changed(manifest_path, (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+
+    combinations = sum(len(records) for records in results)
+    written = sum(record["written"] for records in results for record in records)
+    print(f"[batch] {len(templates)} templates, {combinations} combinations, {written} files written -> {manifest_path}")
+    return 0
 
 
 def main(argv: list[str]) -> int:
+    if len(argv) > 1 and argv[1] == "batch":
+        return batch_main(argv[2:])
     if len(argv) != 3:
         print(
-            "usage: render_template_defaults.py <devcontainer-template.json> <materialized-devcontainer-dir>",
+            "usage: render_template_defaults.py <devcontainer-template.json> <materialized-devcontainer-dir>\n"
+            "       render_template_defaults.py batch [templates...] --output DIR [--matrix JSON] [--jobs N]",
             file=sys.stderr,
         )
         return 1
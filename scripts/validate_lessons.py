@@ -3,8 +3,12 @@
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Iterable
 
@@ -25,59 +29,255 @@ EXAMPLES = ROOT / "examples"
 LESSON_SCHEMA_PATH = SCHEMAS / "lesson-env.schema.json"
 AGENT_SCHEMA_PATH = SCHEMAS / "agent-intents.schema.json"
 
+# Share the generator's persistent parse cache (.cache/generate-lesson/parse)
+# so repeated CI runs reuse parses made by either tool.
+sys.path.insert(0, str(ROOT / "tools" / "generate-lesson"))
+try:
+    from generate_lesson.cache import flush_parse_caches, load_yaml_file
+except ImportError:  # pragma: no cover - generator package unavailable
+    load_yaml_file = None
+
+    def flush_parse_caches() -> None:
+        return None
+
 
 def _load_yaml(path: Path) -> dict:
+    if load_yaml_file is not None:
+        return load_yaml_file(ROOT, path)
     with path.open("r", encoding="utf-8") as handle:
         return yaml.safe_load(handle)
 
 
+# Validator bookkeeping lives beside the generator caches, so `rm -rf .cache`
+# resets it too.
+CACHE_DIR = ROOT / ".cache" / "validate-lessons"
+STATE_PATH = CACHE_DIR / "state.json"
+STATE_VERSION = 1
+
+# Below this many files a process pool costs more than it saves.
+PARALLEL_THRESHOLD = 64
+
+# Schema sha256 -> compiled validator, for the lifetime of the process.
+_VALIDATORS: dict[str, Draft202012Validator] = {}
+# Schemas shipped to pool workers by _init_worker.
+_WORKER_SCHEMAS: dict[str, dict] = {}
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _jsonschema_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("jsonschema")
+    except Exception:  # pragma: no cover - metadata unavailable
+        return "unknown"
+
+
+class ValidationState:
+    """Schemas that passed `check_schema` and files that last validated cleanly.
+
+    Persisted to `.cache/validate-lessons/state.json` and discarded whenever
+    the installed jsonschema version changes.
+    """
+
+    def __init__(self, path: Path = STATE_PATH) -> None:
+        self.path = path
+        self.jsonschema = _jsonschema_version()
+        self.checked_schemas: set[str] = set()
+        # Repository-relative path -> [content sha256, schema sha256].
+        self.files: dict[str, list[str]] = {}
+        self.dirty = False
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if (
+            isinstance(payload, dict)
+            and payload.get("version") == STATE_VERSION
+            and payload.get("jsonschema") == self.jsonschema
+        ):
+            self.checked_schemas = set(payload.get("schemas") or ())
+            self.files = dict(payload.get("files") or {})
+
+    def is_current(self, key: str, content_hash: str, schema_hash: str) -> bool:
+        return self.files.get(key) == [content_hash, schema_hash]
+
+    def record(self, key: str, content_hash: str, schema_hash: str, valid: bool) -> None:
+        entry = [content_hash, schema_hash] if valid else None
+        if self.files.get(key) == entry:
+            return
+        if entry is None:
+            del self.files[key]
+        else:
+            self.files[key] = entry
+        self.dirty = True
+
+    def mark_checked(self, schema_hash: str) -> None:
+        if schema_hash not in self.checked_schemas:
+            self.checked_schemas.add(schema_hash)
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        payload = {
+            "version": STATE_VERSION,
+            "jsonschema": self.jsonschema,
+            "schemas": sorted(self.checked_schemas),
+            "files": dict(sorted(self.files.items())),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def load_schema(schema_path: Path) -> tuple[str, dict]:
+    data = schema_path.read_bytes()
+    return _sha256(data), json.loads(data)
+
+
+def get_validator(
+    schema_hash: str,
+    schema: dict,
+    state: ValidationState | None = None,
+    check: bool = True,
+) -> Draft202012Validator:
+    """Compiled validator for `schema`, running `check_schema` at most once per schema hash."""
+    validator = _VALIDATORS.get(schema_hash)
+    if validator is None:
+        if check and (state is None or schema_hash not in state.checked_schemas):
+            Draft202012Validator.check_schema(schema)
+        if state is not None:
+            state.mark_checked(schema_hash)
+        validator = _VALIDATORS[schema_hash] = Draft202012Validator(schema)
+    return validator
+
+
+def _load_document(path: Path):
+    if path.suffix in {".yaml", ".yml"}:
+        return _load_yaml(path)
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _document_errors(path: Path, validator: Draft202012Validator) -> list[str]:
+    data = _load_document(path)
+    return [f"{path.relative_to(ROOT)}: {error.message}" for error in validator.iter_errors(data)]
+
+
 def validate_manifest(manifest_path: Path, validator: Draft202012Validator) -> list[str]:
-    errors: list[str] = []
-    data = _load_yaml(manifest_path)
-    for error in validator.iter_errors(data):
-        errors.append(f"{manifest_path.relative_to(ROOT)}: {error.message}")
-    return errors
+    return _document_errors(manifest_path, validator)
+
+
+def _init_worker(schemas: dict[str, dict]) -> None:
+    _WORKER_SCHEMAS.update(schemas)
 
 
-def validate_manifests(paths: Iterable[Path]) -> list[str]:
-    schema = json.loads(LESSON_SCHEMA_PATH.read_text(encoding="utf-8"))
-    Draft202012Validator.check_schema(schema)
-    validator = Draft202012Validator(schema)
+def _validate_in_worker(task: tuple[str, str]) -> list[str]:
+    schema_hash, path = task
+    # The parent already ran check_schema before fanning out.
+    validator = get_validator(schema_hash, _WORKER_SCHEMAS[schema_hash], check=False)
+    return _document_errors(Path(path), validator)
+
+
+def validate_documents(
+    paths: Iterable[Path],
+    schema_path: Path,
+    state: ValidationState | None = None,
+    changed_only: bool = False,
+    jobs: int = 1,
+) -> list[str]:
+    """Validate `paths` against `schema_path`, fanning out when there are many files.
+
+    With `changed_only`, files whose content and schema hashes match the last
+    clean validation recorded in `state` are skipped.
+    """
+    schema_hash, schema = load_schema(schema_path)
+    validator = get_validator(schema_hash, schema, state)
+
+    pending: list[tuple[Path, str, str]] = []
+    for path in sorted(paths):
+        key = path.relative_to(ROOT).as_posix()
+        content_hash = _sha256(path.read_bytes())
+        if changed_only and state is not None and state.is_current(key, content_hash, schema_hash):
+            continue
+        pending.append((path, key, content_hash))
+
+    if jobs > 1 and len(pending) >= PARALLEL_THRESHOLD:
+        tasks = [(schema_hash, str(path)) for path, _key, _content_hash in pending]
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=({schema_hash: schema},)
+        ) as executor:
+            results = list(executor.map(_validate_in_worker, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+    else:
+        results = [_document_errors(path, validator) for path, _key, _content_hash in pending]
 
     errors: list[str] = []
-    for manifest_path in sorted(paths):
-        errors.extend(validate_manifest(manifest_path, validator))
+    for (_path, key, content_hash), file_errors in zip(pending, results):
+        if state is not None:
+            state.record(key, content_hash, schema_hash, not file_errors)
+        errors.extend(file_errors)
     return errors
 
 
-def validate_agent_intents(paths: Iterable[Path]) -> list[str]:
+def validate_manifests(
+    paths: Iterable[Path],
+    state: ValidationState | None = None,
+    changed_only: bool = False,
+    jobs: int = 1,
+) -> list[str]:
+    return validate_documents(paths, LESSON_SCHEMA_PATH, state, changed_only, jobs)
+
+
+def validate_agent_intents(
+    paths: Iterable[Path],
+    state: ValidationState | None = None,
+    changed_only: bool = False,
+    jobs: int = 1,
+) -> list[str]:
     if not AGENT_SCHEMA_PATH.exists():
         return []
+    return validate_documents(paths, AGENT_SCHEMA_PATH, state, changed_only, jobs)
 
-    schema = json.loads(AGENT_SCHEMA_PATH.read_text(encoding="utf-8"))
-    Draft202012Validator.check_schema(schema)
-    validator = Draft202012Validator(schema)
-
-    errors: list[str] = []
-    for intent_path in sorted(paths):
-        if intent_path.suffix in {".yaml", ".yml"}:
-            data = _load_yaml(intent_path)
-        else:
-            data = json.loads(intent_path.read_text(encoding="utf-8"))
-        for error in validator.iter_errors(data):
-            errors.append(f"{intent_path.relative_to(ROOT)}: {error.message}")
-    return errors
 
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--changed-only",
+        action="store_true",
+        help="Skip files unchanged since their last clean validation against the same schema.",
+    )
+    parser.add_argument(
+        "--intents-only",
+        action="store_true",
+        help="Validate agent intents only (lesson manifests are covered by `generate-lesson check`).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help=f"Worker processes for directories with at least {PARALLEL_THRESHOLD} files (default: CPU count).",
+    )
+    args = parser.parse_args(argv)
 
-def main() -> int:
     manifests_dir = EXAMPLES / "lesson-manifests"
     manifest_paths = list(manifests_dir.glob("*.y*ml"))
     intent_dir = EXAMPLES / "agent-intents"
     intent_paths = list(intent_dir.glob("*.y*ml")) + list(intent_dir.glob("*.json"))
 
+    state = ValidationState()
     errors = []
-    errors.extend(validate_manifests(manifest_paths))
-    errors.extend(validate_agent_intents(intent_paths))
+    try:
+        if not args.intents_only:
+            errors.extend(validate_manifests(manifest_paths, state, args.changed_only, args.jobs))
+        errors.extend(validate_agent_intents(intent_paths, state, args.changed_only, args.jobs))
+    finally:
+        state.save()
+        flush_parse_caches()
 
     if errors:
         for err in errors:
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Reproducible benchmark suite for the lesson generator and template renderer.
+
+For every requested size a synthetic repository is built (the real
+``services/`` and ``catalog/`` plus N seeded manifests with varied
+``services``, ``features``, extensions and env) and each benchmark runs in a
+fresh child process so its peak RSS is its own:
+
+- ``parse_simple_yaml``: the bundled parser over every manifest
+- ``load_manifest_cold`` / ``load_manifest_warm``: through an empty, then a
+  populated, parse cache
+- ``merge_services`` and ``generate_aggregate_compose``: ``--sample`` manifests
+- ``main``: ``generate-lesson --manifests`` over all N manifests (``--no-cache``),
+  per-manifest latency taken from its NDJSON result records
+- ``render_text``: the catalog templates plus synthetic nested templates
+
+Results (throughput, p50/p95 latency, peak RSS of the benchmark process and of
+its workers) are printed as a table and saved as JSON together with the git
+commit, so runs can be compared across commits.
+
+Usage:
+    python tools/generate-lesson/benchmarks/bench_suite.py [--sizes 1000,10000,50000]
+        [--benchmarks NAME,...] [--sample N] [--jobs N] [--output results.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+REPO_ROOT = PACKAGE_ROOT.parents[1]
+sys.path.insert(0, str(PACKAGE_ROOT))
+
+BENCHMARKS = (
+    "parse_simple_yaml",
+    "load_manifest_cold",
+    "load_manifest_warm",
+    "merge_services",
+    "generate_aggregate_compose",
+    "main",
+    "render_text",
+)
+
+PRESETS = ("full", "node-pnpm", "python", "python-prefect", "python-airflow", "python-dagster", "ts-temporal")
+FEATURES = {
+    "ghcr.io/devcontainers/features/node:1": {"version": ["18", "20", "lts"]},
+    "ghcr.io/devcontainers/features/python:1": {"version": ["3.11", "3.12"]},
+    "ghcr.io/devcontainers/features/docker-in-docker:2": {"moby": [True, False]},
+    "ghcr.io/devcontainers/features/github-cli:1": {},
+    "ghcr.io/airnub-labs/devcontainer-features/supabase-cli:1": {"manageLocalStack": [True, False]},
+}
+EXTENSIONS = (
+    "dbaeumer.vscode-eslint",
+    "esbenp.prettier-vscode",
+    "ms-python.python",
+    "ms-toolsai.jupyter",
+    "redhat.vscode-yaml",
+)
+
+
+def parse_sizes(value: str):
+    sizes = []
+    for item in value.split(","):
+        item = item.strip().lower()
+        if item:
+            sizes.append(int(float(item[:-1]) * 1000) if item.endswith("k") else int(item))
+    return sizes
+
+
+def synthetic_manifest(index: int, rng: random.Random, services) -> str:
+    lines = [
+        "apiVersion: airnub.devcontainers/v1",
+        "kind: LessonEnv",
+        "metadata:",
+        f'  org: "bench-org-{index % 37}"',
+        f'  course: "course-{index % 211}"',
+        f'  lesson: "lesson-{index}"',
+        "spec:",
+        f'  base_preset: "{rng.choice(PRESETS)}"',
+        '  image_tag_strategy: "ubuntu-24.04"',
+        "  vscode_extensions:",
+    ]
+    lines.extend(f"    - {extension}" for extension in rng.sample(EXTENSIONS, rng.randint(1, len(EXTENSIONS))))
+    features = rng.sample(sorted(FEATURES), rng.randint(0, 3))
+    if features:
+        lines.append("  features:")
+        for feature in features:
+            options = FEATURES[feature]
+            if not options:
+                lines.append(f'    "{feature}": {{}}')
+                continue
+            lines.append(f'    "{feature}":')
+            for option, choices in options.items():
+                lines.append(f"      {option}: {json.dumps(rng.choice(choices))}")
+    chosen = rng.sample(services, rng.randint(0, min(4, len(services))))
+    if chosen:
+        lines.append("  services:")
+        for name in chosen:
+            if rng.random() < 0.3:
+                lines.append(f'    - name: "{name}"')
+                lines.append("      vars:")
+                lines.append(f'        BENCH_TOKEN: "token-{index}"')
+            else:
+                lines.append(f'    - name: "{name}"')
+    lines.append(f"  emit_aggregate_compose: {'true' if rng.random() < 0.8 else 'false'}")
+    lines.append("  env:")
+    lines.append(f'    BENCH_INDEX: "{index}"')
+    return "\n".join(lines) + "\n"
+
+
+def build_repository(workdir: Path, size: int, seed: int) -> Path:
+    """Create (or reuse) the synthetic repository for ``size`` manifests."""
+    root = workdir / f"repo-{size}-{seed}"
+    manifests = root / "manifests"
+    if (root / ".complete").exists():
+        return root
+    if root.exists():
+        shutil.rmtree(root)
+    shutil.copytree(REPO_ROOT / "services", root / "services")
+    shutil.copytree(REPO_ROOT / "catalog", root / "catalog")
+    manifests.mkdir(parents=True)
+    services = sorted(path.name for path in (root / "services").iterdir() if path.is_dir())
+    rng = random.Random(seed)
+    for index in range(size):
+        (manifests / f"lesson-{index:06d}.yaml").write_text(
+            synthetic_manifest(index, rng, services), encoding="utf-8"
+        )
+    (root / ".complete").write_text("", encoding="utf-8")
+    return root
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(latencies, seconds):
+    return {
+        "calls": len(latencies),
+        "seconds": round(seconds, 6),
+        "throughput_per_s": round(len(latencies) / seconds, 3) if seconds else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 4) if latencies else None,
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 4) if latencies else None,
+    }
+
+
+def timed_calls(func, items):
+    latencies = []
+    started = time.perf_counter()
+    for item in items:
+        call_started = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_benchmark(name: str, root: Path, sample: int, jobs: int, seed: int) -> dict:
+    """Run one benchmark against ``root`` in this (child) process."""
+    from generate_lesson import catalog, cli
+    from generate_lesson.simple_yaml import parse_simple_yaml
+
+    cli.ROOT = root
+    catalog.clear_service_catalogs()
+    manifests = sorted((root / "manifests").glob("*.yaml"))
+    sampled = random.Random(seed).sample(manifests, min(sample, len(manifests)))
+    scratch = Path(tempfile.mkdtemp(prefix="bench-", dir=root))
+    try:
+        if name == "parse_simple_yaml":
+            texts = [path.read_text(encoding="utf-8") for path in manifests]
+            return timed_calls(parse_simple_yaml, texts)
+        if name in ("load_manifest_cold", "load_manifest_warm"):
+            shutil.rmtree(root / ".cache", ignore_errors=True)
+            if name == "load_manifest_warm":
+                for path in manifests:
+                    cli.load_manifest(path)
+                cli.flush_parse_caches()
+                from generate_lesson import cache
+
+                cache._PARSE_CACHES.clear()
+            return timed_calls(cli.load_manifest, manifests)
+        if name == "merge_services":
+            documents = [(index, cli.load_manifest(path)) for index, path in enumerate(sampled)]
+            list(cli.service_catalog())
+            return timed_calls(
+                lambda item: cli.merge_services(item[1]["spec"].get("services"), scratch / str(item[0])),
+                documents,
+            )
+        if name == "generate_aggregate_compose":
+            prepared = []
+            for index, path in enumerate(sampled):
+                manifest = cli.load_manifest(path)
+                out_dir = scratch / str(index)
+                prepared.append((manifest, out_dir, cli.merge_services(manifest["spec"].get("services"), out_dir)))
+            return timed_calls(lambda item: cli.generate_aggregate_compose(*item), prepared)
+        if name == "main":
+            shutil.rmtree(root / ".cache", ignore_errors=True)
+            report = scratch / "main.ndjson"
+            started = time.perf_counter()
+            with report.open("w", encoding="utf-8") as handle, redirect_stdout(handle), redirect_stderr(io.StringIO()):
+                exit_code = cli.main(
+                    ["--manifests", str(root / "manifests"), "--no-cache", "--format", "ndjson", "--jobs", str(jobs)]
+                )
+            seconds = time.perf_counter() - started
+            latencies = []
+            with report.open(encoding="utf-8") as handle:
+                for line in handle:
+                    record = json.loads(line)
+                    if record.get("type") == "result":
+                        latencies.append(record["duration_ms"] / 1000)
+            result = summarize(latencies, seconds)
+            result["exit_code"] = exit_code
+            result["jobs"] = jobs
+            return result
+        if name == "render_text":
+            sys.path.insert(0, str(Path(__file__).resolve().parent))
+            import bench_template_render
+
+            renderer = bench_template_render.renderer
+            documents = bench_template_render.corpus(64, 6)
+            renderer._COMPILED.clear()
+            return timed_calls(lambda document: renderer.render_text(document[1], document[2]), documents * 20)
+        raise ValueError(f"unknown benchmark: {name}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _child(args) -> int:
+    result = run_benchmark(args.child, Path(args.root), args.sample, args.jobs, args.seed)
+    result["peak_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_children_rss_kib"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(json.dumps(result))
+    return 0
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000", help="Comma-separated manifest counts, e.g. 1k,10k,50k (default: 1000).")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="Comma-separated subset to run.")
+    parser.add_argument("--sample", type=int, default=200, help="Manifests used by the per-call service benchmarks.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes for the main benchmark.")
+    parser.add_argument("--seed", type=int, default=20240101)
+    parser.add_argument("--workdir", help="Where synthetic repositories are kept (default: a temporary directory).")
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return _child(args)
+
+    benchmarks = [name for name in args.benchmarks.split(",") if name]
+    unknown = sorted(set(benchmarks) - set(BENCHMARKS))
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="generate-lesson-bench-"))
+    results = []
+    try:
+        for size in parse_sizes(args.sizes):
+            root = build_repository(workdir, size, args.seed)
+            for name in benchmarks:
+                command = [
+                    sys.executable, __file__, "--child", name, "--root", str(root),
+                    "--sample", str(args.sample), "--jobs", str(args.jobs), "--seed", str(args.seed),
+                ]
+                completed = subprocess.run(command, capture_output=True, text=True)
+                if completed.returncode != 0:
+                    sys.stderr.write(completed.stderr)
+                    raise SystemExit(f"benchmark {name} failed for size {size}")
+                result = {"size": size, "benchmark": name}
+                result.update(json.loads(completed.stdout.strip().splitlines()[-1]))
+                results.append(result)
+                print(
+                    f"{size:>7}  {name:<27} {result['calls']:>7} calls  {result['throughput_per_s']:>10.1f}/s"
+                    f"  p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms"
+                    f"  rss {result['peak_rss_kib'] / 1024:>7.1f} MiB",
+                    flush=True,
+                )
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    payload = {
+        "commit": _git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "sample": args.sample,
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+        print(f"[ok] Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Compare the legacy and compiled renderers in scripts/render_template_defaults.py.
+
+Renders the catalog templates plus synthetic files with nested sections, and
+reports MiB/s for the legacy rescan-until-stable passes and for the compiled
+single-pass program (cold = compile + render, warm = cached program). Every
+output is checked for byte-identity between the two renderers.
+
+Usage:
+    python tools/generate-lesson/benchmarks/bench_template_render.py [--size-kib N] [--depth N] [--json]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import render_template_defaults as renderer  # noqa: E402
+
+OPTIONS = [f"option{index}" for index in range(16)]
+
+
+def synthetic_template(size_kib: int, depth: int, seed: int = 0) -> str:
+    """Generate roughly ``size_kib`` KiB of nested sections and placeholders."""
+    rng = random.Random(seed)
+    chunks = []
+    size = 0
+    while size < size_kib * 1024:
+        keys = rng.sample(OPTIONS, depth)
+        opening = []
+        closing = []
+        for level, key in enumerate(keys):
+            kind = "#" if level % 2 == 0 else "^"
+            opening.append(f"{{{{{kind}templateOption.{key}}}}}\n  \"{key}\": \"{{{{templateOption.{key}}}}}\",\n")
+            closing.append(f"{{{{/templateOption.{key}}}}}\n")
+        chunk = "".join(opening) + "  \"plain\": true,\n" + "".join(reversed(closing))
+        chunks.append(chunk)
+        size += len(chunk)
+    return "".join(chunks)
+
+
+def corpus(size_kib: int, depth: int):
+    documents = []
+    for metadata in sorted((REPO_ROOT / "templates").glob("*/devcontainer-template.json")):
+        defaults = renderer.load_defaults(metadata)
+        for path in sorted((metadata.parent / ".template").rglob("*")):
+            if path.is_file():
+                try:
+                    documents.append(("templates", path.read_text(encoding="utf-8"), defaults))
+                except UnicodeDecodeError:
+                    continue
+    defaults = {key: index % 3 == 0 for index, key in enumerate(OPTIONS)}
+    documents.append((f"synthetic-{size_kib}KiB", synthetic_template(size_kib, depth), defaults))
+    return documents
+
+
+def timed(render, documents, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _label, text, defaults in documents:
+            render(text, defaults)
+    return time.perf_counter() - started
+
+
+def bench(label, documents, repeat):
+    total_bytes = sum(len(text.encode("utf-8")) for _label, text, _defaults in documents) * repeat
+    for _label, text, defaults in documents:
+        if renderer.render_text_legacy(text, defaults) != renderer.render_text(text, defaults):
+            raise SystemExit(f"renderers disagree on {label}")
+
+    def cold(text, defaults):
+        renderer._COMPILED.clear()
+        return renderer.render_text(text, defaults)
+
+    results = {"corpus": label, "documents": len(documents), "repeat": repeat}
+    for name, render in (("legacy", renderer.render_text_legacy), ("compiled_cold", cold), ("compiled_warm", renderer.render_text)):
+        elapsed = timed(render, documents, repeat)
+        results[name] = total_bytes / (1024 * 1024) / elapsed if elapsed else 0.0
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kib", type=int, default=512, help="Size of the synthetic template.")
+    parser.add_argument("--depth", type=int, default=6, help="Section nesting depth in the synthetic template.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON.")
+    args = parser.parse_args(argv)
+
+    documents = corpus(args.size_kib, args.depth)
+    groups = {}
+    for document in documents:
+        groups.setdefault(document[0], []).append(document)
+    results = [bench(label, group, args.repeat) for label, group in groups.items()]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'corpus':<18}  {'docs':>4}  {'legacy MiB/s':>12}  {'cold MiB/s':>10}  {'warm MiB/s':>10}")
+    for result in results:
+        print(
+            f"{result['corpus']:<18}  {result['documents']:>4}  {result['legacy']:>12.2f}  "
+            f"{result['compiled_cold']:>10.2f}  {result['compiled_warm']:>10.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
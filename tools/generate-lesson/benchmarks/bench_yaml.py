@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Measure YAML parse throughput for every available generator backend.
+
+Parses the example lesson manifests and the catalog compose fragments with
+each backend from ``generate_lesson.yamlio`` and reports documents/s and
+MiB/s. Documents a backend cannot parse (the ``simple`` parser only covers the
+manifest subset) are counted as skipped.
+
+Usage:
+    python tools/generate-lesson/benchmarks/bench_yaml.py [--repeat N] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+REPO_ROOT = PACKAGE_ROOT.parents[1]
+sys.path.insert(0, str(PACKAGE_ROOT))
+
+from generate_lesson.yamlio import available_yaml_backends, yaml_loader  # noqa: E402
+
+
+def corpus():
+    manifests = sorted((REPO_ROOT / "examples" / "lesson-manifests").glob("*.y*ml"))
+    fragments = sorted((REPO_ROOT / "services").glob("*/docker-compose.*.yml"))
+    return [(path, path.read_text(encoding="utf-8")) for path in manifests + fragments]
+
+
+def bench_backend(backend, documents, repeat):
+    load = yaml_loader(backend)
+    parsed = []
+    skipped = 0
+    for _path, text in documents:
+        try:
+            load(text)
+        except Exception:
+            skipped += 1
+            continue
+        parsed.append(text)
+    total_bytes = sum(len(text.encode("utf-8")) for text in parsed)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in parsed:
+            load(text)
+    elapsed = time.perf_counter() - started
+    count = len(parsed) * repeat
+    return {
+        "backend": backend,
+        "documents": len(parsed),
+        "skipped": skipped,
+        "repeat": repeat,
+        "seconds": elapsed,
+        "docs_per_second": count / elapsed if elapsed else 0.0,
+        "mib_per_second": (total_bytes * repeat) / (1024 * 1024) / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON.")
+    args = parser.parse_args(argv)
+
+    documents = corpus()
+    results = [bench_backend(backend, documents, args.repeat) for backend in available_yaml_backends()]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'backend':<8}  {'docs':>4}  {'skipped':>7}  {'docs/s':>10}  {'MiB/s':>8}")
+    for result in results:
+        print(
+            f"{result['backend']:<8}  {result['documents']:>4}  {result['skipped']:>7}  "
+            f"{result['docs_per_second']:>10.0f}  {result['mib_per_second']:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
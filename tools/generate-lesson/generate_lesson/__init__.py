@@ -0,0 +1,12 @@
+__version__ = "0.1.0"
+
+# Library API, imported lazily so ``python -m generate_lesson slug`` stays cheap.
+_BUNDLE_EXPORTS = ("Artifact", "DirectorySink", "LessonBundle", "RenderError", "TarSink", "ZipSink", "render")
+
+
+def __getattr__(name):
+    if name in _BUNDLE_EXPORTS:
+        from . import bundle
+
+        return getattr(bundle, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,33 @@
+"""Entry point for the ``generate-lesson`` console script and ``python -m generate_lesson``.
+
+Subcommands are imported only when invoked so light commands such as ``slug``
+start without loading the generator, PyYAML or ``argparse``. Anything else is
+handed to :func:`generate_lesson.cli.main` unchanged.
+"""
+
+import sys
+from typing import Optional, Sequence
+
+SUBCOMMANDS = {
+    "affected": "generate_lesson.deps",
+    "check": "generate_lesson.pipeline",
+    "export": "generate_lesson.export",
+    "slug": "generate_lesson.slug",
+    "watch": "generate_lesson.watch",
+}
+
+
+def _load(module: str):
+    # __import__ (unlike importlib.import_module) is visible to -X importtime.
+    return __import__(module, fromlist=["main"])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if args and args[0] in SUBCOMMANDS:
+        return _load(SUBCOMMANDS[args[0]]).main(args[1:])
+    return _load("generate_lesson.cli").main(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""In-memory lesson generation: :func:`render` and output sinks.
+
+:func:`render` runs the same generator stages as ``generate-lesson`` inside
+:func:`generate_lesson.emit.capture`, so nothing is written to disk (no
+generated files, no generation or dependency caches). Every artifact comes back
+as bytes in a :class:`LessonBundle`, keyed by its POSIX path relative to the
+repository root (``images/presets/generated/<slug>/...`` and
+``templates/generated/<slug>/...``).
+
+Writing is a separate step through a sink:
+
+- :class:`DirectorySink`: atomic write-if-changed files under a directory
+- :class:`TarSink`: a (optionally compressed) tar stream
+- :class:`ZipSink`: a zip stream
+
+Archives are byte-reproducible: entries come in path order with their parent
+directories, timestamps are fixed (``SOURCE_DATE_EPOCH`` or 0), owners are
+root with empty names, modes are normalized to 0644/0755, and gzip headers
+carry no name or time.
+
+The generator keeps its state in module globals, so render from one thread per
+process (a process pool scales the same way batch generation does).
+"""
+
+import gzip
+import io
+import os
+import tarfile
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterator, Mapping, Optional, Set, Tuple, Union
+
+from . import cli
+from .diagnostics import CollectingReporter, use_reporter
+from .emit import capture, emit_bytes, make_dirs
+from .slug import derive_lesson_slug
+
+# Tar compression for TarSink: "" (none), "gz", "bz2" or "xz".
+TAR_COMPRESSIONS = ("", "gz", "bz2", "xz")
+GZIP_LEVEL = 9
+# Earliest timestamp a zip entry can carry.
+ZIP_EPOCH = 315532800
+
+
+class RenderError(ValueError):
+    """The manifest could not be rendered; ``diagnostics`` holds the records."""
+
+    def __init__(self, message: str, diagnostics: Tuple[dict, ...]) -> None:
+        super().__init__(message)
+        self.diagnostics = diagnostics
+
+
+@dataclass(frozen=True)
+class Artifact:
+    path: str
+    data: bytes
+    mode: int = 0o644
+
+
+@dataclass(frozen=True)
+class LessonBundle:
+    slug: str
+    # Sorted by path.
+    artifacts: Tuple[Artifact, ...]
+    # Directories the generator creates, including empty ones (sorted).
+    directories: Tuple[str, ...]
+    diagnostics: Tuple[dict, ...] = ()
+
+    def __iter__(self) -> Iterator[Artifact]:
+        return iter(self.artifacts)
+
+    def __len__(self) -> int:
+        return len(self.artifacts)
+
+    def __contains__(self, path: object) -> bool:
+        return any(artifact.path == path for artifact in self.artifacts)
+
+    def __getitem__(self, path: str) -> bytes:
+        for artifact in self.artifacts:
+            if artifact.path == path:
+                return artifact.data
+        raise KeyError(path)
+
+    def paths(self) -> Tuple[str, ...]:
+        return tuple(artifact.path for artifact in self.artifacts)
+
+    def text(self, path: str) -> str:
+        return self[path].decode("utf-8")
+
+    def select(self, prefix: str) -> "LessonBundle":
+        """The artifacts and directories under ``prefix``, with paths relative to it."""
+        base = prefix.strip("/") + "/"
+        return LessonBundle(
+            self.slug,
+            tuple(
+                Artifact(artifact.path[len(base) :], artifact.data, artifact.mode)
+                for artifact in self.artifacts
+                if artifact.path.startswith(base)
+            ),
+            tuple(directory[len(base) :] for directory in self.directories if directory.startswith(base)),
+            self.diagnostics,
+        )
+
+    def write(self, sink) -> None:
+        """Send every directory and artifact to ``sink`` in path order (see :class:`DirectorySink`)."""
+        entries = [(directory, None) for directory in self.directories]
+        entries.extend((artifact.path, artifact) for artifact in self.artifacts)
+        for path, artifact in sorted(entries, key=lambda entry: entry[0]):
+            if artifact is None:
+                sink.add_directory(path)
+            else:
+                sink.add(artifact)
+
+
+def _relative_key(path: Path) -> str:
+    if path.is_absolute():
+        raise ValueError(f"generator emitted outside the bundle: {path}")
+    return path.as_posix()
+
+
+def render(
+    manifest: Union[Mapping, str, Path],
+    manifest_path: Optional[Union[str, Path]] = None,
+) -> LessonBundle:
+    """Generate the lesson for ``manifest`` (a document or a manifest path) in memory.
+
+    Raises :class:`RenderError` when the manifest is invalid or generation
+    fails. Warnings are returned in :attr:`LessonBundle.diagnostics`.
+    """
+    if isinstance(manifest, (str, Path)):
+        manifest_path = manifest
+        document = cli.load_manifest(Path(manifest))
+    else:
+        document = manifest
+    # The generator normalizes metadata and spec in place.
+    document = dict(document) if isinstance(document, Mapping) else document
+
+    reporter = CollectingReporter()
+    with use_reporter(reporter), reporter.scope(None if manifest_path is None else str(manifest_path)):
+        if not cli.prepare_manifest(document):
+            raise RenderError("invalid lesson manifest", tuple(reporter.records))
+        slug = derive_lesson_slug(document["metadata"])
+        reporter.slug = slug
+        preset_dir, template_dir = cli.generated_dirs(slug, Path())
+        with capture() as captured:
+            ok = cli.write_lesson(document, slug, preset_dir, template_dir)
+    if not ok:
+        raise RenderError(f"could not generate lesson {slug}", tuple(reporter.records))
+
+    artifacts = tuple(
+        sorted(
+            (Artifact(_relative_key(path), data, mode) for path, (data, mode) in captured.files.items()),
+            key=lambda artifact: artifact.path,
+        )
+    )
+    directories = tuple(sorted(_relative_key(path) for path in captured.directories))
+    return LessonBundle(slug, artifacts, directories, tuple(reporter.records))
+
+
+class DirectorySink:
+    """Writes bundles below ``root``, replacing only files whose bytes changed."""
+
+    def __init__(self, root: Union[str, Path]) -> None:
+        self.root = Path(root)
+        self.written = 0
+
+    def add_directory(self, path: str) -> None:
+        make_dirs(self.root / path)
+
+    def add(self, artifact: Artifact) -> None:
+        if emit_bytes(self.root / artifact.path, artifact.data, artifact.mode):
+            self.written += 1
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "DirectorySink":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.close()
+        return False
+
+
+def source_date_epoch() -> int:
+    """Archive timestamp: ``SOURCE_DATE_EPOCH`` when set, otherwise 0."""
+    try:
+        return int(os.environ.get("SOURCE_DATE_EPOCH", "0"))
+    except ValueError:
+        return 0
+
+
+def gzip_writer(fileobj: BinaryIO) -> gzip.GzipFile:
+    """Gzip stream without a file name or timestamp in its header."""
+    return gzip.GzipFile(filename="", mode="wb", fileobj=fileobj, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _archive_mode(mode: int) -> int:
+    return 0o755 if mode & 0o111 else 0o644
+
+
+def _validate_member(path: str) -> str:
+    pure = PurePosixPath(path)
+    if not path or pure.is_absolute() or ".." in pure.parts:
+        raise ValueError(f"refusing to archive path outside the bundle: {path!r}")
+    return pure.as_posix()
+
+
+class _ArchiveSink:
+    """Shared parent-directory bookkeeping for the archive sinks."""
+
+    def __init__(self) -> None:
+        self._directories: Set[str] = set()
+
+    def _write_directory(self, name: str) -> None:
+        raise NotImplementedError
+
+    def _parents(self, name: str) -> None:
+        for parent in reversed(PurePosixPath(name).parents[:-1]):
+            self.add_directory(parent.as_posix())
+
+    def add_directory(self, path: str) -> None:
+        name = _validate_member(path)
+        if name in self._directories:
+            return
+        self._parents(name)
+        self._directories.add(name)
+        self._write_directory(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.close()
+        return False
+
+
+class TarSink(_ArchiveSink):
+    """Streams bundles into a tar archive on ``target`` (a path or binary file object)."""
+
+    def __init__(
+        self,
+        target: Union[str, Path, BinaryIO],
+        compression: str = "gz",
+        mtime: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        if compression not in TAR_COMPRESSIONS:
+            raise ValueError(f"tar compression must be one of {TAR_COMPRESSIONS}; got {compression!r}")
+        self._owned: Optional[BinaryIO] = None
+        if isinstance(target, (str, Path)):
+            target = self._owned = open(target, "wb")
+        self._gzip: Optional[gzip.GzipFile] = None
+        if compression == "gz":
+            target = self._gzip = gzip_writer(target)
+            compression = ""
+        # bz2 and xz streams carry no timestamps.
+        self._tar = tarfile.open(fileobj=target, mode=f"w|{compression}", format=tarfile.PAX_FORMAT)
+        self.mtime = source_date_epoch() if mtime is None else mtime
+
+    def _info(self, name: str, mode: int) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(name)
+        info.mode = mode
+        info.mtime = self.mtime
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        return info
+
+    def _write_directory(self, name: str) -> None:
+        info = self._info(name, 0o755)
+        info.type = tarfile.DIRTYPE
+        self._tar.addfile(info)
+
+    def add(self, artifact: Artifact) -> None:
+        name = _validate_member(artifact.path)
+        self._parents(name)
+        info = self._info(name, _archive_mode(artifact.mode))
+        info.size = len(artifact.data)
+        self._tar.addfile(info, io.BytesIO(artifact.data))
+
+    def close(self) -> None:
+        self._tar.close()
+        if self._gzip is not None:
+            self._gzip.close()
+        if self._owned is not None:
+            self._owned.close()
+
+
+class ZipSink(_ArchiveSink):
+    """Streams bundles into a zip archive on ``target`` (a path or binary file object)."""
+
+    def __init__(
+        self,
+        target: Union[str, Path, BinaryIO],
+        compression: int = zipfile.ZIP_DEFLATED,
+        mtime: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        self._zip = zipfile.ZipFile(target, "w", compression=compression)
+        stamp = max(ZIP_EPOCH, source_date_epoch() if mtime is None else mtime)
+        self._date_time = time.gmtime(stamp)[:6]
+
+    def _write_directory(self, name: str) -> None:
+        info = zipfile.ZipInfo(name + "/", self._date_time)
+        info.external_attr = (0o40755 << 16) | 0x10
+        self._zip.writestr(info, b"")
+
+    def add(self, artifact: Artifact) -> None:
+        name = _validate_member(artifact.path)
+        self._parents(name)
+        info = zipfile.ZipInfo(name, self._date_time)
+        info.external_attr = (0o100000 | _archive_mode(artifact.mode)) << 16
+        info.compress_type = self._zip.compression
+        self._zip.writestr(info, artifact.data)
+
+    def close(self) -> None:
+        self._zip.close()
@@ -0,0 +1,265 @@
+"""On-disk caches used by the lesson generator.
+
+Everything lives under ``<repo>/.cache/generate-lesson`` so a single
+``rm -rf .cache`` resets the generator to a cold start.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+from . import __version__
+from .emit import emit_json, write_bytes
+from .profiling import count
+
+CACHE_DIRNAME = Path(".cache") / "generate-lesson"
+
+DEFAULT_PARSE_CACHE_BYTES = 64 * 1024 * 1024
+
+_MISSING = object()
+
+
+def cache_root(root: Path) -> Path:
+    return root / CACHE_DIRNAME
+
+
+@lru_cache(maxsize=1)
+def generator_fingerprint() -> str:
+    """Digest of the generator version and sources so code edits invalidate the cache."""
+    digest = hashlib.sha256(__version__.encode("utf-8"))
+    package_dir = Path(__file__).resolve().parent
+    for source in sorted(package_dir.glob("*.py")):
+        digest.update(source.name.encode("utf-8"))
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def hash_tree(path: Path) -> str:
+    """Digest of every file (relative path and bytes) below ``path``."""
+    digest = hashlib.sha256()
+    if not path.is_dir():
+        digest.update(b"<missing>")
+        return digest.hexdigest()
+    for item in sorted(path.rglob("*")):
+        if not item.is_file():
+            continue
+        digest.update(item.relative_to(path).as_posix().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(hashlib.sha256(item.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def normalize_document(document) -> str:
+    return json.dumps(document, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def compute_lesson_key(
+    manifest: Mapping,
+    service_digests: Iterable[Tuple[str, str]],
+    extra: Sequence[str] = (),
+) -> str:
+    digest = hashlib.sha256()
+    digest.update(generator_fingerprint().encode("utf-8"))
+    for value in extra:
+        digest.update(value.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(normalize_document(manifest).encode("utf-8"))
+    for name, tree_digest in service_digests:
+        digest.update(name.encode("utf-8"))
+        digest.update(tree_digest.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LessonCache:
+    """Records the input key and output inventory of each generated lesson.
+
+    Each output is recorded with its size and mtime so hand edits or an older
+    checkout of the generated tree count as stale and are regenerated.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def _record_path(self, slug: str) -> Path:
+        return self.directory / f"{slug}.json"
+
+    def _load(self, slug: str) -> Optional[dict]:
+        try:
+            record = json.loads(self._record_path(slug).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return record if isinstance(record, dict) else None
+
+    def is_fresh(self, slug: str, key: str, root: Path) -> bool:
+        record = self._load(slug)
+        if not record or record.get("key") != key:
+            return False
+        outputs = record.get("outputs")
+        if not isinstance(outputs, Mapping) or not outputs:
+            return False
+        for relative, signature in outputs.items():
+            try:
+                stat = (root / relative).stat()
+            except OSError:
+                return False
+            # Size alone misses same-length edits and older checkouts; mtime catches both.
+            if signature != [stat.st_size, stat.st_mtime_ns]:
+                return False
+        return True
+
+    def store(self, slug: str, key: str, root: Path, output_dirs: Sequence[Path]) -> None:
+        outputs = {}
+        for output_dir in output_dirs:
+            for item in sorted(output_dir.rglob("*")):
+                if item.is_file():
+                    stat = item.stat()
+                    outputs[item.relative_to(root).as_posix()] = [stat.st_size, stat.st_mtime_ns]
+        emit_json(self._record_path(slug), {"key": key, "outputs": outputs})
+
+
+class ParseCache:
+    """Persistent, size-bounded LRU cache of parsed YAML documents.
+
+    Documents are pickled under ``objects/`` and named by a digest of the
+    parser namespace and the file content. A per-namespace index maps each
+    source path to its size, mtime and content digest, so unchanged files are
+    served without being read. Object mtimes track recency for eviction.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        namespace: str,
+        max_bytes: int = DEFAULT_PARSE_CACHE_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._namespace_bytes = namespace.encode("utf-8") + b"\0"
+        namespace_digest = hashlib.sha256(self._namespace_bytes).hexdigest()[:16]
+        self._index_path = directory / f"index-{namespace_digest}.pickle"
+        self._index: Optional[Dict[str, Tuple[int, int, str]]] = None
+        self._dirty: Dict[str, Tuple[int, int, str]] = {}
+
+    def _object_path(self, key: str) -> Path:
+        return self.directory / "objects" / f"{key}.pickle"
+
+    def _read_index(self) -> Dict[str, Tuple[int, int, str]]:
+        try:
+            with self._index_path.open("rb") as handle:
+                index = pickle.load(handle)
+        except Exception:
+            return {}
+        return index if isinstance(index, dict) else {}
+
+    def _read_object(self, key: str):
+        path = self._object_path(key)
+        try:
+            with path.open("rb") as handle:
+                document = pickle.load(handle)
+        except Exception:
+            return _MISSING
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return document
+
+    def load(self, path: Path, parse: Callable[[str], object]):
+        stat = path.stat()
+        index_key = str(path.resolve())
+        if self._index is None:
+            self._index = self._read_index()
+        record = self._dirty.get(index_key) or self._index.get(index_key)
+        if record and record[0] == stat.st_size and record[1] == stat.st_mtime_ns:
+            document = self._read_object(record[2])
+            if document is not _MISSING:
+                self.hits += 1
+                count("parse_cache_hits")
+                return document
+
+        data = path.read_bytes()
+        key = hashlib.sha256(self._namespace_bytes + data).hexdigest()
+        document = self._read_object(key)
+        if document is _MISSING:
+            document = parse(data.decode("utf-8"))
+            self.misses += 1
+            count("parse_cache_misses")
+            try:
+                write_bytes(self._object_path(key), pickle.dumps(document, pickle.HIGHEST_PROTOCOL))
+            except (OSError, pickle.PicklingError):
+                return document
+        else:
+            self.hits += 1
+            count("parse_cache_hits")
+        self._dirty[index_key] = (stat.st_size, stat.st_mtime_ns, key)
+        return document
+
+    def flush(self) -> None:
+        """Merge new index records into the on-disk index and enforce the size bound."""
+        if not self._dirty:
+            return
+        # Re-read so concurrent workers do not drop each other's records.
+        index = self._read_index()
+        index.update(self._dirty)
+        try:
+            write_bytes(self._index_path, pickle.dumps(index, pickle.HIGHEST_PROTOCOL))
+        except OSError:
+            return
+        self._index = index
+        self._dirty = {}
+        self._evict()
+
+    def _evict(self) -> None:
+        objects = []
+        total = 0
+        try:
+            with os.scandir(self.directory / "objects") as entries:
+                for entry in entries:
+                    stat = entry.stat()
+                    objects.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total += stat.st_size
+        except OSError:
+            return
+        if total <= self.max_bytes:
+            return
+        for _mtime, size, path in sorted(objects):
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+_PARSE_CACHES: Dict[Tuple[Path, str], ParseCache] = {}
+
+
+def get_parse_cache(directory: Path, namespace: str) -> ParseCache:
+    cache = _PARSE_CACHES.get((directory, namespace))
+    if cache is None:
+        cache = _PARSE_CACHES[(directory, namespace)] = ParseCache(directory, namespace)
+    return cache
+
+
+def flush_parse_caches() -> None:
+    for cache in _PARSE_CACHES.values():
+        cache.flush()
+
+
+def load_yaml_file(root: Path, path: Path):
+    """Parse the YAML file ``path`` through ``root``'s persistent parse cache.
+
+    For tools that share the cache without importing the whole generator.
+    """
+    from .yamlio import load_yaml_text, yaml_namespace
+
+    return get_parse_cache(cache_root(root) / "parse", yaml_namespace()).load(path, load_yaml_text)
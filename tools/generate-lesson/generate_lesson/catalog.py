@@ -0,0 +1,196 @@
+"""In-process index of the service catalog.
+
+``services/`` and ``catalog/services.json`` are scanned once per run and every
+generator stage queries the resulting :class:`ServiceCatalog` instead of the
+filesystem. Compose fragments are parsed at most once per run, so batch
+generation costs O(services) parses rather than O(lessons x services).
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+from .cache import hash_tree
+
+ENV_EXAMPLE_NAME = ".env.example"
+
+
+@dataclass(frozen=True)
+class ServiceEntry:
+    name: str
+    directory: Path
+    # Every file below the service directory (relative, posix, sorted), excluding
+    # the top-level .env.example which is materialized separately.
+    files: Tuple[str, ...]
+    # Top-level compose fragments (``*.yml``) in directory order.
+    fragments: Tuple[str, ...]
+    env_example: Optional[Path]
+
+
+class ServiceCatalog:
+    def __init__(
+        self,
+        root: Path,
+        entries: Mapping[str, ServiceEntry],
+        metadata: Mapping[str, Mapping[str, object]],
+        load_document: Callable[[Path], object],
+    ) -> None:
+        self.root = root
+        self._entries = dict(entries)
+        self._metadata = dict(metadata)
+        self._load_document = load_document
+        self._documents: Dict[Tuple[str, str], object] = {}
+        self._digests: Dict[str, str] = {}
+        # Bumped by refresh() so derived indexes (the service registry) know to rebuild.
+        self.generation = 0
+
+    @classmethod
+    def scan(cls, root: Path, load_document: Callable[[Path], object]) -> "ServiceCatalog":
+        services_dir = root / "services"
+        entries: Dict[str, ServiceEntry] = {}
+        if services_dir.is_dir():
+            for service_dir in sorted(services_dir.iterdir()):
+                if service_dir.is_dir():
+                    entries[service_dir.name] = _scan_service(service_dir)
+        return cls(root, entries, _load_catalog_metadata(root), load_document)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def get(self, name: str) -> Optional[ServiceEntry]:
+        return self._entries.get(name)
+
+    def metadata(self, name: str) -> Mapping[str, object]:
+        return self._metadata.get(name, {})
+
+    def digest(self, name: str) -> str:
+        """Digest of ``services/<name>`` and its ``catalog/services.json`` entry."""
+        digest = self._digests.get(name)
+        if digest is None:
+            digest = hash_tree(self.root / "services" / name)
+            metadata = self._metadata.get(name)
+            if metadata:
+                payload = digest + json.dumps(metadata, sort_keys=True, default=str)
+                digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+            self._digests[name] = digest
+        return digest
+
+    def compose_document(self, name: str, file_name: str):
+        """Parsed compose fragment ``services/<name>/<file_name>``, or ``None``."""
+        key = (name, file_name)
+        if key in self._documents:
+            return self._documents[key]
+        document = None
+        entry = self._entries.get(name)
+        if entry is not None and file_name in entry.files:
+            try:
+                document = self._load_document(entry.directory / file_name)
+            except Exception:
+                document = None
+        self._documents[key] = document
+        return document
+
+    def compose_service(self, name: str, file_name: str, service_name: str) -> Optional[Mapping]:
+        document = self.compose_document(name, file_name)
+        if not isinstance(document, Mapping):
+            return None
+        services = document.get("services")
+        if not isinstance(services, Mapping):
+            return None
+        entry = services.get(service_name)
+        return entry if isinstance(entry, Mapping) else None
+
+    def image_reference(self, name: str, file_name: str, service_name: str) -> Optional[str]:
+        entry = self.compose_service(name, file_name, service_name)
+        if entry is None or not entry.get("image"):
+            return None
+        return str(entry["image"])
+
+    def refresh(self, name: str) -> None:
+        """Rescan ``services/<name>`` after it changed on disk (long-running processes)."""
+        service_dir = self.root / "services" / name
+        if service_dir.is_dir():
+            self._entries[name] = _scan_service(service_dir)
+            self._entries = dict(sorted(self._entries.items()))
+        else:
+            self._entries.pop(name, None)
+        self._digests.pop(name, None)
+        for key in [key for key in self._documents if key[0] == name]:
+            del self._documents[key]
+        hash_tree.cache_clear()
+        self.generation += 1
+
+    def refresh_metadata(self) -> None:
+        """Reload ``catalog/services.json`` after it changed on disk (long-running processes)."""
+        self._metadata = _load_catalog_metadata(self.root)
+        self._digests.clear()
+        self.generation += 1
+
+    def preload(self) -> "ServiceCatalog":
+        """Parse every fragment and digest every service ahead of a batch run."""
+        for name, entry in self._entries.items():
+            self.digest(name)
+            for file_name in entry.fragments:
+                self.compose_document(name, file_name)
+        return self
+
+
+def _scan_service(service_dir: Path) -> ServiceEntry:
+    files = []
+    fragments = []
+    for item in sorted(service_dir.rglob("*")):
+        if not item.is_file():
+            continue
+        relative = item.relative_to(service_dir).as_posix()
+        if relative == ENV_EXAMPLE_NAME:
+            continue
+        files.append(relative)
+        if "/" not in relative and item.suffix == ".yml":
+            fragments.append(relative)
+    env_example = service_dir / ENV_EXAMPLE_NAME
+    return ServiceEntry(
+        name=service_dir.name,
+        directory=service_dir,
+        files=tuple(files),
+        fragments=tuple(sorted(fragments)),
+        env_example=env_example if env_example.is_file() else None,
+    )
+
+
+def _load_catalog_metadata(root: Path) -> Dict[str, Mapping[str, object]]:
+    path = root / "catalog" / "services.json"
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    services = payload.get("services") if isinstance(payload, Mapping) else None
+    metadata: Dict[str, Mapping[str, object]] = {}
+    for service in services or []:
+        if isinstance(service, Mapping) and service.get("id"):
+            metadata[str(service["id"])] = service
+    return metadata
+
+
+_CATALOGS: Dict[Path, ServiceCatalog] = {}
+
+
+def get_service_catalog(root: Path, load_document: Callable[[Path], object]) -> ServiceCatalog:
+    """Return the per-process catalog for ``root``, scanning it on first use."""
+    catalog = _CATALOGS.get(root)
+    if catalog is None:
+        catalog = _CATALOGS[root] = ServiceCatalog.scan(root, load_document)
+    return catalog
+
+
+def register_service_catalog(catalog: ServiceCatalog) -> None:
+    _CATALOGS[catalog.root] = catalog
+
+
+def clear_service_catalogs() -> None:
+    _CATALOGS.clear()
+    hash_tree.cache_clear()
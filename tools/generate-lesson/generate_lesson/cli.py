@@ -1,81 +1,57 @@
 import argparse
+import glob
+import io
 import json
+import os
 import re
-import shutil
 import sys
+import time
+from contextlib import redirect_stderr, redirect_stdout
 from dataclasses import dataclass
 from pathlib import Path
+from functools import partial
 from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
-try:
-    import yaml  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - fallback when PyYAML is unavailable
-    yaml = None
+from .cache import (
+    LessonCache,
+    ParseCache,
+    cache_root,
+    compute_lesson_key,
+    flush_parse_caches,
+    get_parse_cache,
+)
+from .catalog import ServiceCatalog, get_service_catalog, register_service_catalog
+from .compose import COMPOSE_MODES, apply_environment, collect_volumes, dump_yaml, resolve_service
+from .conflicts import PortRemap, apply_port_remap, build_lesson_index
+from .deps import CATALOG_FILE, DependencyIndex, flush_dependency_indexes, get_dependency_index, relative_key
+from .diagnostics import FORMATS, CollectingReporter, RecordWriter, get_reporter, use_reporter
+from .emit import emit_copy, emit_json, emit_text, make_dirs
+from .materialize import LINK_MODES, materialize_file
+from . import profiling
+from .profiling import count, stage, timed
+from .registry import ServiceRegistry, get_service_registry
+from .resources import (
+    RESOURCE_KEYS,
+    Footprint,
+    apply_compose_limits,
+    estimate_lesson,
+    over_budget,
+    preset_footprint,
+    suggested_resources,
+)
+from .slug import derive_lesson_slug
+from .yamlio import (
+    YAML_BACKENDS,
+    load_yaml_text,
+    parse_simple_yaml,  # noqa: F401 - re-exported for existing callers
+    set_yaml_backend,
+    yaml_backend,
+    yaml_namespace,
+)
 
 ROOT = Path(__file__).resolve().parents[3]
 
 
-SERVICE_PORT_LABELS: Mapping[str, Mapping[int, str]] = {
-    "redis": {6379: "Redis"},
-    "supabase": {
-        54322: "Supabase Postgres",
-        54323: "Supabase REST",
-        54324: "Supabase Realtime",
-        54326: "Supabase Studio",
-    },
-    "kafka": {9092: "Kafka Broker"},
-    "inbucket": {9000: "Inbucket UI", 2500: "Inbucket SMTP"},
-    "prefect": {4200: "Prefect UI"},
-    "airflow": {8080: "Airflow UI"},
-    "dagster": {3000: "Dagster UI"},
-    "temporal": {7233: "Temporal gRPC", 8080: "Temporal UI"},
-}
-
-
-SERVICE_EXTENDS: Mapping[str, Sequence[Tuple[str, str]]] = {
-    "redis": (("docker-compose.redis.yml", "redis"),),
-    "supabase": (
-        ("docker-compose.supabase.yml", "supabase-db"),
-        ("docker-compose.supabase.yml", "supabase-rest"),
-        ("docker-compose.supabase.yml", "supabase-realtime"),
-        ("docker-compose.supabase.yml", "supabase-studio"),
-    ),
-    "kafka": (
-        ("docker-compose.kafka-kraft.yml", "kafka"),
-        ("docker-compose.kafka-utils.yml", "kafka-producer"),
-        ("docker-compose.kafka-utils.yml", "kafka-consumer"),
-    ),
-    "inbucket": (("docker-compose.inbucket.yml", "inbucket"),),
-    "prefect": (("docker-compose.prefect.yml", "prefect"),),
-    "airflow": (
-        ("docker-compose.airflow.yml", "airflow-db"),
-        ("docker-compose.airflow.yml", "airflow-init"),
-        ("docker-compose.airflow.yml", "airflow-webserver"),
-        ("docker-compose.airflow.yml", "airflow-scheduler"),
-    ),
-    "dagster": (
-        ("docker-compose.dagster.yml", "dagster-postgres"),
-        ("docker-compose.dagster.yml", "dagster-webserver"),
-        ("docker-compose.dagster.yml", "dagster-daemon"),
-    ),
-    "temporal": (
-        ("docker-compose.temporal.yml", "temporal-db"),
-        ("docker-compose.temporal.yml", "temporal"),
-        ("docker-compose.temporal.yml", "temporal-ui"),
-    ),
-}
-
-
-SERVICE_VOLUMES: Mapping[str, Sequence[str]] = {
-    "airflow": ("airflow-db-data", "airflow-dags", "airflow-logs"),
-    "dagster": ("dagster-db-data", "dagster-home"),
-    "temporal": ("temporal-db-data",),
-}
-
-
-SERVICES_REQUIRE_CLASSROOM_NETWORK = {"prefect", "airflow", "dagster", "temporal"}
-
-
 SUPPORTED_SPEC_FIELDS = {
     "base_preset",
     "image_tag_strategy",
@@ -98,6 +74,20 @@ REQUIRED_METADATA_FIELDS = ("org", "course", "lesson")
 REQUIRED_SPEC_FIELDS = ("base_preset", "image_tag_strategy")
 
 
+@dataclass(frozen=True)
+class GenerateOptions:
+    use_cache: bool = True
+    link_mode: str = "auto"
+    # "text" prints diagnostics; "json"/"ndjson" collect them as records.
+    output_format: str = "text"
+    # "flatten" resolves services into the aggregate compose; "extends" keeps stubs.
+    compose_mode: str = "flatten"
+    # Move colliding host ports to free ones instead of failing generation.
+    remap_ports: bool = False
+    # Fail generation, instead of warning, when services exceed spec.resources.
+    enforce_resources: bool = False
+
+
 @dataclass(frozen=True)
 class ServiceArtifacts:
     names: Tuple[str, ...]
@@ -107,10 +97,13 @@ class ServiceArtifacts:
     missing: Tuple[str, ...]
 
 
-def _slugify_component(value: str) -> str:
-    slug = re.sub(r"[^a-z0-9]+", "-", value.lower().strip())
-    slug = re.sub(r"-+", "-", slug).strip("-")
-    return slug or "lesson"
+@dataclass(frozen=True)
+class LessonAdmission:
+    """Planned services and the outcome of the checks that gate emission."""
+
+    artifacts: ServiceArtifacts
+    port_remap: Tuple[PortRemap, ...]
+    resource_limits: Dict[str, Footprint]
 
 
 def _format_service_heading(name: str) -> str:
@@ -119,11 +112,6 @@ def _format_service_heading(name: str) -> str:
     return formatted or str(name)
 
 
-def derive_lesson_slug(metadata: Dict[str, str]) -> str:
-    parts = (_slugify_component(str(metadata[key])) for key in ("org", "course", "lesson"))
-    return "-".join(part for part in parts if part)
-
-
 def _collect_extensions(raw_extensions: Iterable[str]) -> Tuple[str, ...]:
     seen = set()
     ordered = []
@@ -135,96 +123,16 @@ def _collect_extensions(raw_extensions: Iterable[str]) -> Tuple[str, ...]:
     return tuple(ordered)
 
 
-def _parse_scalar(value: str):
-    value = value.strip()
-    if value.startswith('"') and value.endswith('"'):
-        return value[1:-1]
-    if value.startswith("'") and value.endswith("'"):
-        return value[1:-1]
-    lowered = value.lower()
-    if lowered in {"true", "false"}:
-        return lowered == "true"
-    try:
-        return int(value)
-    except ValueError:
-        pass
-    try:
-        return float(value)
-    except ValueError:
-        pass
-    return value
-
-
-def _parse_block(lines, index, current_indent):
-    result_dict = {}
-    result_list = None
-    length = len(lines)
-    while index < length:
-        indent, content = lines[index]
-        if indent < current_indent:
-            break
-        if indent > current_indent:
-            raise ValueError(f"Invalid indentation at line: {content}")
-        if content.startswith('- '):
-            if result_dict:
-                raise ValueError("Cannot mix mapping and list entries")
-            if result_list is None:
-                result_list = []
-            item = content[2:].strip()
-            if not item:
-                value, index = _parse_block(lines, index + 1, current_indent + 2)
-                result_list.append(value)
-                continue
-            if item.endswith(':'):
-                key = item[:-1].strip()
-                value, index = _parse_block(lines, index + 1, current_indent + 2)
-                result_list.append({key: value})
-                continue
-            if ': ' in item:
-                key, value = item.split(':', 1)
-                result_list.append({key.strip(): _parse_scalar(value)})
-                index += 1
-                continue
-            result_list.append(_parse_scalar(item))
-            index += 1
-            continue
-        if ':' in content:
-            key, remainder = content.split(':', 1)
-            key = key.strip()
-            remainder = remainder.strip()
-            if remainder:
-                result_dict[key] = _parse_scalar(remainder)
-                index += 1
-                continue
-            value, index = _parse_block(lines, index + 1, current_indent + 2)
-            result_dict[key] = value
-            continue
-        raise ValueError(f"Unsupported YAML line: {content}")
-    if result_list is not None:
-        return result_list, index
-    return result_dict, index
-
-
-def parse_simple_yaml(text: str):
-    lines = []
-    for raw in text.splitlines():
-        if not raw.strip() or raw.lstrip().startswith('#'):
-            continue
-        indent = len(raw) - len(raw.lstrip(' '))
-        lines.append((indent, raw.strip()))
-    value, index = _parse_block(lines, 0, 0)
-    if index != len(lines):
-        raise ValueError("Unexpected trailing content in manifest")
-    return value
+def parse_cache() -> ParseCache:
+    return get_parse_cache(cache_root(ROOT) / "parse", yaml_namespace())
 
 
+@timed("parse_manifest")
 def load_manifest(path: Path) -> dict:
-    text = path.read_text(encoding="utf-8")
-    if yaml is not None:
-        return yaml.safe_load(text)
-    return parse_simple_yaml(text)
+    return parse_cache().load(path, load_yaml_text)
 
 
+@timed("validate_structure")
 def validate_manifest_structure(manifest) -> Tuple[Dict[str, str], Dict[str, object], Tuple[str, ...]]:
     errors: List[str] = []
     if not isinstance(manifest, Mapping):
@@ -257,7 +165,7 @@ def validate_manifest_structure(manifest) -> Tuple[Dict[str, str], Dict[str, obj
 
 
 def ensure_dir(path: Path) -> None:
-    path.mkdir(parents=True, exist_ok=True)
+    make_dirs(path)
 
 
 def _normalize_service_vars(raw_vars) -> Dict[str, str]:
@@ -272,9 +180,85 @@ def _normalize_service_vars(raw_vars) -> Dict[str, str]:
     return normalized
 
 
-def merge_services(services, out_dir: Path) -> ServiceArtifacts:
+def _service_entry(svc) -> Tuple[str, Dict[str, str]]:
+    if isinstance(svc, dict):
+        name = str((svc or {}).get("name", "")).strip()
+        return name, _normalize_service_vars((svc or {}).get("vars"))
+    return str(svc or "").strip(), {}
+
+
+def requested_service_names(services) -> Tuple[str, ...]:
+    ordered: List[str] = []
+    for svc in services or []:
+        name, _ = _service_entry(svc)
+        if name and name not in ordered:
+            ordered.append(name)
+    return tuple(ordered)
+
+
+def service_catalog() -> ServiceCatalog:
+    return get_service_catalog(ROOT, load_yaml_document)
+
+
+def service_registry() -> ServiceRegistry:
+    return get_service_registry(service_catalog())
+
+
+def dependency_index() -> DependencyIndex:
+    return get_dependency_index(ROOT, cache_root(ROOT))
+
+
+@timed("record_dependencies")
+def record_lesson_dependencies(manifest_path: Path, slug: str, spec: Mapping[str, object]) -> None:
+    catalog = service_catalog()
+    services = requested_service_names(spec.get("services"))
+    files = [
+        f"services/{name}/{fragment}"
+        for name in services
+        if name in catalog
+        for fragment in catalog.get(name).fragments
+    ]
+    if services:
+        files.append(CATALOG_FILE)
+    base_preset = spec.get("base_preset")
+    dependency_index().record(manifest_path, slug, services, str(base_preset) if base_preset else None, files)
+
+
+def record_generated_lessons(entries: Iterable[Tuple[str, Optional[dict], str]]) -> None:
+    """Record ``(manifest path, manifest, slug)`` entries after generation.
+
+    Batch workers cannot share the dependency index, so generation never records
+    dependencies itself; the process that owns the index does, once per manifest.
+    """
+    for path, manifest, slug in entries:
+        if slug:
+            record_lesson_dependencies(Path(path), slug, manifest["spec"])
+
+
+def refresh_dependency_index(manifest_paths: Iterable[Path]) -> None:
+    """Re-read manifests whose index records are stale and drop deleted ones."""
+    index = dependency_index()
+    for key in list(index.lessons):
+        if not (ROOT / key).exists():
+            index.forget(key)
+    for manifest_path in manifest_paths:
+        if index.is_current(manifest_path):
+            continue
+        manifest, slug = _load_batch_entry(manifest_path)
+        if not slug:
+            index.forget(relative_key(ROOT, manifest_path.resolve()))
+            continue
+        record_lesson_dependencies(manifest_path, slug, manifest["spec"])
+
+
+def plan_services(services, out_dir: Path) -> ServiceArtifacts:
+    """Resolve ``spec.services`` against the catalog without writing anything.
+
+    Fragment and ``.env.example`` paths point at where
+    :func:`materialize_services` will place them under ``out_dir``.
+    """
     svc_root = out_dir / "services"
-    ensure_dir(svc_root)
+    catalog = service_catalog()
 
     ordered: List[str] = []
     fragments: Dict[str, Tuple[Path, ...]] = {}
@@ -283,54 +267,46 @@ def merge_services(services, out_dir: Path) -> ServiceArtifacts:
     missing: List[str] = []
 
     for svc in services or []:
-        if isinstance(svc, dict):
-            name = str((svc or {}).get("name", "")).strip()
-            vars_payload = _normalize_service_vars((svc or {}).get("vars"))
-        else:
-            name = str(svc or "").strip()
-            vars_payload = {}
+        name, vars_payload = _service_entry(svc)
         if not name:
             continue
-        src_dir = ROOT / "services" / name
-        if not src_dir.exists():
+        entry = catalog.get(name)
+        if entry is None:
             if name not in missing:
                 missing.append(name)
             continue
 
         if name not in ordered:
             ordered.append(name)
+        fragments[name] = tuple(svc_root / name / file_name for file_name in entry.fragments)
+        if entry.env_example is not None:
+            env_examples[name] = out_dir / f".env.example-{name}"
+        if vars_payload:
+            service_vars[name] = vars_payload
 
-        dest_dir = svc_root / name
-        ensure_dir(dest_dir)
-
-        fragment_paths: List[Path] = []
-        for item in sorted(src_dir.iterdir()):
-            if item.name == ".env.example":
-                continue
-            if item.is_dir():
-                shutil.copytree(item, dest_dir / item.name, dirs_exist_ok=True)
-                continue
-            if item.suffix == ".yml":
-                dst = dest_dir / item.name
-                shutil.copy2(item, dst)
-                fragment_paths.append(dst)
-            else:
-                shutil.copy2(item, dest_dir / item.name)
+    return ServiceArtifacts(tuple(ordered), fragments, env_examples, service_vars, tuple(missing))
 
-        if not fragment_paths:
-            fragment_paths = list(sorted(dest_dir.glob("*.yml")))
-        fragments[name] = tuple(fragment_paths)
 
-        env_src = src_dir / ".env.example"
-        if env_src.exists():
-            dst = out_dir / f".env.example-{name}"
-            shutil.copy2(env_src, dst)
-            env_examples[name] = dst
+@timed("merge_services")
+def materialize_services(artifacts: ServiceArtifacts, out_dir: Path, link_mode: str = "auto") -> None:
+    """Copy (or link) each planned service's files into ``out_dir``."""
+    svc_root = out_dir / "services"
+    ensure_dir(svc_root)
+    catalog = service_catalog()
+    for name in artifacts.names:
+        entry = catalog.get(name)
+        dest_dir = svc_root / name
+        ensure_dir(dest_dir)
+        for relative in entry.files:
+            materialize_file(entry.directory / relative, dest_dir / relative, link_mode)
+        if name in artifacts.env_examples:
+            materialize_file(entry.env_example, artifacts.env_examples[name], link_mode)
 
-        if vars_payload:
-            service_vars[name] = vars_payload
 
-    return ServiceArtifacts(tuple(ordered), fragments, env_examples, service_vars, tuple(missing))
+def merge_services(services, out_dir: Path, link_mode: str = "auto") -> ServiceArtifacts:
+    artifacts = plan_services(services, out_dir)
+    materialize_services(artifacts, out_dir, link_mode)
+    return artifacts
 
 
 def _build_vscode_customizations(spec: dict) -> Dict[str, dict]:
@@ -397,6 +373,9 @@ def _apply_optional_devcontainer_overrides(devc: Dict[str, object], spec: dict)
         memory_value = resources.get("memory")
         if memory_value is not None:
             host_requirements["memory"] = str(memory_value)
+        disk_value = resources.get("disk")
+        if disk_value is not None:
+            host_requirements["storage"] = str(disk_value)
         if host_requirements:
             devc["hostRequirements"] = host_requirements
 
@@ -413,10 +392,14 @@ def partition_spec_fields(spec: Mapping[str, object]) -> Tuple[Tuple[str, ...],
     return unsupported, unknown
 
 
+@timed("aggregate_compose")
 def generate_aggregate_compose(
     manifest: dict,
     out_dir: Path,
     artifacts: ServiceArtifacts,
+    compose_mode: str = "flatten",
+    port_remap: Sequence[PortRemap] = (),
+    resource_limits: Optional[Mapping[str, Footprint]] = None,
 ) -> Optional[Path]:
     spec = manifest.get("spec", {})
     if not spec.get("emit_aggregate_compose", True):
@@ -424,71 +407,268 @@ def generate_aggregate_compose(
     if not artifacts.names:
         return None
 
+    registry = service_registry()
     services_block: Dict[str, Dict[str, Dict[str, str]]] = {}
     volumes: List[str] = []
     needs_classroom = False
 
     for manifest_service in artifacts.names:
-        extends_entries = SERVICE_EXTENDS.get(manifest_service, ())
-        if not extends_entries:
+        record = registry.get(manifest_service)
+        if not record.extends:
             continue
-        for file_name, service_name in extends_entries:
+        for file_name, service_name in record.extends:
             compose_file = f"./services/{manifest_service}/{file_name}"
             services_block[service_name] = {
                 "extends": {"file": compose_file, "service": service_name}
             }
-        for volume in SERVICE_VOLUMES.get(manifest_service, ()): 
+        for volume in record.volumes:
             if volume not in volumes:
                 volumes.append(volume)
-        if manifest_service in SERVICES_REQUIRE_CLASSROOM_NETWORK:
+        if record.classroom_network:
             needs_classroom = True
 
     if not services_block:
         return None
+    if compose_mode == "flatten":
+        return _write_flattened_compose(
+            out_dir, artifacts, services_block, volumes, needs_classroom, port_remap, resource_limits
+        )
+    if compose_mode != "extends":
+        raise ValueError(f"compose mode must be one of {', '.join(COMPOSE_MODES)}; got {compose_mode!r}")
+
+    lines = [
+        "# Auto-generated by tools/generate-lesson from selected service fragments.\n",
+        "# You can run:\n",
+        "#   docker compose -f docker-compose.classroom.yml up -d\n\n",
+        'version: "3.9"\n',
+        "services:\n",
+    ]
+    for service_name in sorted(services_block):
+        extends = services_block[service_name]["extends"]
+        lines.append(f"  {service_name}:\n")
+        lines.append("    extends:\n")
+        lines.append(f"      file: {extends['file']}\n")
+        lines.append(f"      service: {extends['service']}\n")
+        parent_service = extends["file"].split("/")[2]
+        overrides = artifacts.vars.get(parent_service, {})
+        if overrides:
+            lines.append("    environment:\n")
+            for key in sorted(overrides):
+                value = overrides[key]
+                lines.append(f"      {key}: {json.dumps(value)}\n")
+
+    if volumes:
+        lines.append("\nvolumes:\n")
+        for volume in volumes:
+            lines.append(f"  {volume}:\n")
+
+    if needs_classroom:
+        lines.append("\nnetworks:\n")
+        lines.append("  classroom: { name: classroom }\n")
 
     target = out_dir / "docker-compose.classroom.yml"
-    with target.open("w", encoding="utf-8") as handle:
-        handle.write(
-            "# Auto-generated by tools/generate-lesson from selected service fragments.\n"
-        )
-        handle.write("# You can run:\n")
-        handle.write("#   docker compose -f docker-compose.classroom.yml up -d\n\n")
-        handle.write('version: "3.9"\n')
-        handle.write("services:\n")
-        for service_name in sorted(services_block):
-            extends = services_block[service_name]["extends"]
-            handle.write(f"  {service_name}:\n")
-            handle.write("    extends:\n")
-            handle.write(f"      file: {extends['file']}\n")
-            handle.write(f"      service: {extends['service']}\n")
-            parent_service = extends["file"].split("/")[2]
-            overrides = artifacts.vars.get(parent_service, {})
-            if overrides:
-                handle.write("    environment:\n")
-                for key in sorted(overrides):
-                    value = overrides[key]
-                    handle.write(f"      {key}: {json.dumps(value)}\n")
-
-        if volumes:
-            handle.write("\nvolumes:\n")
-            for volume in volumes:
-                handle.write(f"  {volume}:\n")
-
-        if needs_classroom:
-            handle.write("\nnetworks:\n")
-            handle.write("  classroom: { name: classroom }\n")
+    emit_text(target, "".join(lines))
+    return target
+
 
+def _write_flattened_compose(
+    out_dir: Path,
+    artifacts: ServiceArtifacts,
+    services_block: Mapping[str, Mapping[str, Mapping[str, str]]],
+    declared_volumes: List[str],
+    needs_classroom: bool,
+    port_remap: Sequence[PortRemap] = (),
+    resource_limits: Optional[Mapping[str, Footprint]] = None,
+) -> Optional[Path]:
+    resource_limits = resource_limits or {}
+    catalog = service_catalog()
+    report = get_reporter().report
+    resolved: Dict[str, Tuple[str, str, Dict[str, object]]] = {}
+    for service_name in sorted(services_block):
+        file_path = services_block[service_name]["extends"]["file"]
+        _dot, _services, parent_service, file_name = file_path.split("/", 3)
+        definition = resolve_service(catalog, parent_service, file_name, service_name)
+        if definition is None:
+            report(
+                "compose-service-missing",
+                "warn",
+                f"services/{parent_service}/{file_name} does not define {service_name}; "
+                "it is left out of the aggregate compose",
+                field="spec.services",
+            )
+            continue
+        apply_environment(definition, artifacts.vars.get(parent_service, {}))
+        apply_port_remap(service_name, definition, port_remap)
+        apply_compose_limits(definition, resource_limits.get(service_name))
+        resolved[service_name] = (parent_service, file_name, definition)
+    if not resolved:
+        return None
+
+    document: Dict[str, object] = {
+        "version": "3.9",
+        "services": {name: definition for name, (_service, _file, definition) in resolved.items()},
+    }
+    volumes = collect_volumes(catalog, resolved, declared_volumes)
+    if volumes:
+        document["volumes"] = volumes
+    if needs_classroom:
+        document["networks"] = {"classroom": {"name": "classroom"}}
+
+    header = (
+        "# Auto-generated by tools/generate-lesson from selected service fragments.\n"
+        "# Service definitions are resolved from services/ at generation time (no extends).\n"
+        "# You can run:\n"
+        "#   docker compose -f docker-compose.classroom.yml up -d\n\n"
+    )
+    sections = [dump_yaml({key: value}) for key, value in document.items()]
+    target = out_dir / "docker-compose.classroom.yml"
+    emit_text(target, header + "\n".join(sections))
     return target
 
 
-def collect_ports_attributes(artifacts: ServiceArtifacts) -> Dict[str, Dict[str, str]]:
+@timed("check_conflicts")
+def check_service_conflicts(
+    artifacts: ServiceArtifacts,
+    remap_ports: bool = False,
+) -> Tuple[bool, List[PortRemap]]:
+    """Report port, container-name, volume and network collisions between the lesson's services.
+
+    Returns ``(ok, remaps)``. ``ok`` is ``False`` when an error-level collision
+    remains; with ``remap_ports`` host-port collisions are remapped instead.
+    """
+    catalog = service_catalog()
+    registry = service_registry()
+    report = get_reporter().report
+    definitions: List[Tuple[str, str, Mapping]] = []
+    networks: List[Tuple[str, Mapping]] = []
+    seen_files = set()
+    for name in artifacts.names:
+        for file_name, service_name in registry.extends(name):
+            definition = resolve_service(catalog, name, file_name, service_name)
+            if definition is not None:
+                definitions.append((name, service_name, definition))
+            if (name, file_name) in seen_files:
+                continue
+            seen_files.add((name, file_name))
+            document = catalog.compose_document(name, file_name)
+            declared = document.get("networks") if isinstance(document, Mapping) else None
+            if isinstance(declared, Mapping):
+                networks.append((name, declared))
+    catalog_ports = {
+        name: [port for port in catalog.metadata(name).get("ports") or () if isinstance(port, int)]
+        for name in artifacts.names
+    }
+    port_labels = {name: registry.port_labels(name) for name in artifacts.names}
+    index = build_lesson_index(artifacts.names, definitions, port_labels, catalog_ports, networks)
+
+    remaps = index.remap_ports() if remap_ports else []
+    remapped = {(remap.old_port, remap.protocol) for remap in remaps}
+    ok = True
+    for conflict in index.conflicts():
+        if conflict.kind == "port" and conflict.severity == "error":
+            port, _, protocol = conflict.key.partition("/")
+            if (int(port), protocol or "tcp") in remapped:
+                continue
+            message = f"{conflict.message()}; pass --remap-ports to move the later services to free ports"
+        else:
+            message = conflict.message()
+        report(conflict.code, conflict.severity, message, field="spec.services")
+        ok = ok and conflict.severity != "error"
+    for remap in remaps:
+        report(
+            "port-remapped",
+            "hint",
+            f"Remapped {remap.container} ({remap.service}) host port {remap.old_port} to {remap.new_port}",
+            field="spec.services",
+        )
+    return ok, remaps
+
+
+@timed("check_resources")
+def check_resource_budget(
+    manifest: dict,
+    artifacts: ServiceArtifacts,
+    enforce: bool = False,
+) -> Tuple[bool, Dict[str, Footprint]]:
+    """Estimate the lesson footprint and compare it with ``spec.resources``.
+
+    Returns ``(ok, limits)``: ``ok`` is ``False`` only when ``enforce`` is set
+    and the footprint exceeds the budget; ``limits`` maps compose services to
+    their catalog footprint.
+    """
+    spec = manifest["spec"]
+    report = get_reporter().report
+    catalog = service_catalog()
+    try:
+        estimate = estimate_lesson(
+            artifacts.names,
+            {name: catalog.metadata(name) for name in artifacts.names},
+            preset_footprint(ROOT, spec.get("base_preset")),
+        )
+    except ValueError as exc:
+        report("catalog-resources-invalid", "error", str(exc), field="spec.services")
+        return False, {}
+    if not artifacts.names:
+        return True, estimate.containers
+
+    for name in estimate.unknown:
+        report(
+            "resource-footprint-missing",
+            "hint",
+            f"catalog/services.json declares no resources for {name}; it is left out of the estimate",
+            field="spec.services",
+        )
+    total = estimate.total
+
+    resources = spec.get("resources")
+    budget: Dict[str, object] = {}
+    for key in RESOURCE_KEYS:
+        value = resources.get(key) if isinstance(resources, Mapping) else None
+        if value is None:
+            continue
+        try:
+            Footprint.from_mapping({key: value})
+        except ValueError as exc:
+            report("resource-invalid", "warn", f"spec.resources.{key}: {exc}", field=f"spec.resources.{key}")
+            continue
+        budget[key] = value
+    if not budget:
+        suggestion = ", ".join(f"{key}: {value}" for key, value in suggested_resources(total).items())
+        report(
+            "resource-budget-missing",
+            "hint",
+            f"spec.resources is not set; the base preset and services need about {total.describe()} "
+            f"(suggested: {suggestion})",
+            field="spec.resources",
+        )
+        return True, estimate.containers
+
+    report("resource-estimate", "hint", f"Estimated lesson footprint: {total.describe()}", field="spec.resources")
+    exceeded = over_budget(total, budget)
+    severity = "error" if enforce else "warn"
+    for key, needed, requested in exceeded:
+        report(
+            "resource-budget-exceeded",
+            severity,
+            f"spec.resources.{key} is {requested}, but the base preset and services need {needed}",
+            field=f"spec.resources.{key}",
+        )
+    return not (enforce and exceeded), estimate.containers
+
+
+def collect_ports_attributes(
+    artifacts: ServiceArtifacts,
+    port_remap: Sequence[PortRemap] = (),
+) -> Dict[str, Dict[str, str]]:
     if not artifacts.names:
         return {}
+    registry = service_registry()
+    moved = {(remap.service, remap.old_port): remap.new_port for remap in port_remap if remap.protocol == "tcp"}
     collected: Dict[str, set] = {}
     for name in artifacts.names:
-        port_map = SERVICE_PORT_LABELS.get(name, {})
+        port_map = registry.port_labels(name)
         for port, label in port_map.items():
-            port_key = str(port)
+            port_key = str(moved.get((name, port), port))
             collected.setdefault(port_key, set()).add(label)
     attributes: Dict[str, Dict[str, str]] = {}
     for port in sorted(collected, key=lambda value: int(re.sub(r"[^0-9]", "", value) or 0)):
@@ -497,6 +677,7 @@ def collect_ports_attributes(artifacts: ServiceArtifacts) -> Dict[str, Dict[str,
     return attributes
 
 
+@timed("write_preset_ctx")
 def write_generated_preset_ctx(manifest: dict, out_dir: Path) -> None:
     spec = manifest["spec"]
     ensure_dir(out_dir)
@@ -509,39 +690,40 @@ def write_generated_preset_ctx(manifest: dict, out_dir: Path) -> None:
     _apply_optional_devcontainer_overrides(devc, spec)
 
     devcontainer_dir = out_dir / ".devcontainer"
-    devcontainer_dir.mkdir(parents=True, exist_ok=True)
-    with (devcontainer_dir / "devcontainer.json").open("w", encoding="utf-8") as handle:
-        json.dump(devc, handle, indent=2)
-        handle.write("\n")
-
-    with (out_dir / "Dockerfile").open("w", encoding="utf-8") as handle:
-        img_tag = spec["image_tag_strategy"]
-        base = spec["base_preset"]
-        handle.write("# syntax=docker/dockerfile:1.7\n")
-        handle.write('ARG GIT_SHA="dev"\n')
-        handle.write(f"FROM ghcr.io/airnub-labs/templates/{base}:{img_tag}\n")
-        handle.write("ARG GIT_SHA\n")
-
-        metadata = manifest["metadata"]
-        labels = {
-            "org.opencontainers.image.source": "https://github.com/airnub-labs/devcontainers-catalog",
-            "org.opencontainers.image.description": (
-                f"Lesson image for {metadata['org']}/{metadata['course']}/{metadata['lesson']}"
-            ),
-            "org.opencontainers.image.revision": "${GIT_SHA}",
-            "org.airnub.lesson.org": metadata["org"],
-            "org.airnub.lesson.course": metadata["course"],
-            "org.airnub.lesson.lesson": metadata["lesson"],
-            "org.airnub.lesson.schema": "airnub.devcontainers/v1",
-        }
+    ensure_dir(devcontainer_dir)
+    emit_json(devcontainer_dir / "devcontainer.json", devc)
 
-        items = list(labels.items())
-        for index, (key, value) in enumerate(items):
-            prefix = "LABEL " if index == 0 else "      "
-            suffix = " \\\n" if index < len(items) - 1 else "\n"
-            handle.write(f"{prefix}{key}={json.dumps(value)}{suffix}")
+    img_tag = spec["image_tag_strategy"]
+    base = spec["base_preset"]
+    lines = [
+        "# syntax=docker/dockerfile:1.7\n",
+        'ARG GIT_SHA="dev"\n',
+        f"FROM ghcr.io/airnub-labs/templates/{base}:{img_tag}\n",
+        "ARG GIT_SHA\n",
+    ]
 
+    metadata = manifest["metadata"]
+    labels = {
+        "org.opencontainers.image.source": "https://github.com/airnub-labs/devcontainers-catalog",
+        "org.opencontainers.image.description": (
+            f"Lesson image for {metadata['org']}/{metadata['course']}/{metadata['lesson']}"
+        ),
+        "org.opencontainers.image.revision": "${GIT_SHA}",
+        "org.airnub.lesson.org": metadata["org"],
+        "org.airnub.lesson.course": metadata["course"],
+        "org.airnub.lesson.lesson": metadata["lesson"],
+        "org.airnub.lesson.schema": "airnub.devcontainers/v1",
+    }
+
+    items = list(labels.items())
+    for index, (key, value) in enumerate(items):
+        prefix = "LABEL " if index == 0 else "      "
+        suffix = " \\\n" if index < len(items) - 1 else "\n"
+        lines.append(f"{prefix}{key}={json.dumps(value)}{suffix}")
+    emit_text(out_dir / "Dockerfile", "".join(lines))
 
+
+@timed("write_repo_scaffold")
 def write_generated_repo_scaffold(
     manifest: dict,
     out_dir: Path,
@@ -564,11 +746,10 @@ def write_generated_repo_scaffold(
     if ports_attributes:
         devc["portsAttributes"] = ports_attributes
 
-    with (out_dir / ".devcontainer" / "devcontainer.json").open("w", encoding="utf-8") as handle:
-        json.dump(devc, handle, indent=2)
-        handle.write("\n")
+    emit_json(out_dir / ".devcontainer" / "devcontainer.json", devc)
 
 
+@timed("write_secrets_placeholders")
 def write_secrets_placeholders(spec: dict, out_dir: Path) -> Optional[Path]:
     placeholders = _collect_secrets_placeholders(spec)
     if not placeholders:
@@ -581,7 +762,7 @@ def write_secrets_placeholders(spec: dict, out_dir: Path) -> Optional[Path]:
         "",
     ]
     lines.extend(f"{name}=" for name in placeholders)
-    target.write_text("\n".join(lines).strip() + "\n", encoding="utf-8")
+    emit_text(target, "\n".join(lines).strip() + "\n")
     return target
 
 
@@ -592,6 +773,7 @@ def _relative_path(base: Path, target: Path) -> str:
         return str(target)
 
 
+@timed("write_generation_summary")
 def write_generation_summary(
     manifest: dict,
     slug: str,
@@ -667,6 +849,9 @@ def write_generation_summary(
             lines.append(f"- CPU: `{cpu_hint}`")
         if mem_hint is not None:
             lines.append(f"- Memory: `{mem_hint}`")
+        disk_hint = resources.get("disk")
+        if disk_hint is not None:
+            lines.append(f"- Disk: `{disk_hint}`")
         lines.append("")
 
     lines.append("## Next Steps")
@@ -674,10 +859,11 @@ def write_generation_summary(
     lines.append("- Share the generated `.devcontainer` scaffold with students or commit it to a starter repo.")
 
     target = out_dir / "GENERATION_SUMMARY.md"
-    target.write_text("\n".join(line for line in lines if line is not None).strip() + "\n", encoding="utf-8")
+    emit_text(target, "\n".join(line for line in lines if line is not None).strip() + "\n")
     return target
 
 
+@timed("write_starter_repo_metadata")
 def write_starter_repo_metadata(spec: dict, out_dir: Path) -> Optional[Path]:
     starter_repo = spec.get("starter_repo")
     if not isinstance(starter_repo, Mapping):
@@ -688,17 +874,12 @@ def write_starter_repo_metadata(spec: dict, out_dir: Path) -> Optional[Path]:
     path_value = str(starter_repo.get("path", "/workspace")).strip() or "/workspace"
     payload = {"url": url, "path": path_value}
     target = out_dir / "starter-repo.json"
-    with target.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2)
-        handle.write("\n")
+    emit_json(target, payload)
     return target
 
 
 def load_yaml_document(path: Path):
-    text = path.read_text(encoding="utf-8")
-    if yaml is not None:
-        return yaml.safe_load(text)
-    return parse_simple_yaml(text)
+    return parse_cache().load(path, load_yaml_text)
 
 
 def _split_image_reference(reference: str) -> Tuple[str, Optional[str], Optional[str]]:
@@ -717,33 +898,20 @@ def _split_image_reference(reference: str) -> Tuple[str, Optional[str], Optional
     return image, tag, digest
 
 
+@timed("collect_service_images")
 def _collect_service_images(artifacts: ServiceArtifacts) -> Dict[str, str]:
+    catalog = service_catalog()
+    registry = service_registry()
     images: Dict[str, str] = {}
     for service in artifacts.names:
-        extends_entries = SERVICE_EXTENDS.get(service, ())
-        for file_name, service_name in extends_entries:
-            compose_path = ROOT / "services" / service / file_name
-            if not compose_path.exists():
-                continue
-            try:
-                document = load_yaml_document(compose_path)
-            except Exception:
-                continue
-            service_block = (
-                (document or {}).get("services", {}) if isinstance(document, Mapping) else {}
-            )
-            if not isinstance(service_block, Mapping):
-                continue
-            entry = service_block.get(service_name)
-            if not isinstance(entry, Mapping):
-                continue
-            image_ref = entry.get("image")
-            if not image_ref:
-                continue
-            images[f"{service}:{service_name}"] = str(image_ref)
+        for file_name, service_name in registry.extends(service):
+            image_ref = catalog.image_reference(service, file_name, service_name)
+            if image_ref:
+                images[f"{service}:{service_name}"] = image_ref
     return images
 
 
+@timed("write_stack_lock")
 def write_stack_lock(
     manifest: dict,
     out_dir: Path,
@@ -775,12 +943,11 @@ def write_stack_lock(
         "_comment": "Populate digest fields after building and publishing images to guarantee reproducible rebuilds.",
         "images": entries,
     }
-    with target.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2)
-        handle.write("\n")
+    emit_json(target, payload)
     return target
 
 
+@timed("write_services_readme")
 def write_services_readme(artifacts: ServiceArtifacts, out_dir: Path) -> Optional[Path]:
     if not artifacts.names:
         return None
@@ -822,94 +989,228 @@ def write_services_readme(artifacts: ServiceArtifacts, out_dir: Path) -> Optiona
 
     lines.append("")
     readme_path = out_dir / "README-SERVICES.md"
-    readme_path.write_text("\n".join(lines).strip() + "\n", encoding="utf-8")
+    emit_text(readme_path, "\n".join(lines).strip() + "\n")
     return readme_path
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--manifest", required=True)
-    args = parser.parse_args()
-
-    manifest_path = Path(args.manifest)
-    if not manifest_path.exists():
-        print(f"[error] manifest not found: {manifest_path}", file=sys.stderr)
-        return 1
-
-    manifest = load_manifest(manifest_path)
+def prepare_manifest(manifest) -> bool:
+    """Validate and normalize ``manifest`` in place, reporting problems; ``False`` when invalid."""
+    report = get_reporter().report
     metadata, spec, validation_errors = validate_manifest_structure(manifest)
     if validation_errors:
         for error in validation_errors:
-            print(f"[error] {error}", file=sys.stderr)
-        return 1
+            field = error.split(" ", 1)[0] if error.startswith("manifest.") else None
+            report("manifest-invalid", "error", error, field=field and field[len("manifest.") :])
+        return False
 
     manifest["metadata"] = metadata or dict(manifest.get("metadata", {}))
     manifest["spec"] = dict(spec)
     spec = manifest["spec"]
     unsupported_fields, unknown_fields = partition_spec_fields(spec)
     for field in unsupported_fields:
-        print(
-            f"[warn] spec.{field} is currently ignored by the generator; downstream automation should handle it.",
-            file=sys.stderr,
+        report(
+            "spec-field-unsupported",
+            "warn",
+            f"spec.{field} is currently ignored by the generator; downstream automation should handle it.",
+            field=f"spec.{field}",
         )
     for field in unknown_fields:
-        print(
-            f"[warn] spec.{field} is not recognized and will be ignored.",
-            file=sys.stderr,
+        report(
+            "spec-field-unknown",
+            "warn",
+            f"spec.{field} is not recognized and will be ignored.",
+            field=f"spec.{field}",
         )
 
     resources_payload = spec.get("resources")
     resources = resources_payload if isinstance(resources_payload, Mapping) else None
     if resources:
-        supported_resource_keys = {"cpu", "memory"}
         for key in sorted(resources):
-            if key not in supported_resource_keys:
-                print(
-                    f"[warn] spec.resources.{key} is not recognized; only cpu and memory are supported today.",
-                    file=sys.stderr,
+            if key not in RESOURCE_KEYS:
+                report(
+                    "resource-unknown",
+                    "warn",
+                    f"spec.resources.{key} is not recognized; only cpu, memory and disk are supported today.",
+                    field=f"spec.resources.{key}",
                 )
+    return True
+
+
+def generated_dirs(slug: str, root: Path) -> Tuple[Path, Path]:
+    """Preset context and lesson scaffold directories for ``slug`` under ``root``."""
+    return root / "images" / "presets" / "generated" / slug, root / "templates" / "generated" / slug
+
+
+@timed("generate_manifest")
+def generate_from_manifest(
+    manifest_path: Path,
+    manifest: Optional[dict] = None,
+    options: GenerateOptions = GenerateOptions(),
+) -> int:
+    reporter = get_reporter()
+    report = reporter.report
+    if manifest is None:
+        if not manifest_path.exists():
+            report("manifest-not-found", "error", f"manifest not found: {manifest_path}")
+            return 1
+        manifest = load_manifest(manifest_path)
+    if not prepare_manifest(manifest):
+        return 1
 
-    metadata = manifest["metadata"]
-    slug = derive_lesson_slug(metadata)
+    spec = manifest["spec"]
+    slug = derive_lesson_slug(manifest["metadata"])
+    reporter.slug = slug
 
-    gen_preset_dir = ROOT / "images" / "presets" / "generated" / slug
-    write_generated_preset_ctx(manifest, gen_preset_dir)
-    secrets_placeholder_path = write_secrets_placeholders(spec, gen_preset_dir)
-    artifacts = merge_services(spec.get("services"), gen_preset_dir)
+    gen_preset_dir, gen_template_dir = generated_dirs(slug, ROOT)
+
+    # Checked before the cache lookup so warnings and failures repeat on every run.
+    admission = admit_lesson(
+        manifest, gen_preset_dir, options.compose_mode, options.remap_ports, options.enforce_resources
+    )
+    if admission is None:
+        return 1
+
+    catalog = service_catalog()
+    lesson_cache = LessonCache(cache_root(ROOT) / "lessons")
+    with stage("cache_lookup"):
+        cache_key = compute_lesson_key(
+            manifest,
+            [
+                (name, catalog.digest(name) if name in catalog else "<missing>")
+                for name in requested_service_names(spec.get("services"))
+            ],
+            extra=(
+                options.link_mode,
+                options.compose_mode,
+                "remap-ports" if options.remap_ports else "keep-ports",
+                preset_footprint(ROOT, spec.get("base_preset")).describe(),
+            ),
+        )
+        fresh = options.use_cache and lesson_cache.is_fresh(slug, cache_key, ROOT)
+    if fresh:
+        count("lesson_cache_hits")
+        report("cache-hit", "ok", f"{slug} is up to date (generation cache hit)")
+        return 0
+
+    if not write_lesson(
+        manifest,
+        slug,
+        gen_preset_dir,
+        gen_template_dir,
+        options.link_mode,
+        options.compose_mode,
+        options.remap_ports,
+        options.enforce_resources,
+        admission,
+    ):
+        return 1
+    with stage("cache_store"):
+        lesson_cache.store(slug, cache_key, ROOT, (gen_preset_dir, gen_template_dir))
+    count("lessons_generated")
+    return 0
+
+
+def admit_lesson(
+    manifest: dict,
+    gen_preset_dir: Path,
+    compose_mode: str = "flatten",
+    remap_ports: bool = False,
+    enforce_resources: bool = False,
+) -> Optional[LessonAdmission]:
+    """Plan the lesson's services and run the conflict and resource checks.
+
+    Nothing is written, so this runs on every generation (cache hits
+    included) and a failing check leaves the previous output untouched.
+    Returns ``None`` when a check failed.
+    """
+    spec = manifest["spec"]
+    report = get_reporter().report
+    artifacts = plan_services(spec.get("services"), gen_preset_dir)
 
     for missing in artifacts.missing:
-        print(
-            f"[warn] spec.services requested '{missing}', but no matching fragment exists under services/{missing}",
-            file=sys.stderr,
+        report(
+            "service-missing",
+            "warn",
+            f"spec.services requested '{missing}', but no matching fragment exists under services/{missing}",
+            field="spec.services",
         )
 
+    if remap_ports and compose_mode != "flatten":
+        report("remap-ports-ignored", "warn", "--remap-ports only applies with --compose-mode flatten")
+        remap_ports = False
+
+    try:
+        conflicts_ok, port_remap = check_service_conflicts(artifacts, remap_ports)
+        resources_ok, resource_limits = check_resource_budget(manifest, artifacts, enforce_resources)
+    except ValueError as exc:
+        report("compose-invalid", "error", str(exc))
+        return None
+    if not (conflicts_ok and resources_ok):
+        return None
+    return LessonAdmission(artifacts, tuple(port_remap), resource_limits)
+
+
+def write_lesson(
+    manifest: dict,
+    slug: str,
+    gen_preset_dir: Path,
+    gen_template_dir: Path,
+    link_mode: str = "auto",
+    compose_mode: str = "flatten",
+    remap_ports: bool = False,
+    enforce_resources: bool = False,
+    admission: Optional[LessonAdmission] = None,
+) -> bool:
+    """Emit every artifact for a prepared manifest; ``False`` when generation failed.
+
+    ``admission`` is the result of :func:`admit_lesson` when the caller
+    already ran it; otherwise the checks run here, before anything is emitted.
+    """
+    if admission is None:
+        admission = admit_lesson(manifest, gen_preset_dir, compose_mode, remap_ports, enforce_resources)
+        if admission is None:
+            return False
+    spec = manifest["spec"]
+    report = get_reporter().report
+    artifacts = admission.artifacts
+    port_remap = admission.port_remap
+    write_generated_preset_ctx(manifest, gen_preset_dir)
+    secrets_placeholder_path = write_secrets_placeholders(spec, gen_preset_dir)
+    materialize_services(artifacts, gen_preset_dir, link_mode)
+
     for name, env_path in sorted(artifacts.env_examples.items()):
-        print(f"[hint] Copied {name} .env example to {env_path}")
+        report("env-example", "hint", f"Copied {name} .env example to {env_path}", path=env_path)
 
     stack_lock_path = write_stack_lock(manifest, gen_preset_dir, artifacts)
     if stack_lock_path:
-        print(f"[hint] Stack lock template available at {stack_lock_path}")
+        report("stack-lock", "hint", f"Stack lock template available at {stack_lock_path}", path=stack_lock_path)
 
     starter_meta = write_starter_repo_metadata(spec, gen_preset_dir)
     if starter_meta:
-        print(f"[hint] Starter repo metadata recorded at {starter_meta}")
+        report("starter-repo", "hint", f"Starter repo metadata recorded at {starter_meta}", path=starter_meta)
 
     if secrets_placeholder_path:
-        print(f"[hint] Secrets placeholders recorded at {secrets_placeholder_path}")
+        report(
+            "secrets-placeholders",
+            "hint",
+            f"Secrets placeholders recorded at {secrets_placeholder_path}",
+            path=secrets_placeholder_path,
+        )
 
-    aggregate_path: Optional[Path] = None
     try:
-        aggregate_path = generate_aggregate_compose(manifest, gen_preset_dir, artifacts)
+        aggregate_path = generate_aggregate_compose(
+            manifest, gen_preset_dir, artifacts, compose_mode, port_remap, admission.resource_limits
+        )
     except ValueError as exc:
-        print(f"[error] {exc}", file=sys.stderr)
-        return 1
+        report("compose-invalid", "error", str(exc))
+        return False
 
     if aggregate_path:
-        print(f"[hint] Aggregate compose available at {aggregate_path}")
+        report("aggregate-compose", "hint", f"Aggregate compose available at {aggregate_path}", path=aggregate_path)
 
     services_readme = write_services_readme(artifacts, gen_preset_dir)
     if services_readme:
-        print(f"[hint] Service README available at {services_readme}")
+        report("services-readme", "hint", f"Service README available at {services_readme}", path=services_readme)
 
     summary_path = write_generation_summary(
         manifest,
@@ -919,30 +1220,377 @@ def main() -> int:
         secrets_placeholder_path,
         services_readme,
     )
-    print(f"[hint] Generation summary available at {summary_path}")
+    report("generation-summary", "hint", f"Generation summary available at {summary_path}", path=summary_path)
 
-    ports_attributes = collect_ports_attributes(artifacts)
+    ports_attributes = collect_ports_attributes(artifacts, port_remap)
 
-    gen_template_dir = ROOT / "templates" / "generated" / slug
     write_generated_repo_scaffold(manifest, gen_template_dir, slug, ports_attributes)
     template_secrets = write_secrets_placeholders(spec, gen_template_dir)
     if template_secrets:
-        print(f"[hint] Secrets placeholders recorded at {template_secrets}")
+        report(
+            "secrets-placeholders",
+            "hint",
+            f"Secrets placeholders recorded at {template_secrets}",
+            path=template_secrets,
+        )
 
     if stack_lock_path:
         copied_stack_lock = gen_template_dir / "stack.lock.json"
-        shutil.copy2(stack_lock_path, copied_stack_lock)
-        print(f"[hint] Copied stack lock to {copied_stack_lock}")
+        emit_copy(stack_lock_path, copied_stack_lock)
+        report("stack-lock", "hint", f"Copied stack lock to {copied_stack_lock}", path=copied_stack_lock)
 
     starter_template_meta = write_starter_repo_metadata(spec, gen_template_dir)
     if starter_template_meta:
-        print(f"[hint] Starter repo metadata recorded at {starter_template_meta}")
+        report(
+            "starter-repo",
+            "hint",
+            f"Starter repo metadata recorded at {starter_template_meta}",
+            path=starter_template_meta,
+        )
+
+    report("preset-generated", "ok", f"Generated preset ctx: {gen_preset_dir}", path=gen_preset_dir)
+    report("scaffold-generated", "ok", f"Generated lesson scaffold: {gen_template_dir}", path=gen_template_dir)
+    report(
+        "image-tag",
+        "hint",
+        f"Lesson image tag: ghcr.io/airnub-labs/templates/lessons/{slug}:{manifest['spec']['image_tag_strategy']}",
+    )
+    return True
+
+
+@dataclass(frozen=True)
+class ManifestResult:
+    manifest: str
+    slug: str
+    exit_code: int
+    stdout: str
+    stderr: str
+    duration: float
+    # Diagnostic records, collected when options.output_format is json or ndjson.
+    records: Tuple[dict, ...] = ()
+
+
+def discover_manifests(pattern: str) -> Tuple[Path, ...]:
+    candidate = Path(pattern)
+    if candidate.is_dir():
+        paths = (item for item in candidate.iterdir() if item.suffix in {".yaml", ".yml"})
+    else:
+        paths = (Path(item) for item in glob.glob(pattern))
+    return tuple(sorted(path for path in paths if path.is_file()))
+
+
+def _run_captured(
+    manifest_path: Path,
+    manifest: Optional[dict],
+    slug: str,
+    options: GenerateOptions,
+) -> ManifestResult:
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    reporter = get_reporter() if options.output_format == "text" else CollectingReporter()
+    started = time.perf_counter()
+    with redirect_stdout(stdout), redirect_stderr(stderr), use_reporter(reporter), reporter.scope(str(manifest_path)):
+        reporter.slug = slug or None
+        try:
+            exit_code = generate_from_manifest(manifest_path, manifest, options)
+        except Exception as exc:  # keep the batch going and report the failure
+            reporter.report("exception", "error", f"{type(exc).__name__}: {exc}")
+            exit_code = 1
+    return ManifestResult(
+        str(manifest_path),
+        slug,
+        exit_code,
+        stdout.getvalue(),
+        stderr.getvalue(),
+        time.perf_counter() - started,
+        tuple(getattr(reporter, "records", ())),
+    )
+
+
+def write_records(
+    results: Sequence[ManifestResult],
+    output_format: str,
+    **summary,
+) -> None:
+    """Emit every result's diagnostics, a result record per manifest and a summary."""
+    writer = RecordWriter(output_format)
+    for result in results:
+        for record in result.records:
+            writer.write(record)
+        writer.write(
+            {
+                "type": "result",
+                "manifest": result.manifest,
+                "slug": result.slug or None,
+                "exit_code": result.exit_code,
+                "duration_ms": round(result.duration * 1000, 3),
+            }
+        )
+    writer.close(
+        manifests=len(results),
+        failed=sum(1 for result in results if result.exit_code != 0),
+        yaml_backend=yaml_backend(),
+        **summary,
+    )
+
+
+def _run_batch_group(
+    group: Sequence[Tuple[str, Optional[dict], str]],
+    options: GenerateOptions = GenerateOptions(),
+) -> List[ManifestResult]:
+    # Manifests that share a slug write to the same directories, so they run
+    # back to back in their original order exactly like the sequential loop.
+    results = [
+        _run_captured(Path(path), manifest, slug, options) for path, manifest, slug in group
+    ]
+    flush_parse_caches()
+    return results
+
+
+def _init_batch_worker(root: str, catalog: ServiceCatalog, backend: str) -> None:
+    global ROOT
+    ROOT = Path(root)
+    register_service_catalog(catalog)
+    set_yaml_backend(backend)
+
+
+def _load_batch_entry(manifest_path: Path) -> Tuple[Optional[dict], str]:
+    try:
+        manifest = load_manifest(manifest_path)
+    except Exception:
+        # Let the worker report the parse error through the regular code path.
+        return None, ""
+    metadata, _spec, errors = validate_manifest_structure(manifest)
+    if errors:
+        return manifest, ""
+    return manifest, derive_lesson_slug(metadata)
+
+
+def _format_status_table(results: Sequence[ManifestResult]) -> List[str]:
+    rows = [("MANIFEST", "SLUG", "STATUS", "TIME")]
+    for result in results:
+        status = "ok" if result.exit_code == 0 else "error"
+        rows.append((result.manifest, result.slug or "-", status, f"{result.duration:.2f}s"))
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    return [
+        "  ".join(cell.ljust(widths[column]) for column, cell in enumerate(row)).rstrip()
+        for row in rows
+    ]
+
+
+def batch_workers(jobs: Optional[int], group_count: int) -> int:
+    return max(1, min(jobs or os.cpu_count() or 1, group_count))
 
-    print(f"[ok] Generated preset ctx: {gen_preset_dir}")
-    print(f"[ok] Generated lesson scaffold: {gen_template_dir}")
-    print(f"[hint] Lesson image tag: ghcr.io/airnub-labs/templates/lessons/{slug}:{manifest['spec']['image_tag_strategy']}")
+
+def generate_groups(
+    groups: Sequence[Sequence[Tuple[str, Optional[dict], str]]],
+    jobs: Optional[int] = None,
+    options: GenerateOptions = GenerateOptions(),
+) -> List[ManifestResult]:
+    """Generate each group of same-slug manifests, fanning groups out over worker processes."""
+    workers = batch_workers(jobs, len(groups))
+    run_group = partial(_run_batch_group, options=options)
+    if workers == 1:
+        grouped_results = [run_group(group) for group in groups]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(str(ROOT), service_catalog().preload(), yaml_backend()),
+        ) as executor:
+            grouped_results = list(executor.map(run_group, groups))
+
+    record_generated_lessons(entry for group in groups for entry in group)
+    return [result for group in grouped_results for result in group]
+
+
+def run_batch(
+    manifest_paths: Sequence[Path],
+    jobs: Optional[int] = None,
+    options: GenerateOptions = GenerateOptions(),
+) -> int:
+    started = time.perf_counter()
+    groups: Dict[str, List[Tuple[str, Optional[dict], str]]] = {}
+    for manifest_path in manifest_paths:
+        manifest, slug = _load_batch_entry(manifest_path)
+        key = slug or f"path:{manifest_path}"
+        groups.setdefault(key, []).append((str(manifest_path), manifest, slug))
+
+    workers = batch_workers(jobs, len(groups))
+    generated = generate_groups(list(groups.values()), jobs, options)
+
+    by_path = {result.manifest: result for result in generated}
+    results = [by_path[str(path)] for path in manifest_paths]
+    if options.output_format != "text":
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        write_records(results, options.output_format, jobs=workers, duration_ms=elapsed_ms)
+        return 1 if any(result.exit_code != 0 for result in results) else 0
+
+    for result in results:
+        print(f"[gen] {result.manifest}")
+        sys.stdout.write(result.stdout)
+        sys.stdout.flush()
+        sys.stderr.write(result.stderr)
+        sys.stderr.flush()
+
+    print("")
+    for line in _format_status_table(results):
+        print(line)
+    failed = sum(1 for result in results if result.exit_code != 0)
+    elapsed = time.perf_counter() - started
+    if failed:
+        print(f"[error] {failed} of {len(results)} manifests failed", file=sys.stderr)
+        return 1
+    print(
+        f"[ok] Generated {len(results)} manifests in {elapsed:.2f}s using {workers} job(s)"
+        f" (YAML backend: {yaml_backend()})"
+    )
     return 0
 
 
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        epilog=(
+            "Other commands: generate-lesson slug <manifest> [<manifest> ...];"
+            " generate-lesson watch [--manifests DIR];"
+            " generate-lesson affected --changed PATH [PATH ...];"
+            " generate-lesson check [--manifests DIR]"
+        ),
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--manifest")
+    target.add_argument(
+        "--manifests",
+        help="Directory or glob of manifests to generate in a single process.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for --manifests (defaults to the CPU count).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Regenerate lessons even when their inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="auto",
+        help="How service fragments are materialized into lessons (default: auto).",
+    )
+    parser.add_argument(
+        "--compose-mode",
+        choices=COMPOSE_MODES,
+        default="flatten",
+        help="Resolve services into the aggregate compose (flatten, default) or emit extends stubs.",
+    )
+    parser.add_argument(
+        "--remap-ports",
+        action="store_true",
+        help="Move services whose host ports collide to the next free port instead of failing.",
+    )
+    parser.add_argument(
+        "--enforce-resources",
+        action="store_true",
+        help="Fail when the estimated footprint exceeds spec.resources (default: warn).",
+    )
+    parser.add_argument(
+        "--yaml-backend",
+        choices=("auto",) + YAML_BACKENDS,
+        default=None,
+        help="YAML parser to use (default: fastest available, see generate_lesson.yamlio).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        help="Output diagnostics as text lines, a JSON array or NDJSON records (default: text).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every generator stage and print a breakdown to stderr (batches run in-process).",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="Also write the profile: a Chrome trace for *.json paths, cProfile pstats otherwise.",
+    )
+    args = parser.parse_args(argv)
+    if args.yaml_backend:
+        try:
+            set_yaml_backend(args.yaml_backend)
+        except ValueError as exc:
+            print(f"[error] {exc}", file=sys.stderr)
+            return 1
+    options = GenerateOptions(
+        use_cache=not args.no_cache,
+        link_mode=args.link_mode,
+        compose_mode=args.compose_mode,
+        remap_ports=args.remap_ports,
+        enforce_resources=args.enforce_resources,
+        output_format=args.format,
+    )
+
+    profile_output = Path(args.profile_output) if args.profile_output else None
+    profiler = profiling.enable() if args.profile or profile_output else None
+    cprofile = None
+    if profile_output is not None and profile_output.suffix != ".json":
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    try:
+        if args.manifests:
+            manifest_paths = discover_manifests(args.manifests)
+            if not manifest_paths:
+                print(f"[warn] No lesson manifests matched {args.manifests}", file=sys.stderr)
+                return 0
+            jobs = args.jobs
+            if profiler is not None and jobs != 1:
+                # Worker processes would take their stages (and cProfile data) with them.
+                print("[hint] --profile runs the batch in-process (--jobs 1)", file=sys.stderr)
+                jobs = 1
+            return run_batch(manifest_paths, jobs, options)
+
+        manifest_path = Path(args.manifest)
+        manifest, slug = _load_batch_entry(manifest_path)
+        if args.format != "text":
+            result = _run_captured(manifest_path, manifest, slug, options)
+            record_generated_lessons([(str(manifest_path), manifest, slug)])
+            write_records([result], args.format, duration_ms=round(result.duration * 1000, 3))
+            return result.exit_code
+        exit_code = generate_from_manifest(manifest_path, manifest, options)
+        record_generated_lessons([(str(manifest_path), manifest, slug)])
+        print(f"[hint] YAML backend: {yaml_backend()}")
+        return exit_code
+    finally:
+        flush_parse_caches()
+        flush_dependency_indexes()
+        if profiler is not None:
+            _finish_profile(profiling.disable(), cprofile, profile_output)
+
+
+def _finish_profile(profiler: profiling.Profiler, cprofile, output: Optional[Path]) -> None:
+    if cprofile is not None:
+        cprofile.disable()
+    print("", file=sys.stderr)
+    for line in profiler.breakdown():
+        print(line, file=sys.stderr)
+    if output is None:
+        return
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if cprofile is not None:
+        cprofile.dump_stats(str(output))
+        print(f"[hint] cProfile stats written to {output} (python -m pstats {output})", file=sys.stderr)
+    else:
+        profiler.write_trace(output)
+        print(f"[hint] Chrome trace written to {output} (open in chrome://tracing or ui.perfetto.dev)", file=sys.stderr)
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,269 @@
+"""Resolve and flatten compose service definitions for the aggregate compose file.
+
+The classroom compose file used to consist of ``extends:`` stubs pointing at the
+copied fragments. Docker Compose then had to load and resolve every fragment
+on each ``up``. :func:`resolve_service` performs that resolution once at
+generation time. It follows ``extends`` chains (within a fragment or across
+fragments under ``services/``), merges definitions the way Compose does, and
+rebases relative paths (``build`` contexts, ``env_file`` entries, bind-mount
+sources) so they still point into ``./services/<name>/`` from the lesson root.
+
+:func:`dump_yaml` writes the result as block-style YAML. Strings are always
+double-quoted, which keeps values such as ``"True"`` or ``"08"`` intact and
+the output stable.
+"""
+
+import copy
+import json
+import posixpath
+import re
+from typing import Dict, List, Mapping, Optional, Tuple
+
+COMPOSE_MODES = ("flatten", "extends")
+
+# Sequences that replace rather than extend the base value.
+_REPLACED_SEQUENCES = frozenset({"command", "entrypoint", "test"})
+# Sequences of ``KEY=VALUE`` strings that merge as mappings.
+_KEYED_SEQUENCES = frozenset({"environment", "labels"})
+# Sequences of mounts that merge by container path.
+_MOUNT_SEQUENCES = frozenset({"volumes", "devices"})
+
+_PLAIN_KEY = re.compile(r"[A-Za-z_][A-Za-z0-9_.-]*")
+_AMBIGUOUS_KEYS = frozenset({"y", "n", "yes", "no", "on", "off", "true", "false", "null"})
+
+
+def _key_value_mapping(value) -> Dict[str, object]:
+    if isinstance(value, Mapping):
+        return {str(key): item for key, item in value.items()}
+    mapping: Dict[str, object] = {}
+    for item in value or []:
+        key, separator, rest = str(item).partition("=")
+        mapping[key] = rest if separator else None
+    return mapping
+
+
+def _mount_target(entry) -> str:
+    if isinstance(entry, Mapping):
+        return str(entry.get("target", ""))
+    parts = str(entry).split(":")
+    return parts[1] if len(parts) > 1 else parts[0]
+
+
+def _merge_value(key: Optional[str], base, override):
+    if key in _KEYED_SEQUENCES:
+        merged = _key_value_mapping(base)
+        merged.update(_key_value_mapping(override))
+        return merged
+    if key in _MOUNT_SEQUENCES and isinstance(base, list) and isinstance(override, list):
+        by_target = {_mount_target(entry): entry for entry in base}
+        by_target.update((_mount_target(entry), copy.deepcopy(entry)) for entry in override)
+        return list(by_target.values())
+    if key == "depends_on" and isinstance(base, Mapping) != isinstance(override, Mapping):
+        base, override = (
+            {name: {"condition": "service_started"} for name in value} if isinstance(value, list) else value
+            for value in (base, override)
+        )
+    if isinstance(base, Mapping) and isinstance(override, Mapping):
+        return merge_definitions(base, override)
+    if isinstance(base, list) and isinstance(override, list) and key not in _REPLACED_SEQUENCES:
+        merged = list(base)
+        seen = {json.dumps(item, sort_keys=True, default=str) for item in base}
+        for item in override:
+            marker = json.dumps(item, sort_keys=True, default=str)
+            if marker not in seen:
+                seen.add(marker)
+                merged.append(copy.deepcopy(item))
+        return merged
+    return copy.deepcopy(override)
+
+
+def merge_definitions(base: Mapping, override: Mapping) -> Dict[str, object]:
+    """Compose ``extends`` merge: ``override`` wins, mappings and most sequences combine."""
+    merged = dict(base)
+    for key, value in override.items():
+        merged[key] = _merge_value(key, merged[key], value) if key in merged else copy.deepcopy(value)
+    return merged
+
+
+def _is_bind_source(source: str) -> bool:
+    return source in (".", "..") or source.startswith(("./", "../"))
+
+
+def _rebase(path: str, prefix: str) -> str:
+    if path.startswith("/") or "://" in path:
+        return path
+    rebased = posixpath.normpath(posixpath.join(prefix, path))
+    return rebased if rebased.startswith(".") else f"./{rebased}"
+
+
+def rebase_paths(definition: Mapping, prefix: str) -> Dict[str, object]:
+    """Copy of ``definition`` with paths relative to its fragment rewritten under ``prefix``."""
+    rebased = copy.deepcopy(dict(definition))
+    build = rebased.get("build")
+    if isinstance(build, str):
+        rebased["build"] = _rebase(build, prefix)
+    elif isinstance(build, dict) and isinstance(build.get("context"), str):
+        build["context"] = _rebase(build["context"], prefix)
+    env_file = rebased.get("env_file")
+    if isinstance(env_file, str):
+        rebased["env_file"] = _rebase(env_file, prefix)
+    elif isinstance(env_file, list):
+        for index, item in enumerate(env_file):
+            if isinstance(item, str):
+                env_file[index] = _rebase(item, prefix)
+            elif isinstance(item, dict) and isinstance(item.get("path"), str):
+                item["path"] = _rebase(item["path"], prefix)
+    volumes = rebased.get("volumes")
+    if isinstance(volumes, list):
+        for index, item in enumerate(volumes):
+            if isinstance(item, str):
+                source, separator, rest = item.partition(":")
+                if separator and _is_bind_source(source):
+                    volumes[index] = f"{_rebase(source, prefix)}:{rest}"
+            elif isinstance(item, dict) and isinstance(item.get("source"), str) and item.get("type") == "bind":
+                item["source"] = _rebase(item["source"], prefix)
+    return rebased
+
+
+def resolve_service(
+    catalog,
+    service: str,
+    file_name: str,
+    service_name: str,
+    _chain: Tuple[Tuple[str, str, str], ...] = (),
+) -> Optional[Dict[str, object]]:
+    """Fully resolved definition of ``service_name`` in ``services/<service>/<file_name>``.
+
+    ``catalog`` is a :class:`generate_lesson.catalog.ServiceCatalog`. Returns
+    ``None`` when the fragment or service does not exist. Relative paths are
+    rebased to ``./services/<service>/`` and the result has no ``extends``.
+    Raises ``ValueError`` on ``extends`` cycles or targets outside ``services/``.
+    """
+    link = (service, file_name, service_name)
+    if link in _chain:
+        cycle = " -> ".join(f"services/{name}/{fragment}#{target}" for name, fragment, target in _chain + (link,))
+        raise ValueError(f"compose extends cycle: {cycle}")
+    definition = catalog.compose_service(service, file_name, service_name)
+    if definition is None:
+        return None
+    directory = posixpath.join(service, posixpath.dirname(file_name))
+    definition = rebase_paths(definition, posixpath.normpath(f"./services/{directory}"))
+    extends = definition.pop("extends", None)
+    if extends is None:
+        return definition
+    if isinstance(extends, str):
+        extends = {"service": extends}
+    base_service, base_file = service, file_name
+    if extends.get("file"):
+        target = posixpath.normpath(posixpath.join(directory, str(extends["file"])))
+        base_service, _, base_file = target.partition("/")
+        if target.startswith("../") or not base_file:
+            raise ValueError(f"services/{service}/{file_name}: extends file {extends['file']} is outside services/")
+    base = resolve_service(catalog, base_service, base_file, str(extends.get("service", "")), _chain + (link,))
+    if base is None:
+        raise ValueError(
+            f"services/{service}/{file_name}: {service_name} extends missing service "
+            f"{extends.get('service')} in services/{base_service}/{base_file}"
+        )
+    return merge_definitions(base, definition)
+
+
+def referenced_volumes(definition: Mapping) -> List[str]:
+    """Named volumes (not bind mounts) that ``definition`` mounts."""
+    names = []
+    for item in definition.get("volumes") or []:
+        if isinstance(item, Mapping):
+            source = item.get("source") if item.get("type", "volume") == "volume" else None
+        else:
+            source, separator, _rest = str(item).partition(":")
+            source = source if separator else None
+        if source and not _is_bind_source(str(source)) and not str(source).startswith(("/", "~", "$")):
+            names.append(str(source))
+    return names
+
+
+def fragment_volumes(catalog, service: str, file_name: str) -> Mapping[str, object]:
+    """Top-level ``volumes`` declared by a fragment."""
+    document = catalog.compose_document(service, file_name)
+    volumes = document.get("volumes") if isinstance(document, Mapping) else None
+    return volumes if isinstance(volumes, Mapping) else {}
+
+
+def _scalar(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return json.dumps(str(value))
+
+
+def _key(key) -> str:
+    text = str(key)
+    if _PLAIN_KEY.fullmatch(text) and text.lower() not in _AMBIGUOUS_KEYS:
+        return text
+    return json.dumps(text)
+
+
+def _dump(value, indent: int, lines: List[str]) -> None:
+    pad = " " * indent
+    if isinstance(value, Mapping):
+        for key, item in value.items():
+            if isinstance(item, (Mapping, list)) and item:
+                lines.append(f"{pad}{_key(key)}:\n")
+                _dump(item, indent + 2, lines)
+            elif item is None:
+                lines.append(f"{pad}{_key(key)}:\n")
+            else:
+                lines.append(f"{pad}{_key(key)}: {_flow(item)}\n")
+    else:
+        for item in value:
+            if isinstance(item, Mapping) and item:
+                nested: List[str] = []
+                _dump(item, indent + 2, nested)
+                lines.append(f"{pad}- {nested[0][indent + 2 :]}")
+                lines.extend(nested[1:])
+            elif isinstance(item, list) and item:
+                lines.append(f"{pad}-\n")
+                _dump(item, indent + 2, lines)
+            else:
+                lines.append(f"{pad}- {_flow(item)}\n")
+
+
+def _flow(value) -> str:
+    if isinstance(value, Mapping):
+        return "{}"
+    if isinstance(value, list):
+        return "[]"
+    return _scalar(value)
+
+
+def dump_yaml(document: Mapping, indent: int = 0) -> str:
+    """Block-style YAML for a JSON-like ``document`` (strings double-quoted)."""
+    lines: List[str] = []
+    _dump(document, indent, lines)
+    return "".join(lines)
+
+
+def apply_environment(definition: Dict[str, object], overrides: Mapping[str, str]) -> None:
+    """Layer manifest ``vars`` over the service environment (sorted, like the extends form)."""
+    if overrides:
+        definition["environment"] = _merge_value(
+            "environment", definition.get("environment") or {}, {key: overrides[key] for key in sorted(overrides)}
+        )
+
+
+def collect_volumes(
+    catalog,
+    definitions: Mapping[str, Tuple[str, str, Mapping]],
+    declared: List[str],
+) -> Dict[str, object]:
+    """Top-level volumes: ``declared`` names first, then every named volume the services mount."""
+    volumes: Dict[str, object] = {name: None for name in declared}
+    for service, file_name, definition in definitions.values():
+        fragment = fragment_volumes(catalog, service, file_name)
+        for name in referenced_volumes(definition):
+            if volumes.get(name) is None:
+                volumes[name] = copy.deepcopy(fragment.get(name))
+    return volumes
@@ -0,0 +1,269 @@
+"""Host-port, container-name, volume and network collisions between a lesson's services.
+
+:class:`LessonIndex` gathers every claim a lesson's services make in one pass
+over their resolved compose definitions, the port labels and
+``catalog/services.json`` ``ports``. Claims are kept as dictionaries keyed by
+the claimed value, so detection is O(claims). Each claim records its owner
+(catalog service and compose service) and its source:
+
+- a host port published by two compose services is an error, since the
+  second container cannot start
+- a port that only labels or catalog metadata share is a warning, since
+  ``portsAttributes`` would merge their labels
+- a ``container_name`` used twice is an error
+- a named volume mounted by two catalog services, or a network name declared
+  with different settings, is a warning
+
+:meth:`LessonIndex.remap_ports` resolves host-port errors by moving every
+claimant after the first to the next free port. :func:`apply_port_remap`
+rewrites the compose ``ports`` entries. An ``${VAR:-port}`` default keeps its
+variable, so students can still override the port.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .compose import referenced_volumes
+
+# ${VAR}, ${VAR:-default} or ${VAR-default}
+_VARIABLE = re.compile(r"\$\{(?P<name>\w+)(?::?-(?P<default>[^}]*))?\}")
+_MAX_PORT = 65535
+
+
+@dataclass(frozen=True)
+class PortBinding:
+    host_port: int
+    protocol: str
+    # Position in the compose service's ``ports`` list.
+    index: int
+    variable: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Claim:
+    service: str
+    container: Optional[str]
+    source: str
+    detail: Optional[str] = None
+
+    def describe(self) -> str:
+        owner = f"{self.service}:{self.container}" if self.container and self.container != self.service else self.service
+        return f"{owner} ({self.detail})" if self.detail else owner
+
+
+@dataclass(frozen=True)
+class Conflict:
+    kind: str
+    key: str
+    severity: str
+    claims: Tuple[Claim, ...]
+
+    @property
+    def code(self) -> str:
+        return f"{self.kind.replace('_', '-')}-conflict"
+
+    def message(self) -> str:
+        owners = ", ".join(claim.describe() for claim in self.claims)
+        subject = {
+            "port": f"host port {self.key}",
+            "container_name": f"container_name {self.key}",
+            "volume": f"volume {self.key}",
+            "network": f"network {self.key}",
+        }[self.kind]
+        return f"{subject} is claimed by {owners}"
+
+
+@dataclass(frozen=True)
+class PortRemap:
+    service: str
+    container: str
+    protocol: str
+    old_port: int
+    new_port: int
+
+
+def _expand(text: str) -> Tuple[str, Optional[str]]:
+    variables = []
+
+    def substitute(match: "re.Match[str]") -> str:
+        variables.append(match.group("name"))
+        return match.group("default") or ""
+
+    return _VARIABLE.sub(substitute, text), (variables[0] if variables else None)
+
+
+def _port_number(text: str) -> Optional[int]:
+    text = text.strip()
+    if "-" in text:  # a range publishes its first port and up
+        text = text.split("-", 1)[0]
+    return int(text) if text.isdigit() else None
+
+
+def port_bindings(definition: Mapping) -> List[PortBinding]:
+    """Host ports a compose service publishes (container-only entries publish none)."""
+    bindings = []
+    for index, entry in enumerate(definition.get("ports") or []):
+        if isinstance(entry, Mapping):
+            published, variable = _expand(str(entry.get("published", "")))
+            port = _port_number(published)
+            protocol = str(entry.get("protocol", "tcp"))
+        else:
+            text, variable = _expand(str(entry))
+            text, _, protocol = text.partition("/")
+            parts = text.rsplit(":", 2)
+            if len(parts) < 2:
+                continue
+            port = _port_number(parts[-2])
+            protocol = protocol or "tcp"
+        if port:
+            bindings.append(PortBinding(port, protocol, index, variable))
+    return bindings
+
+
+def _port_key(port: int, protocol: str) -> str:
+    return str(port) if protocol == "tcp" else f"{port}/{protocol}"
+
+
+class LessonIndex:
+    def __init__(self) -> None:
+        self.ports: Dict[str, List[Claim]] = {}
+        self.bindings: Dict[str, List[Tuple[Claim, PortBinding]]] = {}
+        self.container_names: Dict[str, List[Claim]] = {}
+        self.volumes: Dict[str, List[Claim]] = {}
+        self.networks: Dict[str, List[Tuple[Claim, str]]] = {}
+
+    def _claim_port(self, port: int, protocol: str, claim: Claim) -> None:
+        claims = self.ports.setdefault(_port_key(port, protocol), [])
+        # A service may describe the same port in several sources; keep one claim per owner.
+        if all((existing.service, existing.container) != (claim.service, claim.container) for existing in claims):
+            claims.append(claim)
+
+    def add_compose_service(self, service: str, container: str, definition: Mapping) -> None:
+        for binding in port_bindings(definition):
+            claim = Claim(service, container, "compose")
+            self._claim_port(binding.host_port, binding.protocol, claim)
+            self.bindings.setdefault(_port_key(binding.host_port, binding.protocol), []).append((claim, binding))
+        name = definition.get("container_name")
+        if name:
+            self.container_names.setdefault(str(name), []).append(Claim(service, container, "compose"))
+        for volume in referenced_volumes(definition):
+            claims = self.volumes.setdefault(volume, [])
+            if all(existing.service != service for existing in claims):
+                claims.append(Claim(service, container, "compose"))
+
+    def add_networks(self, service: str, networks: Mapping) -> None:
+        for key, config in networks.items():
+            name = str(config.get("name", key)) if isinstance(config, Mapping) else str(key)
+            self.networks.setdefault(name, []).append(
+                (Claim(service, None, "compose"), json.dumps(config, sort_keys=True, default=str))
+            )
+
+    def add_labelled_port(self, service: str, port: int, label: str) -> None:
+        claims = self.ports.setdefault(_port_key(port, "tcp"), [])
+        # Labels describe a published port, so they share a claim with that service's binding.
+        if all(existing.service != service for existing in claims):
+            claims.append(Claim(service, None, "label", label))
+
+    def add_catalog_port(self, service: str, port: int) -> None:
+        claims = self.ports.setdefault(_port_key(port, "tcp"), [])
+        if all(existing.service != service for existing in claims):
+            claims.append(Claim(service, None, "catalog"))
+
+    def conflicts(self) -> List[Conflict]:
+        found: List[Conflict] = []
+        for key, claims in self.ports.items():
+            if len({(claim.service, claim.container) for claim in claims}) < 2:
+                continue
+            published = {(claim.service, claim.container) for claim, _binding in self.bindings.get(key, ())}
+            if len(published) >= 2:
+                found.append(Conflict("port", key, "error", tuple(claim for claim, _ in self.bindings[key])))
+            elif len({claim.service for claim in claims}) >= 2:
+                found.append(Conflict("port", key, "warn", tuple(claims)))
+        for name, claims in self.container_names.items():
+            if len(claims) >= 2:
+                found.append(Conflict("container_name", name, "error", tuple(claims)))
+        for name, claims in self.volumes.items():
+            if len(claims) >= 2:
+                found.append(Conflict("volume", name, "warn", tuple(claims)))
+        for name, declarations in self.networks.items():
+            if len({config for _claim, config in declarations}) >= 2:
+                found.append(Conflict("network", name, "warn", tuple(claim for claim, _ in declarations)))
+        return found
+
+    def remap_ports(self) -> List[PortRemap]:
+        """Move every host-port claimant but the first to the next free port."""
+        used = {int(key.split("/", 1)[0]) for key in self.ports}
+        remaps: List[PortRemap] = []
+        for key, entries in self.bindings.items():
+            owners = []
+            for claim, binding in entries:
+                if (claim.service, claim.container) not in owners:
+                    owners.append((claim.service, claim.container))
+            if len(owners) < 2:
+                continue
+            for claim, binding in entries:
+                if (claim.service, claim.container) == owners[0]:
+                    continue
+                candidate = binding.host_port + 1
+                while candidate in used:
+                    candidate += 1
+                if candidate > _MAX_PORT:
+                    raise ValueError(f"no free host port left to remap {claim.describe()} from {binding.host_port}")
+                used.add(candidate)
+                remaps.append(PortRemap(claim.service, claim.container, binding.protocol, binding.host_port, candidate))
+        return remaps
+
+
+def build_lesson_index(
+    services: Sequence[str],
+    definitions: Iterable[Tuple[str, str, Mapping]],
+    port_labels: Mapping[str, Mapping[int, str]],
+    catalog_ports: Mapping[str, Sequence[int]],
+    networks: Iterable[Tuple[str, Mapping]] = (),
+) -> LessonIndex:
+    """Index a lesson: ``definitions`` are ``(service, compose service, resolved definition)``."""
+    index = LessonIndex()
+    for service, container, definition in definitions:
+        index.add_compose_service(service, container, definition)
+    for service in services:
+        for port, label in port_labels.get(service, {}).items():
+            index.add_labelled_port(service, int(port), label)
+        for port in catalog_ports.get(service, ()):
+            index.add_catalog_port(service, int(port))
+    for service, declared in networks:
+        index.add_networks(service, declared)
+    return index
+
+
+def apply_port_remap(container: str, definition: Dict[str, object], remaps: Sequence[PortRemap]) -> None:
+    """Rewrite ``definition["ports"]`` for the remaps that target ``container``."""
+    moves = {(remap.old_port, remap.protocol): remap.new_port for remap in remaps if remap.container == container}
+    if not moves:
+        return
+    ports = list(definition.get("ports") or [])
+    for binding in port_bindings(definition):
+        new_port = moves.get((binding.host_port, binding.protocol))
+        if new_port is None:
+            continue
+        entry = ports[binding.index]
+        if isinstance(entry, Mapping):
+            entry = dict(entry)
+            entry["published"] = new_port if binding.variable is None else f"${{{binding.variable}:-{new_port}}}"
+        else:
+            entry = _rewrite_short_port(str(entry), binding, new_port)
+        ports[binding.index] = entry
+    definition["ports"] = ports
+
+
+def _rewrite_short_port(entry: str, binding: PortBinding, new_port: int) -> str:
+    spec, slash, protocol = entry.rpartition("/") if "/" in entry.rsplit(":", 1)[-1] else (entry, "", "")
+    # Split off the container port, then any host IP in front of the host port.
+    host, _, container = spec.rpartition(":")
+    if "${" in host:
+        prefix = host[: host.index("${")]
+    else:
+        prefix = host.rpartition(":")[0] + ":" if ":" in host else ""
+    replacement = str(new_port) if binding.variable is None else f"${{{binding.variable}:-{new_port}}}"
+    return f"{prefix}{replacement}:{container}{slash}{protocol}"
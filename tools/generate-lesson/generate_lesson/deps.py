@@ -0,0 +1,210 @@
+"""Reverse dependency index from generator inputs to lesson slugs.
+
+The generator records, for every manifest it processes, the lesson slug, the
+services it requests (and their compose fragments) and its base preset. The
+records and their reverse maps persist in ``.cache/generate-lesson/deps.json``
+so ``generate-lesson affected --changed <paths>`` can answer "which lessons
+must be regenerated and rebuilt?" without generating anything:
+
+- a manifest maps to its own slug
+- ``services/<name>/...`` maps to every lesson requesting ``<name>``
+- ``catalog/services.json`` maps to every lesson requesting any service (its
+  entries drive port labels, compose wiring and resource limits)
+- ``images/presets/<preset>/...`` maps to every lesson built on ``<preset>``
+- generator sources (``tools/generate-lesson/generate_lesson``) map to every lesson
+
+Manifests whose size or mtime differ from their record are re-read before a
+query, so a cold or stale index is rebuilt transparently.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from .emit import emit_json
+
+DEPS_FILENAME = "deps.json"
+INDEX_VERSION = 2
+
+CATALOG_FILE = "catalog/services.json"
+GENERATOR_SOURCES = "tools/generate-lesson/generate_lesson/"
+PRESETS_PREFIX = "images/presets/"
+GENERATED_PRESETS_PREFIX = "images/presets/generated/"
+SERVICES_PREFIX = "services/"
+
+
+def relative_key(root: Path, path: Path) -> str:
+    """Repository-relative posix path for ``path`` (relative inputs are taken from ``root``)."""
+    candidate = path if path.is_absolute() else root / path
+    try:
+        return candidate.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        return candidate.resolve().as_posix()
+
+
+class DependencyIndex:
+    def __init__(self, root: Path, path: Path) -> None:
+        self.root = root
+        self.path = path
+        self.lessons: Dict[str, dict] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(payload, Mapping) and payload.get("version") == INDEX_VERSION:
+            lessons = payload.get("lessons")
+            if isinstance(lessons, Mapping):
+                self.lessons = {str(key): dict(value) for key, value in lessons.items() if isinstance(value, Mapping)}
+
+    def record(
+        self,
+        manifest_path: Path,
+        slug: str,
+        services: Iterable[str],
+        base_preset: Optional[str],
+        files: Iterable[str],
+    ) -> None:
+        try:
+            stat = manifest_path.stat()
+            signature = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            signature = None
+        entry = {
+            "slug": slug,
+            "services": sorted(set(services)),
+            "base_preset": base_preset,
+            "files": sorted(set(files)),
+            "signature": signature,
+        }
+        key = relative_key(self.root, manifest_path.resolve())
+        if self.lessons.get(key) != entry:
+            self.lessons[key] = entry
+            self.dirty = True
+
+    def forget(self, manifest_key: str) -> None:
+        if self.lessons.pop(manifest_key, None) is not None:
+            self.dirty = True
+
+    def is_current(self, manifest_path: Path) -> bool:
+        entry = self.lessons.get(relative_key(self.root, manifest_path.resolve()))
+        if entry is None:
+            return False
+        try:
+            stat = manifest_path.stat()
+        except OSError:
+            return False
+        return entry.get("signature") == [stat.st_size, stat.st_mtime_ns]
+
+    def reverse(self) -> Dict[str, Dict[str, List[str]]]:
+        maps: Dict[str, Dict[str, Set[str]]] = {"services": {}, "files": {}, "presets": {}, "manifests": {}}
+        for manifest, entry in self.lessons.items():
+            slug = entry["slug"]
+            maps["manifests"].setdefault(manifest, set()).add(slug)
+            for service in entry.get("services", ()):
+                maps["services"].setdefault(service, set()).add(slug)
+            for file_name in entry.get("files", ()):
+                maps["files"].setdefault(file_name, set()).add(slug)
+            if entry.get("base_preset"):
+                maps["presets"].setdefault(str(entry["base_preset"]), set()).add(slug)
+        return {
+            kind: {key: sorted(slugs) for key, slugs in sorted(mapping.items())}
+            for kind, mapping in maps.items()
+        }
+
+    def affected(self, changed: Iterable[str]) -> Tuple[str, ...]:
+        """Slugs affected by the repository-relative ``changed`` paths."""
+        reverse = self.reverse()
+        all_slugs = {entry["slug"] for entry in self.lessons.values()}
+        slugs: Set[str] = set()
+        for key in changed:
+            if key in reverse["manifests"]:
+                slugs.update(reverse["manifests"][key])
+            elif key in reverse["files"]:
+                slugs.update(reverse["files"][key])
+            elif key.startswith(GENERATOR_SOURCES):
+                slugs.update(all_slugs)
+            elif key.startswith(SERVICES_PREFIX):
+                service = key[len(SERVICES_PREFIX) :].split("/", 1)[0]
+                slugs.update(reverse["services"].get(service, ()))
+            elif key.startswith(PRESETS_PREFIX) and not key.startswith(GENERATED_PRESETS_PREFIX):
+                preset = key[len(PRESETS_PREFIX) :].split("/", 1)[0]
+                slugs.update(reverse["presets"].get(preset, ()))
+        return tuple(sorted(slugs))
+
+    def manifests_for(self, slugs: Iterable[str]) -> Tuple[str, ...]:
+        wanted = set(slugs)
+        return tuple(sorted(key for key, entry in self.lessons.items() if entry["slug"] in wanted))
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        payload = {"version": INDEX_VERSION, "lessons": dict(sorted(self.lessons.items()))}
+        payload.update(self.reverse())
+        emit_json(self.path, payload)
+        self.dirty = False
+
+
+_INDEXES: Dict[Path, DependencyIndex] = {}
+
+
+def get_dependency_index(root: Path, cache_dir: Path) -> DependencyIndex:
+    index = _INDEXES.get(root)
+    if index is None:
+        index = _INDEXES[root] = DependencyIndex(root, cache_dir / DEPS_FILENAME)
+    return index
+
+
+def flush_dependency_indexes() -> None:
+    for index in _INDEXES.values():
+        index.save()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from . import cli
+
+    parser = argparse.ArgumentParser(prog="generate-lesson affected")
+    parser.add_argument(
+        "--changed",
+        nargs="*",
+        default=None,
+        help="Changed paths (repository-relative or absolute); read from stdin when omitted.",
+    )
+    parser.add_argument(
+        "--manifests",
+        default=str(cli.ROOT / "examples" / "lesson-manifests"),
+        help="Directory or glob of manifests to index before answering.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("slugs", "manifests", "json"),
+        default="slugs",
+        help="Print affected slugs, their manifests, or both as JSON (default: slugs).",
+    )
+    args = parser.parse_args(argv)
+
+    changed = args.changed if args.changed is not None else sys.stdin.read().split()
+    index = cli.dependency_index()
+    try:
+        cli.refresh_dependency_index(cli.discover_manifests(args.manifests))
+    finally:
+        index.save()
+        cli.flush_parse_caches()
+
+    slugs = index.affected(relative_key(cli.ROOT, Path(path)) for path in changed)
+    manifests = index.manifests_for(slugs)
+    if args.format == "json":
+        print(json.dumps({"slugs": list(slugs), "manifests": list(manifests)}))
+    else:
+        for line in slugs if args.format == "slugs" else manifests:
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Structured diagnostics for generator runs.
+
+Generator stages report through the active :class:`Reporter` instead of
+printing directly. The default reporter prints the classic ``[level] message``
+lines (errors and warnings on stderr, everything else on stdout), so text
+output is unchanged. :class:`CollectingReporter` keeps the same diagnostics as
+records, and :class:`RecordWriter` emits them as a JSON document or as NDJSON
+(one record per line) for ``--format json|ndjson``.
+
+Every record carries a stable ``code``, ``severity``, manifest path, slug,
+optional ``field`` (e.g. ``spec.resources.gpu``) and ``path`` (for artifacts),
+and ``elapsed_ms`` since the manifest started.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, TextIO
+
+FORMATS = ("text", "json", "ndjson")
+SEVERITIES = ("error", "warn", "hint", "ok")
+# Severities printed to stderr in text mode.
+STDERR_SEVERITIES = frozenset({"error", "warn"})
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    code: str
+    severity: str
+    message: str
+    manifest: Optional[str] = None
+    slug: Optional[str] = None
+    field: Optional[str] = None
+    path: Optional[str] = None
+    elapsed_ms: Optional[float] = None
+
+    def text(self) -> str:
+        return f"[{self.severity}] {self.message}"
+
+    def record(self) -> dict:
+        record = {"type": "artifact" if self.path else "diagnostic"}
+        record.update((key, value) for key, value in self.__dict__.items() if value is not None)
+        return record
+
+
+class Reporter:
+    """Prints diagnostics as text lines; subclasses route them elsewhere."""
+
+    def __init__(self) -> None:
+        self.manifest: Optional[str] = None
+        self.slug: Optional[str] = None
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def scope(self, manifest: Optional[str]) -> Iterator["Reporter"]:
+        """Attribute diagnostics to ``manifest`` and time them from now."""
+        saved = (self.manifest, self.slug, self._started)
+        self.manifest, self.slug, self._started = manifest, None, time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.manifest, self.slug, self._started = saved
+
+    def report(
+        self,
+        code: str,
+        severity: str,
+        message: str,
+        field: Optional[str] = None,
+        path: Optional[object] = None,
+    ) -> None:
+        self.write(
+            Diagnostic(
+                code=code,
+                severity=severity,
+                message=message,
+                manifest=self.manifest,
+                slug=self.slug,
+                field=field,
+                path=None if path is None else str(path),
+                elapsed_ms=round((time.perf_counter() - self._started) * 1000, 3),
+            )
+        )
+
+    def write(self, diagnostic: Diagnostic) -> None:
+        stream = sys.stderr if diagnostic.severity in STDERR_SEVERITIES else sys.stdout
+        print(diagnostic.text(), file=stream)
+
+
+class CollectingReporter(Reporter):
+    """Keeps diagnostics as records (picklable, so batch workers can return them)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[dict] = []
+
+    def write(self, diagnostic: Diagnostic) -> None:
+        self.records.append(diagnostic.record())
+
+
+_REPORTER: Reporter = Reporter()
+
+
+def get_reporter() -> Reporter:
+    return _REPORTER
+
+
+@contextmanager
+def use_reporter(reporter: Reporter) -> Iterator[Reporter]:
+    global _REPORTER
+    previous, _REPORTER = _REPORTER, reporter
+    try:
+        yield reporter
+    finally:
+        _REPORTER = previous
+
+
+class RecordWriter:
+    """Writes records as NDJSON as they arrive, or as one JSON document on close."""
+
+    def __init__(self, output_format: str, stream: Optional[TextIO] = None) -> None:
+        if output_format not in ("json", "ndjson"):
+            raise ValueError(f"record output must be json or ndjson; got {output_format!r}")
+        self.output_format = output_format
+        self.stream = stream or sys.stdout
+        self.counts: Dict[str, int] = {severity: 0 for severity in SEVERITIES}
+        self._records: List[dict] = []
+        self._started = time.perf_counter()
+
+    def write(self, record: dict) -> None:
+        severity = record.get("severity")
+        if severity in self.counts:
+            self.counts[severity] += 1
+        if self.output_format == "ndjson":
+            self.stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        else:
+            self._records.append(record)
+
+    def close(self, **summary) -> None:
+        """Write the summary record (counts per severity plus ``summary``) and finish."""
+        record = {"type": "summary", "counts": dict(self.counts)}
+        record.update(summary)
+        record.setdefault("duration_ms", round((time.perf_counter() - self._started) * 1000, 3))
+        if self.output_format == "ndjson":
+            self.write(record)
+        else:
+            self._records.append(record)
+            json.dump(self._records, self.stream, indent=2)
+            self.stream.write("\n")
+        self.stream.flush()
@@ -0,0 +1,176 @@
+"""Write-if-changed, atomic file emission for generated artifacts.
+
+Every generator writer renders its content in memory and hands it to this
+module. Files are only replaced when their bytes differ, and replacements go
+through a temporary sibling plus ``os.replace`` so concurrent readers (or a
+parallel batch run) never observe a half-written file.
+
+Inside :func:`capture`, writes, copies and directories are recorded on a
+:class:`Capture` instead of touching the disk, which is how
+:func:`generate_lesson.render` builds lessons in memory. Cache files go
+through :func:`write_bytes`, which always writes to disk.
+"""
+
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from .profiling import count, timed
+
+_CHUNK_SIZE = 1 << 16
+
+# Mode recorded for captured files that are not copies.
+CAPTURED_FILE_MODE = 0o644
+
+
+class Capture:
+    """Files and directories emitted while :func:`capture` is active."""
+
+    def __init__(self) -> None:
+        # Path -> (bytes, permission bits), in emission order.
+        self.files: Dict[Path, Tuple[bytes, int]] = {}
+        self.directories: Set[Path] = set()
+
+
+_CAPTURE: Optional[Capture] = None
+
+
+@contextmanager
+def capture() -> Iterator[Capture]:
+    """Record emitted files in memory instead of writing them (not thread-safe)."""
+    global _CAPTURE
+    previous, _CAPTURE = _CAPTURE, Capture()
+    try:
+        yield _CAPTURE
+    finally:
+        _CAPTURE = previous
+
+
+def capturing() -> bool:
+    return _CAPTURE is not None
+
+
+def make_dirs(path: Path) -> None:
+    if _CAPTURE is not None:
+        _CAPTURE.directories.add(path)
+    else:
+        path.mkdir(parents=True, exist_ok=True)
+
+
+def _same_bytes(path: Path, data: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        with path.open("rb") as handle:
+            offset = 0
+            while True:
+                chunk = handle.read(_CHUNK_SIZE)
+                if not chunk:
+                    return offset == len(data)
+                if chunk != data[offset : offset + len(chunk)]:
+                    return False
+                offset += len(chunk)
+    except OSError:
+        return False
+
+
+def _existing_mode(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mode & 0o7777
+    except OSError:
+        return None
+
+
+def _create_temp_sibling(path: Path) -> Tuple[int, str]:
+    # Created with 0o666 so the kernel applies the umask, exactly like a plain
+    # open(); reading the umask would mean briefly changing it process-wide.
+    while True:
+        tmp_name = str(path.with_name(f".{path.name}.{os.urandom(4).hex()}.tmp"))
+        try:
+            return os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), tmp_name
+        except FileExistsError:
+            continue
+
+
+def _atomic_replace(path: Path, write, mode: Optional[int] = None) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    target_mode = _existing_mode(path) if mode is None else mode
+    fd, tmp_name = _create_temp_sibling(path)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            write(handle)
+        if target_mode is not None:
+            os.chmod(tmp_name, target_mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def emit_bytes(path: Path, data: bytes, mode: Optional[int] = None) -> bool:
+    """Atomically write ``data`` to ``path`` unless it already holds those bytes.
+
+    Returns ``True`` when the file was (re)written.
+    """
+    if _CAPTURE is not None:
+        _CAPTURE.files[path] = (data, CAPTURED_FILE_MODE if mode is None else mode)
+        return True
+    return write_bytes(path, data, mode)
+
+
+def write_bytes(path: Path, data: bytes, mode: Optional[int] = None) -> bool:
+    """:func:`emit_bytes` that always goes to disk, for cache files written during a capture."""
+    if _same_bytes(path, data):
+        return False
+    _atomic_replace(path, lambda handle: handle.write(data), mode)
+    count("files_written")
+    count("bytes_written", len(data))
+    return True
+
+
+def emit_text(path: Path, text: str) -> bool:
+    return emit_bytes(path, text.encode("utf-8"))
+
+
+@timed("emit_json")
+def emit_json(path: Path, payload) -> bool:
+    return emit_text(path, json.dumps(payload, indent=2) + "\n")
+
+
+def emit_copy(src: Path, dst: Path) -> bool:
+    """Atomically copy ``src`` to ``dst`` (with metadata) unless it is already current.
+
+    Copies preserve the source mtime, so a destination with matching size and
+    mtime is treated as up to date without reading either file.
+    """
+    if _CAPTURE is not None:
+        # The source may itself have been emitted earlier in this capture.
+        captured = _CAPTURE.files.get(src)
+        if captured is None:
+            captured = (src.read_bytes(), src.stat().st_mode & 0o7777)
+        _CAPTURE.files[dst] = captured
+        return True
+    src_stat = src.stat()
+    try:
+        dst_stat = dst.stat()
+    except OSError:
+        pass
+    else:
+        if src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+            return False
+
+    def write(handle) -> None:
+        with src.open("rb") as source:
+            shutil.copyfileobj(source, handle, _CHUNK_SIZE)
+
+    _atomic_replace(dst, write, src_stat.st_mode & 0o7777)
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    count("files_copied")
+    count("bytes_copied", src_stat.st_size)
+    return True
@@ -0,0 +1,147 @@
+"""``generate-lesson export``: stream a lesson as a reproducible tarball or OCI layer.
+
+The manifest is rendered in memory (:func:`generate_lesson.render`) and
+written through :class:`generate_lesson.bundle.TarSink` straight to the
+output; nothing is staged on disk. The same inputs always produce the same
+bytes, so registries and CDNs deduplicate identical lesson bundles.
+
+``--part`` picks what goes in the archive:
+
+- ``all``: preset context and scaffold, at their repository paths
+- ``preset``: ``images/presets/generated/<slug>/`` at the archive root
+- ``scaffold``: ``templates/generated/<slug>/`` at the archive root
+
+A tarball is an OCI image layer as is. After writing, an OCI descriptor is
+printed as JSON: ``digest``/``size`` of the blob as written and ``diff_id``,
+the digest of the uncompressed tar that image configs reference.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Optional, Sequence
+
+from . import cli
+from .bundle import LessonBundle, RenderError, TarSink, gzip_writer, render
+
+PARTS = ("all", "preset", "scaffold")
+FORMATS = {
+    "tar": "application/vnd.oci.image.layer.v1.tar",
+    "tar+gzip": "application/vnd.oci.image.layer.v1.tar+gzip",
+}
+
+
+class _DigestWriter:
+    """Write-through stream that hashes and counts the bytes it forwards."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    @property
+    def digest(self) -> str:
+        return f"sha256:{self.sha256.hexdigest()}"
+
+
+def select_part(bundle: LessonBundle, part: str) -> LessonBundle:
+    if part == "all":
+        return bundle
+    preset_dir, template_dir = cli.generated_dirs(bundle.slug, Path())
+    return bundle.select((preset_dir if part == "preset" else template_dir).as_posix())
+
+
+def write_layer(bundle: LessonBundle, stream: BinaryIO, output_format: str = "tar+gzip") -> dict:
+    """Stream ``bundle`` as a layer to ``stream`` and return its OCI descriptor."""
+    blob = _DigestWriter(stream)
+    compressed = gzip_writer(blob) if output_format == "tar+gzip" else None
+    diff = _DigestWriter(compressed) if compressed is not None else blob
+    with TarSink(diff, compression="") as sink:
+        bundle.write(sink)
+    if compressed is not None:
+        compressed.close()
+    blob.flush()
+    return {
+        "mediaType": FORMATS[output_format],
+        "digest": blob.digest,
+        "size": blob.size,
+        "diff_id": diff.digest,
+    }
+
+
+def _write_output(output: str, write) -> dict:
+    if output == "-":
+        return write(sys.stdout.buffer)
+    target = Path(output)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            descriptor = write(handle)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return descriptor
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="generate-lesson export")
+    parser.add_argument("manifest", help="Lesson manifest to export.")
+    parser.add_argument("--part", choices=PARTS, default="all", help="What to include (default: all).")
+    parser.add_argument(
+        "--format",
+        choices=sorted(FORMATS),
+        default="tar+gzip",
+        help="Layer media type (default: tar+gzip).",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        default="-",
+        help="Archive path, or - for stdout (default). The descriptor goes to stdout, or stderr when the archive does.",
+    )
+    args = parser.parse_args(argv)
+
+    manifest_path = Path(args.manifest)
+    if not manifest_path.exists():
+        print(f"[error] manifest not found: {manifest_path}", file=sys.stderr)
+        return 1
+    try:
+        bundle = render(manifest_path)
+    except RenderError as exc:
+        for record in exc.diagnostics:
+            if record.get("severity") == "error":
+                print(f"[error] {record['message']}", file=sys.stderr)
+        return 1
+    finally:
+        cli.flush_parse_caches()
+    for record in bundle.diagnostics:
+        if record.get("severity") == "warn":
+            print(f"[warn] {record['message']}", file=sys.stderr)
+
+    part = select_part(bundle, args.part)
+    descriptor = _write_output(args.output, lambda stream: write_layer(part, stream, args.format))
+    descriptor["annotations"] = {"org.airnub.lesson.slug": bundle.slug, "org.airnub.lesson.part": args.part}
+    print(json.dumps(descriptor, sort_keys=True), file=sys.stderr if args.output == "-" else sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Materialize catalog service files into generated lesson trees.
+
+Hundreds of lessons pull in the same service fragments, so copying them
+byte for byte multiplies disk usage. Each file is materialized with the
+requested strategy and falls back along a fixed chain when the filesystem
+cannot honour it (for example a hardlink across devices):
+
+- ``auto``: reflink, then copy (the default)
+- ``reflink``: reflink, then copy
+- ``hardlink``: hardlink, then copy
+- ``symlink``: relative symlink, then copy
+- ``copy``: plain copy
+
+Reflinks share blocks copy-on-write, so every lesson directory stays
+independent of the catalog. Hardlinks share the inode itself: editing a
+generated file in place edits ``services/`` too, so they are opt-in only.
+Symlinks point back into ``services/`` and are only suitable for local
+iteration.
+All strategies replace the destination atomically and skip files that are
+already materialized from the same source. Inside
+:func:`generate_lesson.emit.capture` files are read into the capture instead
+(reported as strategy ``memory``).
+"""
+
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, Set, Tuple
+
+from .emit import capturing, emit_copy
+from .profiling import count
+
+LINK_MODES = ("auto", "copy", "hardlink", "reflink", "symlink")
+
+_FALLBACKS: Dict[str, Tuple[str, ...]] = {
+    "auto": ("reflink", "copy"),
+    "reflink": ("reflink", "copy"),
+    "hardlink": ("hardlink", "copy"),
+    "symlink": ("symlink", "copy"),
+    "copy": ("copy",),
+}
+
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# Errors that mean "this strategy is unavailable here", as opposed to real I/O failures.
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EACCES,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EMLINK,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+}
+
+# (strategy, source device, destination device) pairs that already failed once.
+_UNSUPPORTED: Set[Tuple[str, int, int]] = set()
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _temp_sibling(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+
+
+def _replace_with(path: Path, create) -> None:
+    tmp = _temp_sibling(path)
+    try:
+        create(tmp)
+        os.replace(tmp, path)
+    except OSError as exc:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        if exc.errno in _UNSUPPORTED_ERRNOS:
+            raise _Unsupported(str(exc)) from exc
+        raise
+
+
+def _reflink(src: Path, tmp: Path) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "reflink requires Linux FICLONE")
+    import fcntl
+
+    with src.open("rb") as source, tmp.open("wb") as target:
+        fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+    shutil.copystat(src, tmp)
+
+
+def _is_current(strategy: str, src: Path, src_stat: os.stat_result, dst: Path) -> bool:
+    try:
+        dst_stat = dst.lstat()
+    except OSError:
+        return False
+    if strategy == "symlink":
+        return os.path.islink(dst) and os.readlink(dst) == os.path.relpath(src, dst.parent)
+    if os.path.islink(dst):
+        return False
+    shares_inode = os.path.samestat(src_stat, dst_stat)
+    if strategy == "hardlink":
+        return shares_inode
+    # Copies and reflinks must own their inode; otherwise editing the output
+    # would edit the catalog.
+    return (
+        not shares_inode
+        and src_stat.st_size == dst_stat.st_size
+        and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+    )
+
+
+def _apply(strategy: str, src: Path, src_stat: os.stat_result, dst: Path) -> bool:
+    if _is_current(strategy, src, src_stat, dst):
+        return False
+    if strategy == "copy":
+        if os.path.islink(dst) or (dst.exists() and os.path.samestat(src_stat, dst.stat())):
+            dst.unlink()
+        return emit_copy(src, dst)
+    if strategy == "hardlink":
+        _replace_with(dst, lambda tmp: os.link(src, tmp))
+    elif strategy == "symlink":
+        _replace_with(dst, lambda tmp: os.symlink(os.path.relpath(src, dst.parent), tmp))
+    elif strategy == "reflink":
+        _replace_with(dst, lambda tmp: _reflink(src, tmp))
+    else:  # pragma: no cover - guarded by LINK_MODES
+        raise ValueError(f"unknown materialization strategy: {strategy}")
+    count("files_linked")
+    return True
+
+
+def materialize_file(src: Path, dst: Path, mode: str = "auto") -> Tuple[str, bool]:
+    """Materialize ``src`` at ``dst`` and return ``(strategy_used, changed)``."""
+    try:
+        chain = _FALLBACKS[mode]
+    except KeyError:
+        raise ValueError(f"link mode must be one of {', '.join(LINK_MODES)}; got {mode!r}") from None
+    if capturing():
+        return "memory", emit_copy(src, dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    src_stat = src.stat()
+    dst_dev = dst.parent.stat().st_dev
+    for strategy in chain:
+        if strategy != "copy" and (strategy, src_stat.st_dev, dst_dev) in _UNSUPPORTED:
+            continue
+        try:
+            return strategy, _apply(strategy, src, src_stat, dst)
+        except _Unsupported:
+            _UNSUPPORTED.add((strategy, src_stat.st_dev, dst_dev))
+    raise AssertionError("copy strategy never reports unsupported")  # pragma: no cover
+
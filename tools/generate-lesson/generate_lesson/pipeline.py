@@ -0,0 +1,215 @@
+"""``generate-lesson check``: lint and generate every manifest in one pass.
+
+Each manifest is parsed once and the in-memory document flows through the
+stages in order:
+
+1. ``load``: parse the manifest (shared parse cache)
+2. ``schema``: validate against ``schemas/lesson-env.schema.json`` (skipped
+   when ``jsonschema`` is not installed)
+3. ``structure``: :func:`generate_lesson.cli.validate_manifest_structure`
+4. ``slug``: :func:`generate_lesson.slug.derive_lesson_slug`
+5. ``generate``: the regular generator, batched across worker processes
+
+A stage only runs when every earlier stage passed. One JSON object per
+manifest is written to stdout (NDJSON) in manifest order.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import cli
+from .materialize import LINK_MODES
+from .slug import derive_lesson_slug
+
+STAGES = ("load", "schema", "structure", "slug", "generate")
+
+LESSON_SCHEMA = Path("schemas") / "lesson-env.schema.json"
+
+# Schema sha256 -> compiled validator.
+_VALIDATORS: Dict[str, object] = {}
+
+
+def schema_validator(root: Path):
+    """Compiled validator for the lesson schema, or a reason string when unavailable."""
+    try:
+        from jsonschema import Draft202012Validator
+    except ImportError:
+        return "jsonschema is not installed"
+    try:
+        data = (root / LESSON_SCHEMA).read_bytes()
+    except OSError:
+        return f"{LESSON_SCHEMA.as_posix()} not found"
+    digest = hashlib.sha256(data).hexdigest()
+    validator = _VALIDATORS.get(digest)
+    if validator is None:
+        schema = json.loads(data)
+        Draft202012Validator.check_schema(schema)
+        validator = _VALIDATORS[digest] = Draft202012Validator(schema)
+    return validator
+
+
+class CheckResult:
+    """Stage outcomes for one manifest."""
+
+    def __init__(self, manifest_path: Path) -> None:
+        self.manifest = str(manifest_path)
+        self.slug = ""
+        self.stages: Dict[str, dict] = {}
+        self.outputs: Dict[str, str] = {}
+
+    @property
+    def ok(self) -> bool:
+        return all(stage["status"] != "error" for stage in self.stages.values()) and (
+            self.stages.get("generate", {}).get("status") == "ok"
+        )
+
+    def stage(self, name: str, status: str, started: float, **details) -> bool:
+        entry = {"status": status, "ms": round((time.perf_counter() - started) * 1000, 3)}
+        entry.update((key, value) for key, value in details.items() if value)
+        self.stages[name] = entry
+        return status != "error"
+
+    def as_dict(self) -> dict:
+        return {
+            "manifest": self.manifest,
+            "slug": self.slug or None,
+            "ok": self.ok,
+            "stages": self.stages,
+            "outputs": self.outputs,
+        }
+
+
+def lint_manifest(manifest_path: Path, validator) -> Tuple[CheckResult, Optional[dict]]:
+    """Run the load, schema, structure and slug stages; return the document when generation may proceed."""
+    result = CheckResult(manifest_path)
+
+    started = time.perf_counter()
+    try:
+        manifest = cli.load_manifest(manifest_path)
+    except Exception as exc:
+        result.stage("load", "error", started, errors=[f"{type(exc).__name__}: {exc}"])
+        return result, None
+    result.stage("load", "ok", started)
+
+    started = time.perf_counter()
+    if isinstance(validator, str):
+        result.stage("schema", "skipped", started, reason=validator)
+    else:
+        errors = [error.message for error in validator.iter_errors(manifest)]
+        if not result.stage("schema", "error" if errors else "ok", started, errors=errors):
+            return result, None
+
+    started = time.perf_counter()
+    metadata, _spec, errors = cli.validate_manifest_structure(manifest)
+    if not result.stage("structure", "error" if errors else "ok", started, errors=list(errors)):
+        return result, None
+
+    started = time.perf_counter()
+    result.slug = derive_lesson_slug(metadata)
+    result.stage("slug", "ok", started, slug=result.slug)
+    return result, manifest
+
+
+def _messages(outcome: cli.ManifestResult, severity: str) -> List[str]:
+    return [record["message"] for record in outcome.records if record.get("severity") == severity]
+
+
+def run_check(
+    manifest_paths: Sequence[Path],
+    jobs: Optional[int] = None,
+    options: cli.GenerateOptions = cli.GenerateOptions(),
+) -> List[CheckResult]:
+    validator = schema_validator(cli.ROOT)
+    results: List[CheckResult] = []
+    groups: Dict[str, List[Tuple[str, Optional[dict], str]]] = {}
+    for manifest_path in manifest_paths:
+        result, manifest = lint_manifest(manifest_path, validator)
+        results.append(result)
+        if manifest is not None:
+            groups.setdefault(result.slug, []).append((str(manifest_path), manifest, result.slug))
+
+    generated = {
+        generated_result.manifest: generated_result
+        for generated_result in cli.generate_groups(list(groups.values()), jobs, options)
+    }
+    for result in results:
+        outcome = generated.get(result.manifest)
+        if outcome is None:
+            continue
+        result.stages["generate"] = {
+            "status": "ok" if outcome.exit_code == 0 else "error",
+            "ms": round(outcome.duration * 1000, 3),
+        }
+        errors = _messages(outcome, "error")
+        warnings = _messages(outcome, "warn")
+        if errors:
+            result.stages["generate"]["errors"] = errors
+        if warnings:
+            result.stages["generate"]["warnings"] = warnings
+        if outcome.exit_code == 0:
+            preset_dir = Path("images") / "presets" / "generated" / result.slug
+            result.outputs["preset"] = preset_dir.as_posix()
+            result.outputs["template"] = (Path("templates") / "generated" / result.slug).as_posix()
+            if (cli.ROOT / preset_dir / "docker-compose.classroom.yml").is_file():
+                result.outputs["compose"] = (preset_dir / "docker-compose.classroom.yml").as_posix()
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="generate-lesson check")
+    parser.add_argument(
+        "--manifests",
+        default=str(cli.ROOT / "examples" / "lesson-manifests"),
+        help="Directory or glob of manifests to check (default: examples/lesson-manifests).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for the generate stage (defaults to the CPU count).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Regenerate lessons even when their inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="auto",
+        help="How service fragments are materialized into lessons (default: auto).",
+    )
+    args = parser.parse_args(argv)
+
+    manifest_paths = cli.discover_manifests(args.manifests)
+    if not manifest_paths:
+        print(f"[warn] No lesson manifests matched {args.manifests}", file=sys.stderr)
+        return 0
+    # Collect generator diagnostics as records rather than text lines.
+    options = cli.GenerateOptions(use_cache=not args.no_cache, link_mode=args.link_mode, output_format="json")
+
+    started = time.perf_counter()
+    try:
+        results = run_check(manifest_paths, args.jobs, options)
+    finally:
+        cli.flush_parse_caches()
+        cli.flush_dependency_indexes()
+
+    for result in results:
+        print(json.dumps(result.as_dict(), sort_keys=True))
+    failed = sum(1 for result in results if not result.ok)
+    elapsed = time.perf_counter() - started
+    if failed:
+        print(f"[error] {failed} of {len(results)} manifests failed", file=sys.stderr)
+        return 1
+    print(f"[ok] Checked {len(results)} manifests in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Opt-in stage timing and counters for the generator (``--profile``).
+
+Generator stages are wrapped in :func:`stage` or decorated with :func:`timed`,
+and I/O helpers call :func:`count`. All three check a single module global and
+return immediately while profiling is disabled, so the hooks stay in place in
+normal runs.
+
+When enabled, a :class:`Profiler` accumulates inclusive wall time per stage
+name, counters such as ``bytes_written`` or ``lesson_cache_hits``, and one
+Chrome trace event per stage invocation (load the file in ``chrome://tracing``
+or Perfetto).
+"""
+
+import functools
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "detail", "started")
+
+    def __init__(self, profiler: "Profiler", name: str, detail: Optional[str]) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> bool:
+        self.profiler.record(self.name, self.started, time.perf_counter(), self.detail)
+        return False
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        # Stage name -> [total seconds, calls].
+        self.stages: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.events: List[dict] = []
+
+    def record(self, name: str, started: float, ended: float, detail: Optional[str] = None) -> None:
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += ended - started
+        totals[1] += 1
+        event = {
+            "name": name,
+            "cat": "generate-lesson",
+            "ph": "X",
+            "ts": round((started - self.origin) * 1e6, 3),
+            "dur": round((ended - started) * 1e6, 3),
+            "pid": self.pid,
+            "tid": 0,
+        }
+        if detail:
+            event["args"] = {"detail": detail}
+        self.events.append(event)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def breakdown(self) -> List[str]:
+        """Human-readable table of stages (inclusive time, slowest first) and counters."""
+        wall = time.perf_counter() - self.origin
+        rows = [("STAGE", "CALLS", "TOTAL", "% WALL")]
+        for name, (total, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0]):
+            share = 100 * total / wall if wall else 0.0
+            rows.append((name, str(int(calls)), f"{total * 1000:.1f} ms", f"{share:.1f}%"))
+        widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+        lines = [
+            "  ".join(
+                cell.ljust(widths[column]) if column == 0 else cell.rjust(widths[column])
+                for column, cell in enumerate(row)
+            )
+            for row in rows
+        ]
+        lines.append(f"wall time: {wall * 1000:.1f} ms (stages are inclusive and may nest)")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}: {value}")
+        return lines
+
+    def write_trace(self, path: Path) -> None:
+        payload = {"traceEvents": self.events, "displayTimeUnit": "ms", "otherData": {"counters": self.counters}}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload) + "\n", encoding="utf-8")
+
+
+_PROFILER: Optional[Profiler] = None
+
+
+def stage(name: str, detail: Optional[str] = None):
+    """Context manager timing ``name``; a shared no-op object while profiling is off."""
+    profiler = _PROFILER
+    if profiler is None:
+        return _NULL_STAGE
+    return _Stage(profiler, name, detail)
+
+
+def timed(name: str):
+    """Decorator form of :func:`stage` for whole functions."""
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _PROFILER
+            if profiler is None:
+                return func(*args, **kwargs)
+            with _Stage(profiler, name, None):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def count(name: str, amount: int = 1) -> None:
+    profiler = _PROFILER
+    if profiler is not None:
+        profiler.count(name, amount)
+
+
+def enable() -> Profiler:
+    global _PROFILER
+    _PROFILER = Profiler()
+    return _PROFILER
+
+
+def disable() -> Optional[Profiler]:
+    global _PROFILER
+    profiler, _PROFILER = _PROFILER, None
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    return _PROFILER
@@ -0,0 +1,213 @@
+"""Per-service compose wiring, compiled from the catalog instead of hard-coded tables.
+
+For every service under ``services/`` the registry records:
+
+- ``extends``: each compose service in its top-level fragments, as
+  ``(fragment, compose service)`` pairs (opt-in ``profiles`` services included,
+  Compose only starts them when the profile is enabled)
+- ``volumes``: the named volumes its fragments declare
+- ``port_labels``: ``catalog/services.json`` ``portLabels``; otherwise each
+  catalog ``ports`` entry (or, without catalog ports, each published host
+  port) is labelled with the catalog ``label``
+- ``classroom_network``: catalog ``classroomNetwork``, or a fragment that
+  declares or joins the ``classroom`` network
+
+Adding a service therefore only takes a fragment and a catalog entry. Deriving
+the registry parses every fragment, so the result is compiled once into a JSON
+snapshot under ``.cache/generate-lesson/registry.json``. The snapshot is keyed
+by the generator fingerprint and the size and mtime of ``catalog/services.json``
+and each fragment; later runs load it without touching the YAML. Lookups are
+dictionary reads.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .cache import cache_root, generator_fingerprint
+from .catalog import ServiceCatalog
+from .conflicts import port_bindings
+from .emit import write_bytes
+from .profiling import count
+
+CLASSROOM_NETWORK = "classroom"
+SNAPSHOT_NAME = "registry.json"
+SNAPSHOT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ServiceRecord:
+    name: str
+    extends: Tuple[Tuple[str, str], ...] = ()
+    volumes: Tuple[str, ...] = ()
+    port_labels: Mapping[int, str] = field(default_factory=dict)
+    classroom_network: bool = False
+
+    def to_json(self) -> Dict[str, object]:
+        return {
+            "extends": [list(pair) for pair in self.extends],
+            "volumes": list(self.volumes),
+            "portLabels": {str(port): label for port, label in self.port_labels.items()},
+            "classroomNetwork": self.classroom_network,
+        }
+
+    @classmethod
+    def from_json(cls, name: str, payload: Mapping) -> "ServiceRecord":
+        return cls(
+            name=name,
+            extends=tuple((str(file_name), str(service)) for file_name, service in payload.get("extends", ())),
+            volumes=tuple(str(volume) for volume in payload.get("volumes", ())),
+            port_labels={int(port): str(label) for port, label in payload.get("portLabels", {}).items()},
+            classroom_network=bool(payload.get("classroomNetwork", False)),
+        )
+
+
+_EMPTY = ServiceRecord("")
+
+
+class ServiceRegistry:
+    def __init__(self, records: Mapping[str, ServiceRecord]) -> None:
+        self._records = dict(records)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def get(self, name: str) -> ServiceRecord:
+        return self._records.get(name, _EMPTY)
+
+    def extends(self, name: str) -> Tuple[Tuple[str, str], ...]:
+        return self.get(name).extends
+
+    def volumes(self, name: str) -> Tuple[str, ...]:
+        return self.get(name).volumes
+
+    def port_labels(self, name: str) -> Mapping[int, str]:
+        return self.get(name).port_labels
+
+    def requires_classroom_network(self, name: str) -> bool:
+        return self.get(name).classroom_network
+
+    def to_json(self) -> Dict[str, object]:
+        return {name: record.to_json() for name, record in self._records.items()}
+
+    @classmethod
+    def from_json(cls, payload: Mapping) -> "ServiceRegistry":
+        return cls({name: ServiceRecord.from_json(name, record) for name, record in payload.items()})
+
+
+def _published_ports(definition: Mapping) -> List[int]:
+    return [binding.host_port for binding in port_bindings(definition) if binding.protocol == "tcp"]
+
+
+def _joins_classroom(definition: Mapping) -> bool:
+    networks = definition.get("networks")
+    return isinstance(networks, (Mapping, list)) and CLASSROOM_NETWORK in networks
+
+
+def build_service_record(catalog: ServiceCatalog, name: str) -> ServiceRecord:
+    entry = catalog.get(name)
+    metadata = catalog.metadata(name)
+    extends: List[Tuple[str, str]] = []
+    volumes: List[str] = []
+    published: List[int] = []
+    classroom = bool(metadata.get("classroomNetwork", False))
+    for file_name in entry.fragments if entry is not None else ():
+        document = catalog.compose_document(name, file_name)
+        if not isinstance(document, Mapping):
+            continue
+        services = document.get("services")
+        for service_name, definition in (services.items() if isinstance(services, Mapping) else ()):
+            if not isinstance(definition, Mapping):
+                continue
+            extends.append((file_name, str(service_name)))
+            published.extend(port for port in _published_ports(definition) if port not in published)
+            classroom = classroom or _joins_classroom(definition)
+        declared_volumes = document.get("volumes")
+        if isinstance(declared_volumes, Mapping):
+            volumes.extend(str(volume) for volume in declared_volumes if str(volume) not in volumes)
+        declared_networks = document.get("networks")
+        if isinstance(declared_networks, Mapping) and CLASSROOM_NETWORK in declared_networks:
+            classroom = True
+
+    label = str(metadata.get("label") or name)
+    catalog_ports = [int(port) for port in metadata.get("ports") or () if isinstance(port, int)]
+    ports = catalog_ports or published
+    explicit = metadata.get("portLabels")
+    if isinstance(explicit, Mapping) and explicit:
+        port_labels = {int(port): str(text) for port, text in explicit.items()}
+    elif len(ports) == 1:
+        port_labels = {ports[0]: label}
+    else:
+        port_labels = {port: f"{label} {port}" for port in ports}
+    return ServiceRecord(name, tuple(extends), tuple(volumes), port_labels, classroom)
+
+
+def build_service_registry(catalog: ServiceCatalog) -> ServiceRegistry:
+    """Derive the registry from the catalog metadata and every service's fragments."""
+    return ServiceRegistry({name: build_service_record(catalog, name) for name in catalog})
+
+
+def snapshot_key(catalog: ServiceCatalog) -> str:
+    """Digest of the generator and the stat signature of every registry input."""
+    digest = hashlib.sha256(generator_fingerprint().encode("utf-8"))
+    sources = [catalog.root / "catalog" / "services.json"]
+    for name in catalog:
+        entry = catalog.get(name)
+        sources.extend(entry.directory / file_name for file_name in entry.fragments)
+    for path in sources:
+        try:
+            stat = path.stat()
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            signature = "<missing>"
+        digest.update(f"{path.relative_to(catalog.root).as_posix()}\0{signature}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_service_registry(catalog: ServiceCatalog, snapshot: Optional[Path] = None) -> ServiceRegistry:
+    """Registry for ``catalog``, from its snapshot when the inputs are unchanged."""
+    snapshot = snapshot or cache_root(catalog.root) / SNAPSHOT_NAME
+    key = snapshot_key(catalog)
+    try:
+        payload = json.loads(snapshot.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        payload = None
+    if isinstance(payload, Mapping) and payload.get("version") == SNAPSHOT_VERSION and payload.get("key") == key:
+        try:
+            registry = ServiceRegistry.from_json(payload["services"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            pass
+        else:
+            count("registry_snapshot_hits")
+            return registry
+    count("registry_snapshot_misses")
+    registry = build_service_registry(catalog)
+    document = {"version": SNAPSHOT_VERSION, "key": key, "services": registry.to_json()}
+    try:
+        write_bytes(snapshot, (json.dumps(document, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    except OSError:
+        pass
+    return registry
+
+
+# Catalog identity and generation -> registry, so refreshed catalogs recompile.
+_REGISTRIES: Dict[int, Tuple[ServiceCatalog, int, ServiceRegistry]] = {}
+
+
+def get_service_registry(catalog: ServiceCatalog) -> ServiceRegistry:
+    """Per-process registry for ``catalog``, loaded on first use."""
+    cached = _REGISTRIES.get(id(catalog))
+    if cached is not None and cached[0] is catalog and cached[1] == catalog.generation:
+        return cached[2]
+    registry = load_service_registry(catalog)
+    _REGISTRIES[id(catalog)] = (catalog, catalog.generation, registry)
+    return registry
+
+
+def clear_service_registries() -> None:
+    _REGISTRIES.clear()
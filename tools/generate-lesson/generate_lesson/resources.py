@@ -0,0 +1,222 @@
+"""Resource footprints of lesson stacks and the ``spec.resources`` admission check.
+
+``catalog/services.json`` gives each service a ``resources`` mapping from compose
+service to its footprint: ``cpu`` (cores, may be fractional), plus ``memory``
+and ``disk`` as sizes such as ``"512mb"`` or ``"2gb"``. The dev container itself
+is budgeted from the base preset's ``hostRequirements`` (``cpus``, ``memory``,
+``storage``) or :data:`WORKSPACE_FOOTPRINT` when the preset declares none.
+
+:func:`estimate_lesson` sums the workspace and every selected service into the
+lesson footprint. :func:`over_budget` compares that footprint with
+``spec.resources``. The per-container footprints double as
+``deploy.resources.limits`` in the flattened aggregate compose
+(:func:`compose_limits`); disk has no Compose limit and only counts towards the
+budget.
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+RESOURCE_KEYS = ("cpu", "memory", "disk")
+
+_SIZE = re.compile(r"(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>[kmgt]?)i?b?", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+
+def parse_size(value) -> int:
+    """Bytes in ``value``: a number of bytes or a size like ``512mb``, ``2g`` or ``1.5GiB``."""
+    if isinstance(value, bool):
+        raise ValueError(f"invalid size {value!r}")
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _SIZE.fullmatch(str(value).strip())
+    if match is None:
+        raise ValueError(f"invalid size {value!r}; expected a value such as 512mb or 4gb")
+    return int(float(match.group("value")) * _UNITS[match.group("unit").lower()])
+
+
+def format_size(size: int) -> str:
+    """``size`` in its largest unit in the ``hostRequirements`` style (``4gb``, ``1.5gb``, ``512mb``)."""
+    for unit in ("t", "g", "m", "k"):
+        scale = _UNITS[unit]
+        if size >= scale:
+            value = f"{size / scale:.2f}".rstrip("0").rstrip(".")
+            return f"{value}{unit}b"
+    return f"{size}b"
+
+
+def parse_cpu(value) -> float:
+    if isinstance(value, bool):
+        raise ValueError(f"invalid cpu count {value!r}")
+    try:
+        cpu = float(str(value).strip())
+    except ValueError:
+        raise ValueError(f"invalid cpu count {value!r}; expected a number of cores") from None
+    if cpu < 0:
+        raise ValueError(f"invalid cpu count {value!r}; expected a number of cores")
+    return cpu
+
+
+def _format_cpu(cpu: float) -> str:
+    return str(int(cpu)) if float(cpu).is_integer() else f"{cpu:g}"
+
+
+@dataclass(frozen=True)
+class Footprint:
+    cpu: float = 0.0
+    # Bytes.
+    memory: int = 0
+    disk: int = 0
+
+    def __add__(self, other: "Footprint") -> "Footprint":
+        return Footprint(self.cpu + other.cpu, self.memory + other.memory, self.disk + other.disk)
+
+    @classmethod
+    def from_mapping(cls, raw: Mapping, cpu_key: str = "cpu", disk_key: str = "disk") -> "Footprint":
+        """Parse ``{"cpu": ..., "memory": ..., "disk": ...}``; missing keys count as zero."""
+        return cls(
+            cpu=parse_cpu(raw[cpu_key]) if raw.get(cpu_key) is not None else 0.0,
+            memory=parse_size(raw["memory"]) if raw.get("memory") is not None else 0,
+            disk=parse_size(raw[disk_key]) if raw.get(disk_key) is not None else 0,
+        )
+
+    def describe(self) -> str:
+        parts = [f"{_format_cpu(self.cpu)} CPU", f"{format_size(self.memory)} memory"]
+        if self.disk:
+            parts.append(f"{format_size(self.disk)} disk")
+        return ", ".join(parts)
+
+
+# Editor server, language tooling and the Docker daemon the services run under.
+WORKSPACE_FOOTPRINT = Footprint(cpu=1.0, memory=2 * 1024**3, disk=8 * 1024**3)
+
+
+@dataclass(frozen=True)
+class LessonEstimate:
+    workspace: Footprint
+    # Catalog service -> summed footprint of its containers.
+    services: Dict[str, Footprint] = field(default_factory=dict)
+    # Compose service -> footprint, for deploy.resources.limits.
+    containers: Dict[str, Footprint] = field(default_factory=dict)
+    # Selected services whose catalog entry declares no resources.
+    unknown: Tuple[str, ...] = ()
+
+    @property
+    def total(self) -> Footprint:
+        total = self.workspace
+        for footprint in self.services.values():
+            total = total + footprint
+        return total
+
+
+def preset_footprint(root: Path, preset: Optional[str]) -> Footprint:
+    """Workspace footprint from ``images/presets/<preset>/devcontainer.json`` ``hostRequirements``."""
+    if not preset:
+        return WORKSPACE_FOOTPRINT
+    try:
+        path = root / "images" / "presets" / preset / "devcontainer.json"
+        devcontainer = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return WORKSPACE_FOOTPRINT
+    requirements = devcontainer.get("hostRequirements") if isinstance(devcontainer, Mapping) else None
+    if not isinstance(requirements, Mapping) or not requirements:
+        return WORKSPACE_FOOTPRINT
+    try:
+        return Footprint.from_mapping(requirements, cpu_key="cpus", disk_key="storage")
+    except ValueError:
+        return WORKSPACE_FOOTPRINT
+
+
+def service_footprints(name: str, metadata: Mapping[str, object]) -> Dict[str, Footprint]:
+    """Per-container footprints of catalog service ``name``; raises ``ValueError`` on bad entries."""
+    raw = metadata.get("resources")
+    if raw is None:
+        return {}
+    if not isinstance(raw, Mapping):
+        raise ValueError(f"catalog service {name}: resources must map compose services to footprints")
+    footprints = {}
+    for container, entry in raw.items():
+        if not isinstance(entry, Mapping):
+            raise ValueError(f"catalog service {name}: resources.{container} must be a mapping")
+        try:
+            footprints[str(container)] = Footprint.from_mapping(entry)
+        except ValueError as exc:
+            raise ValueError(f"catalog service {name}: resources.{container}: {exc}") from None
+    return footprints
+
+
+def estimate_lesson(
+    services: Sequence[str],
+    metadata: Mapping[str, Mapping[str, object]],
+    workspace: Footprint = WORKSPACE_FOOTPRINT,
+) -> LessonEstimate:
+    """Footprint of a workspace running ``services``; ``metadata`` is their catalog entries."""
+    per_service: Dict[str, Footprint] = {}
+    containers: Dict[str, Footprint] = {}
+    unknown = []
+    for name in services:
+        footprints = service_footprints(name, metadata.get(name, {}))
+        if not footprints:
+            unknown.append(name)
+            continue
+        total = Footprint()
+        for container, footprint in footprints.items():
+            containers[container] = footprint
+            total = total + footprint
+        per_service[name] = total
+    return LessonEstimate(workspace, per_service, containers, tuple(unknown))
+
+
+def suggested_resources(footprint: Footprint) -> Dict[str, str]:
+    """``spec.resources`` that fits ``footprint``: whole CPUs and memory/disk rounded up to a gigabyte."""
+    gigabyte = _UNITS["g"]
+    suggestion = {
+        "cpu": str(max(1, math.ceil(footprint.cpu))),
+        "memory": f"{max(1, math.ceil(footprint.memory / gigabyte))}gb",
+    }
+    if footprint.disk:
+        suggestion["disk"] = f"{math.ceil(footprint.disk / gigabyte)}gb"
+    return suggestion
+
+
+def over_budget(footprint: Footprint, resources: Mapping[str, object]) -> List[Tuple[str, str, str]]:
+    """``(key, needed, requested)`` for every ``spec.resources`` entry ``footprint`` exceeds."""
+    budget = Footprint.from_mapping(resources)
+    exceeded = []
+    if resources.get("cpu") is not None and footprint.cpu > budget.cpu:
+        exceeded.append(("cpu", _format_cpu(footprint.cpu), _format_cpu(budget.cpu)))
+    if resources.get("memory") is not None and footprint.memory > budget.memory:
+        exceeded.append(("memory", format_size(footprint.memory), format_size(budget.memory)))
+    if resources.get("disk") is not None and footprint.disk > budget.disk:
+        exceeded.append(("disk", format_size(footprint.disk), format_size(budget.disk)))
+    return exceeded
+
+
+def compose_limits(footprint: Footprint) -> Dict[str, str]:
+    """``deploy.resources.limits`` for a container with ``footprint``."""
+    limits = {}
+    if footprint.cpu:
+        limits["cpus"] = _format_cpu(footprint.cpu)
+    if footprint.memory:
+        limits["memory"] = format_size(footprint.memory)
+    return limits
+
+
+def apply_compose_limits(definition: Dict[str, object], footprint: Optional[Footprint]) -> None:
+    """Add ``deploy.resources.limits`` unless the fragment already sets limits."""
+    limits = compose_limits(footprint) if footprint is not None else {}
+    if not limits:
+        return
+    deploy = definition.get("deploy")
+    deploy = dict(deploy) if isinstance(deploy, Mapping) else {}
+    resources = deploy.get("resources")
+    resources = dict(resources) if isinstance(resources, Mapping) else {}
+    if resources.get("limits") or definition.get("mem_limit") or definition.get("cpus"):
+        return
+    resources["limits"] = limits
+    deploy["resources"] = resources
+    definition["deploy"] = deploy
@@ -0,0 +1,634 @@
+"""Dependency-free parser for the YAML subset used by lesson manifests.
+
+This is the last-resort backend in :mod:`generate_lesson.yamlio`. It reads the
+input once, line by line, and builds the document with an explicit stack
+instead of recursion, so deeply nested ``settings``/``features`` blocks cannot
+hit the interpreter recursion limit and memory stays proportional to the
+document being built. Supported:
+
+- block mappings and sequences (a sequence may sit at its parent key's indent)
+- plain, single-quoted and double-quoted scalars and mapping keys
+- flow mappings and sequences (``{name: classroom}``, ``["6379:6379"]``),
+  including ones that span several lines
+- comments and ``---``/``...`` document markers
+
+Plain scalars resolve like PyYAML's ``SafeLoader`` (YAML 1.1 null, bool, int
+and float forms), except timestamps, which stay strings. Anchors, aliases,
+tags, block scalars, complex keys and multi-document streams are rejected.
+Every error is a :class:`YAMLSyntaxError` carrying a 1-based line and column.
+"""
+
+import io
+import re
+from typing import List, Optional, Tuple
+
+# Bumped whenever parse results change so persistent parse caches are re-keyed.
+PARSER_VERSION = "2"
+
+
+class YAMLSyntaxError(ValueError):
+    def __init__(self, problem: str, line: int, column: int) -> None:
+        super().__init__(f"{problem} (line {line}, column {column})")
+        self.problem = problem
+        self.line = line
+        self.column = column
+
+
+_NULL_VALUES = {"", "~", "null", "Null", "NULL"}
+_BOOL_VALUES = {
+    **dict.fromkeys(("yes", "Yes", "YES", "true", "True", "TRUE", "on", "On", "ON"), True),
+    **dict.fromkeys(("no", "No", "NO", "false", "False", "FALSE", "off", "Off", "OFF"), False),
+}
+# The implicit int/float patterns from PyYAML's resolver (YAML 1.1).
+_INT_RE = re.compile(
+    r"""^(?:[-+]?0b[0-1_]+
+    |[-+]?0[0-7_]+
+    |[-+]?(?:0|[1-9][0-9_]*)
+    |[-+]?0x[0-9a-fA-F_]+
+    |[-+]?[1-9][0-9_]*(?::[0-5]?[0-9])+)$""",
+    re.X,
+)
+_FLOAT_RE = re.compile(
+    r"""^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+][0-9]+)?
+    |\.[0-9_]+(?:[eE][-+][0-9]+)?
+    |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+\.[0-9_]*
+    |[-+]?\.(?:inf|Inf|INF)
+    |\.(?:nan|NaN|NAN))$""",
+    re.X,
+)
+_COMMENT_RE = re.compile(r"[ \t]#")
+_UNSUPPORTED_INDICATORS = {
+    "&": "anchors are not supported",
+    "*": "aliases are not supported",
+    "!": "tags are not supported",
+    "|": "block scalars are not supported",
+    ">": "block scalars are not supported",
+    "%": "directives are not supported",
+    "@": "'@' cannot start a plain scalar",
+    "`": "'`' cannot start a plain scalar",
+}
+_ESCAPES = {
+    "0": "\0",
+    "a": "\a",
+    "b": "\b",
+    "t": "\t",
+    "\t": "\t",
+    "n": "\n",
+    "v": "\v",
+    "f": "\f",
+    "r": "\r",
+    "e": "\x1b",
+    " ": " ",
+    '"': '"',
+    "/": "/",
+    "\\": "\\",
+    "N": "\x85",
+    "_": "\xa0",
+    "L": " ",
+    "P": " ",
+}
+_HEX_ESCAPES = {"x": 2, "u": 4, "U": 8}
+
+
+def _sexagesimal(value: str, convert):
+    total = convert(0)
+    for part in value.split(":"):
+        total = total * 60 + convert(part)
+    return total
+
+
+def _construct_int(value: str) -> int:
+    value = value.replace("_", "")
+    sign = -1 if value[0] == "-" else 1
+    if value[0] in "+-":
+        value = value[1:]
+    if value == "0":
+        return 0
+    if value.startswith("0b"):
+        return sign * int(value[2:], 2)
+    if value.startswith("0x"):
+        return sign * int(value[2:], 16)
+    if value[0] == "0":
+        return sign * int(value, 8)
+    if ":" in value:
+        return sign * _sexagesimal(value, int)
+    return sign * int(value)
+
+
+def _construct_float(value: str) -> float:
+    value = value.replace("_", "").lower()
+    sign = -1 if value[0] == "-" else 1
+    if value[0] in "+-":
+        value = value[1:]
+    if value == ".inf":
+        return sign * float("inf")
+    if value == ".nan":
+        return float("nan")
+    if ":" in value:
+        return sign * _sexagesimal(value, float)
+    return sign * float(value)
+
+
+def resolve_plain(value: str):
+    """Resolve an unquoted scalar the way PyYAML's SafeLoader does (minus timestamps)."""
+    if value in _NULL_VALUES:
+        return None
+    if value in _BOOL_VALUES:
+        return _BOOL_VALUES[value]
+    try:
+        if _INT_RE.match(value):
+            return _construct_int(value)
+        if _FLOAT_RE.match(value):
+            return _construct_float(value)
+    except ValueError:
+        pass
+    return value
+
+
+class _OffsetError(Exception):
+    def __init__(self, problem: str, offset: int) -> None:
+        super().__init__(problem)
+        self.problem = problem
+        self.offset = offset
+
+
+class _Incomplete(Exception):
+    pass
+
+
+def _parse_quoted(text: str, start: int) -> Tuple[str, int]:
+    """Parse the quoted scalar at ``text[start]``; return ``(value, index after quote)``."""
+    quote = text[start]
+    chunks: List[str] = []
+    index = start + 1
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char == "\n":
+            break
+        if quote == "'":
+            if char == "'":
+                if index + 1 < length and text[index + 1] == "'":
+                    chunks.append("'")
+                    index += 2
+                    continue
+                return "".join(chunks), index + 1
+            chunks.append(char)
+            index += 1
+            continue
+        if char == '"':
+            return "".join(chunks), index + 1
+        if char != "\\":
+            chunks.append(char)
+            index += 1
+            continue
+        if index + 1 >= length:
+            break
+        code = text[index + 1]
+        if code in _ESCAPES:
+            chunks.append(_ESCAPES[code])
+            index += 2
+        elif code in _HEX_ESCAPES:
+            width = _HEX_ESCAPES[code]
+            digits = text[index + 2 : index + 2 + width]
+            try:
+                chunks.append(chr(int(digits, 16)))
+            except ValueError:
+                raise _OffsetError(f"invalid escape '\\{code}{digits}'", index) from None
+            if len(digits) != width:
+                raise _OffsetError(f"invalid escape '\\{code}{digits}'", index)
+            index += 2 + width
+        else:
+            raise _OffsetError(f"unknown escape '\\{code}'", index)
+    raise _OffsetError("unterminated quoted scalar", start)
+
+
+def _skip_space_and_comments(text: str, index: int) -> int:
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char in " \t\r\n":
+            index += 1
+        elif char == "#" and (index == 0 or text[index - 1] in " \t\r\n"):
+            newline = text.find("\n", index)
+            index = length if newline < 0 else newline
+        else:
+            break
+    return index
+
+
+def _flow_plain_end(text: str, index: int) -> int:
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char in ",[]{}\n":
+            break
+        if char == ":" and (index + 1 == length or text[index + 1] in " \t\r\n,[]{}"):
+            break
+        if char == "#" and text[index - 1] in " \t":
+            break
+        index += 1
+    return index
+
+
+def _flow_add(frame: list, value, offset: int) -> None:
+    container, state = frame[0], frame[1]
+    if isinstance(container, list):
+        if state != "item":
+            raise _OffsetError("expected ',' or ']' in flow sequence", offset)
+        container.append(value)
+        frame[1] = "sep"
+        return
+    if state == "key":
+        if isinstance(value, (dict, list)):
+            raise _OffsetError("flow collections cannot be used as mapping keys", offset)
+        frame[2] = value
+        frame[1] = "colon"
+    elif state == "value":
+        container[frame[2]] = value
+        frame[1] = "sep"
+    else:
+        raise _OffsetError("expected ',' or '}' in flow mapping", offset)
+
+
+def _parse_flow(text: str, start: int):
+    """Parse the flow collection opening at ``text[start]`` without recursion.
+
+    Returns ``(value, end)``; raises :class:`_Incomplete` when ``text`` ends
+    before the outermost collection closes.
+    """
+    stack: List[list] = []  # [container, state, pending key]
+    index = start
+    length = len(text)
+    while True:
+        index = _skip_space_and_comments(text, index)
+        if index >= length:
+            raise _Incomplete()
+        char = text[index]
+        top = stack[-1] if stack else None
+        if char in "[{":
+            if top is not None:
+                if isinstance(top[0], dict) and top[1] == "key":
+                    raise _OffsetError("flow collections cannot be used as mapping keys", index)
+                if top[1] not in ("item", "value"):
+                    raise _OffsetError("expected ',' before nested flow collection", index)
+            stack.append([[], "item", None] if char == "[" else [{}, "key", None])
+            index += 1
+            continue
+        if top is None:
+            raise _OffsetError(f"expected '[' or '{{', found {char!r}", index)
+        if char in "]}":
+            expected = list if char == "]" else dict
+            if not isinstance(top[0], expected):
+                raise _OffsetError(f"unexpected '{char}'", index)
+            if isinstance(top[0], dict) and top[1] in ("colon", "value"):
+                top[0][top[2]] = None
+            stack.pop()
+            index += 1
+            if not stack:
+                return top[0], index
+            _flow_add(stack[-1], top[0], index - 1)
+            continue
+        if char == ",":
+            container, state = top[0], top[1]
+            if isinstance(container, list):
+                if state != "sep":
+                    raise _OffsetError("unexpected ',' in flow sequence", index)
+                top[1] = "item"
+            else:
+                if state in ("colon", "value"):
+                    container[top[2]] = None
+                elif state != "sep":
+                    raise _OffsetError("unexpected ',' in flow mapping", index)
+                top[1] = "key"
+            index += 1
+            continue
+        if char == ":" and isinstance(top[0], dict) and top[1] == "colon":
+            top[1] = "value"
+            index += 1
+            continue
+        if char in "\"'":
+            value, end = _parse_quoted(text, index)
+        else:
+            if char in _UNSUPPORTED_INDICATORS:
+                raise _OffsetError(_UNSUPPORTED_INDICATORS[char], index)
+            end = _flow_plain_end(text, index)
+            raw = text[index:end].rstrip()
+            if not raw:
+                raise _OffsetError(f"unexpected {char!r} in flow collection", index)
+            value = resolve_plain(raw)
+        _flow_add(top, value, index)
+        index = end
+
+
+def _bracket_delta(text: str) -> int:
+    """Net ``[{`` minus ``]}`` outside quotes and comments (a cheap completeness probe)."""
+    depth = 0
+    quote: Optional[str] = None
+    previous = " "
+    # Quotes only open a scalar at the start of a flow token.
+    token_start = True
+    escaped = False
+    closed_single = False
+    for char in text:
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\" and quote == '"':
+                escaped = True
+            elif char == quote:
+                quote = None
+                closed_single = char == "'"
+                token_start = False
+                previous = char
+                continue
+        elif (char in "\"'" and token_start) or (char == "'" and closed_single):
+            # A doubled '' inside a single-quoted scalar reopens the quote.
+            quote = char
+        elif char == "#" and previous in " \t":
+            break
+        elif char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+        closed_single = False
+        if char not in " \t":
+            token_start = char in "[{,:"
+        previous = char
+    return depth
+
+
+def _find_colon(text: str) -> Optional[int]:
+    """Index of the ``key: value`` separator in a plain entry, if any."""
+    comment = _COMMENT_RE.search(text)
+    limit = comment.start() if comment else len(text)
+    index = text.find(":", 0, limit)
+    while index >= 0:
+        if index + 1 == len(text) or text[index + 1] in " \t":
+            return index
+        index = text.find(":", index + 1, limit)
+    return None
+
+
+def _is_mapping_entry(text: str) -> bool:
+    first = text[0]
+    if first in "[{":
+        return False
+    if first in "\"'":
+        try:
+            _value, end = _parse_quoted(text, 0)
+        except _OffsetError:
+            return False
+        rest = text[end:].lstrip(" \t")
+        return rest[:1] == ":" and (len(rest) == 1 or rest[1] in " \t")
+    return _find_colon(text) is not None
+
+
+_APPEND = object()
+_ROOT = object()
+_UNSET = object()
+
+
+class _Frame:
+    __slots__ = ("container", "indent")
+
+    def __init__(self, container, indent: int) -> None:
+        self.container = container
+        self.indent = indent
+
+
+class _FlowValue:
+    __slots__ = ("container", "key", "buffer", "segments", "depth")
+
+    def __init__(self, container, key, text: str, line: int, column: int) -> None:
+        self.container = container
+        self.key = key
+        self.buffer = text
+        self.segments = [(0, line, column)]
+        self.depth = _bracket_delta(text)
+
+
+class _BlockParser:
+    def __init__(self) -> None:
+        self.root = _UNSET
+        self.stack: List[_Frame] = []
+        # (container, key, indent of the owning entry) awaiting a nested block.
+        self.pending = None
+        self.flow: Optional[_FlowValue] = None
+        self.started = False
+        self.ended_at: Optional[int] = None
+
+    # -- assignment helpers -------------------------------------------------
+    def _assign(self, container, key, value) -> None:
+        if key is _ROOT:
+            self.root = value
+        elif key is _APPEND:
+            container.append(value)
+        else:
+            container[key] = value
+
+    def _scalar(self, container, key, text: str, line: int, column: int) -> None:
+        """Assign the scalar or flow value ``text`` (which starts at ``column``)."""
+        first = text[0]
+        if first in "[{":
+            self.flow = _FlowValue(container, key, text, line, column)
+            self._try_flow()
+            return
+        if first in "\"'":
+            try:
+                value, end = _parse_quoted(text, 0)
+            except _OffsetError as exc:
+                raise YAMLSyntaxError(exc.problem, line, column + exc.offset) from None
+            rest = text[end:]
+            if rest.strip() and not (rest[:1] in " \t" and rest.lstrip(" \t").startswith("#")):
+                raise YAMLSyntaxError("unexpected content after quoted scalar", line, column + end)
+            self._assign(container, key, value)
+            return
+        if first in _UNSUPPORTED_INDICATORS:
+            raise YAMLSyntaxError(_UNSUPPORTED_INDICATORS[first], line, column)
+        if first == "?" and text[1:2] in ("", " "):
+            raise YAMLSyntaxError("complex mapping keys are not supported", line, column)
+        comment = _COMMENT_RE.search(text)
+        plain = (text[: comment.start()] if comment else text).rstrip()
+        colon = _find_colon(plain)
+        if colon is not None:
+            raise YAMLSyntaxError("mapping values are not allowed here", line, column + colon)
+        self._assign(container, key, resolve_plain(plain))
+
+    # -- flow collections ---------------------------------------------------
+    def _locate(self, offset: int) -> Tuple[int, int]:
+        flow = self.flow
+        line, column = flow.segments[0][1], flow.segments[0][2]
+        base = 0
+        for segment_offset, segment_line, segment_column in flow.segments:
+            if segment_offset > offset:
+                break
+            base, line, column = segment_offset, segment_line, segment_column
+        return line, column + offset - base
+
+    def _try_flow(self) -> None:
+        flow = self.flow
+        if flow.depth > 0:
+            return
+        try:
+            value, end = _parse_flow(flow.buffer, 0)
+        except _Incomplete:
+            return
+        except _OffsetError as exc:
+            raise YAMLSyntaxError(exc.problem, *self._locate(exc.offset)) from None
+        rest = flow.buffer[end:]
+        if rest.strip() and not (rest[:1] in " \t" and rest.lstrip(" \t").startswith("#")):
+            raise YAMLSyntaxError("unexpected content after flow collection", *self._locate(end))
+        self.flow = None
+        self._assign(flow.container, flow.key, value)
+
+    def _continue_flow(self, line: int, raw: str) -> None:
+        flow = self.flow
+        flow.segments.append((len(flow.buffer) + 1, line, 1))
+        flow.buffer += "\n" + raw
+        flow.depth += _bracket_delta(raw)
+        self._try_flow()
+
+    # -- block structure ----------------------------------------------------
+    def feed(self, line: int, raw: str) -> None:
+        if self.flow is not None:
+            self._continue_flow(line, raw)
+            return
+        content = raw.lstrip(" ")
+        indent = len(raw) - len(content)
+        if not content.strip() or content.startswith("#"):
+            return
+        if content[0] == "\t":
+            raise YAMLSyntaxError("tabs are not allowed for indentation", line, indent + 1)
+        content = content.rstrip()
+        if self.ended_at is not None:
+            raise YAMLSyntaxError("content after the document end marker", line, indent + 1)
+        if indent == 0 and (content == "---" or content.startswith("--- ")):
+            if self.started or content[3:].strip():
+                raise YAMLSyntaxError("multiple or inline documents are not supported", line, 1)
+            return
+        if indent == 0 and content == "...":
+            self.ended_at = line
+            return
+        self.started = True
+        self._line(line, indent, content)
+
+    def _line(self, line: int, indent: int, content: str) -> None:
+        is_item = content == "-" or content.startswith("- ")
+
+        if self.pending is not None:
+            container, key, owner_indent = self.pending
+            self.pending = None
+            same_indent_sequence = (
+                indent == owner_indent and is_item and isinstance(container, dict)
+            )
+            if indent > owner_indent or same_indent_sequence:
+                if is_item or _is_mapping_entry(content):
+                    child = [] if is_item else {}
+                    self._assign(container, key, child)
+                    self.stack.append(_Frame(child, indent))
+                else:
+                    self._scalar(container, key, content, line, indent + 1)
+                    return
+            else:
+                self._assign(container, key, None)
+
+        if not self.stack:
+            if self.root is not _UNSET:
+                raise YAMLSyntaxError("unexpected content after the document root", line, indent + 1)
+            if is_item or _is_mapping_entry(content):
+                self.root = [] if is_item else {}
+                self.stack.append(_Frame(self.root, indent))
+            else:
+                self._scalar(None, _ROOT, content, line, indent + 1)
+                return
+        else:
+            while self.stack and self.stack[-1].indent > indent:
+                self.stack.pop()
+            if not self.stack or self.stack[-1].indent != indent:
+                raise YAMLSyntaxError("inconsistent indentation", line, indent + 1)
+            # A sequence that shares its parent key's indent ends at the next key.
+            if (
+                not is_item
+                and isinstance(self.stack[-1].container, list)
+                and len(self.stack) > 1
+                and self.stack[-2].indent == indent
+            ):
+                self.stack.pop()
+
+        self._entry(line, indent, content)
+
+    def _entry(self, line: int, indent: int, content: str) -> None:
+        while True:
+            frame = self.stack[-1]
+            if content == "-" or content.startswith("- "):
+                if not isinstance(frame.container, list):
+                    raise YAMLSyntaxError("expected a mapping key, found a sequence entry", line, indent + 1)
+                rest = content[1:].lstrip(" ")
+                item_indent = indent + len(content) - len(rest)
+                if not rest or rest.startswith("#"):
+                    frame.container.append(None)
+                    self.pending = (frame.container, len(frame.container) - 1, indent)
+                    return
+                nested_item = rest == "-" or rest.startswith("- ")
+                if nested_item or _is_mapping_entry(rest):
+                    child = [] if nested_item else {}
+                    frame.container.append(child)
+                    self.stack.append(_Frame(child, item_indent))
+                    indent, content = item_indent, rest
+                    continue
+                self._scalar(frame.container, _APPEND, rest, line, item_indent + 1)
+                return
+
+            if not isinstance(frame.container, dict):
+                raise YAMLSyntaxError("expected a sequence entry ('- ')", line, indent + 1)
+            key, value_text, value_column = self._split_entry(content, line, indent)
+            if not value_text or value_text.startswith("#"):
+                frame.container[key] = None
+                self.pending = (frame.container, key, indent)
+                return
+            self._scalar(frame.container, key, value_text, line, value_column)
+            return
+
+    def _split_entry(self, content: str, line: int, indent: int):
+        first = content[0]
+        if first in "\"'":
+            try:
+                key, end = _parse_quoted(content, 0)
+            except _OffsetError as exc:
+                raise YAMLSyntaxError(exc.problem, line, indent + 1 + exc.offset) from None
+            colon = end + len(content[end:]) - len(content[end:].lstrip(" \t"))
+            if content[colon : colon + 1] != ":":
+                raise YAMLSyntaxError("expected ':' after quoted key", line, indent + 1 + colon)
+        else:
+            if first in "[{":
+                raise YAMLSyntaxError("flow collections cannot be used as mapping keys", line, indent + 1)
+            if first == "?" and content[1:2] in ("", " "):
+                raise YAMLSyntaxError("complex mapping keys are not supported", line, indent + 1)
+            if first in _UNSUPPORTED_INDICATORS:
+                raise YAMLSyntaxError(_UNSUPPORTED_INDICATORS[first], line, indent + 1)
+            colon = _find_colon(content)
+            if colon is None:
+                raise YAMLSyntaxError("expected 'key: value'", line, indent + 1)
+            key = resolve_plain(content[:colon].rstrip())
+        remainder = content[colon + 1 :]
+        value_text = remainder.lstrip(" \t")
+        value_column = indent + 1 + colon + 1 + len(remainder) - len(value_text)
+        return key, value_text.rstrip(), value_column
+
+    def finish(self):
+        if self.flow is not None:
+            start_line, start_column = self.flow.segments[0][1], self.flow.segments[0][2]
+            raise YAMLSyntaxError("unterminated flow collection", start_line, start_column)
+        if self.pending is not None:
+            container, key, _indent = self.pending
+            self._assign(container, key, None)
+        return None if self.root is _UNSET else self.root
+
+
+def parse_simple_yaml(text: str):
+    """Parse ``text`` (see the module docstring for the supported subset)."""
+    parser = _BlockParser()
+    for line, raw in enumerate(io.StringIO(text), start=1):
+        parser.feed(line, raw.rstrip("\r\n"))
+    return parser.finish()
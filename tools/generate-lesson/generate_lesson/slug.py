@@ -0,0 +1,146 @@
+"""``generate-lesson slug``: print the generated-output slug of lesson manifests.
+
+Build tooling resolves slugs for every ``make`` invocation, so this command
+must start quickly. The ``metadata`` block of a plain manifest is read with a
+line scanner that imports neither PyYAML nor the generator. Manifests that use
+anything the scanner does not understand (flow mappings, anchors, escapes,
+continuation lines) fall back to a full parse.
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence
+
+SLUG_KEYS = ("org", "course", "lesson")
+
+_ENTRY_RE = re.compile(r"([A-Za-z_][\w-]*)[ \t]*:(?:[ \t]+(.*))?$")
+_COMMENT_RE = re.compile(r"[ \t]#")
+
+USAGE = "usage: generate-lesson slug <manifest> [<manifest> ...]"
+
+
+def slugify_component(value: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", value.lower().strip())
+    slug = re.sub(r"-+", "-", slug).strip("-")
+    return slug or "lesson"
+
+
+def derive_lesson_slug(metadata: Mapping[str, object]) -> str:
+    parts = (slugify_component(str(metadata[key])) for key in SLUG_KEYS)
+    return "-".join(part for part in parts if part)
+
+
+def _scan_value(raw: Optional[str]):
+    """Resolve a single-line scalar, or return ``None`` when a full parse is needed."""
+    if not raw:
+        return None
+    first = raw[0]
+    if first in "\"'":
+        end = raw.find(first, 1)
+        if end < 0 or (first == '"' and "\\" in raw[:end]) or raw[end + 1 : end + 2] == first:
+            return None
+        rest = raw[end + 1 :].strip()
+        if rest and not rest.startswith("#"):
+            return None
+        return raw[1:end]
+    if first in "[{&*!|>%@`?-":
+        return None
+    comment = _COMMENT_RE.search(raw)
+    value = (raw[: comment.start()] if comment else raw).rstrip()
+    if ": " in value or value.endswith(":"):
+        return None
+    from .simple_yaml import resolve_plain
+
+    return resolve_plain(value)
+
+
+def scan_metadata(text: str) -> Optional[Dict[str, object]]:
+    """Read the slug keys from a block ``metadata:`` mapping without a YAML parser."""
+    found: Dict[str, object] = {}
+    in_metadata = False
+    child_indent: Optional[int] = None
+    last_key: Optional[str] = None
+    for line in text.splitlines():
+        stripped = line.lstrip(" ")
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped[0] == "\t":
+            return None
+        indent = len(line) - len(stripped)
+        if indent == 0:
+            match = _ENTRY_RE.match(stripped.rstrip())
+            if match is None:
+                if stripped.rstrip() in ("---", "..."):
+                    continue
+                return None
+            if match.group(1) != "metadata":
+                in_metadata = False
+                continue
+            if match.group(2) and not match.group(2).startswith("#"):
+                return None
+            in_metadata, child_indent, last_key = True, None, None
+            found = {}
+            continue
+        if not in_metadata:
+            continue
+        if child_indent is None:
+            child_indent = indent
+        if indent > child_indent:
+            if last_key in SLUG_KEYS:
+                return None
+            continue
+        if indent < child_indent:
+            return None
+        match = _ENTRY_RE.match(stripped.rstrip())
+        if match is None:
+            return None
+        last_key = match.group(1)
+        if last_key in SLUG_KEYS:
+            value = _scan_value(match.group(2))
+            if value is None:
+                return None
+            found[last_key] = value
+    if all(key in found for key in SLUG_KEYS):
+        return found
+    return None
+
+
+def _parse_metadata(text: str) -> Mapping[str, object]:
+    from .yamlio import load_yaml_text
+
+    document = load_yaml_text(text)
+    metadata = document.get("metadata") if isinstance(document, Mapping) else None
+    if not isinstance(metadata, Mapping):
+        raise ValueError("manifest has no metadata mapping")
+    return metadata
+
+
+def manifest_slug(path: Path) -> str:
+    text = path.read_text(encoding="utf-8")
+    metadata = scan_metadata(text)
+    if metadata is None:
+        metadata = _parse_metadata(text)
+    missing = [key for key in SLUG_KEYS if not str(metadata.get(key) or "").strip()]
+    if missing:
+        raise ValueError(f"metadata is missing {', '.join(missing)}")
+    return derive_lesson_slug(metadata)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args: List[str] = list(sys.argv[1:] if argv is None else argv)
+    if not args or args[0] in ("-h", "--help"):
+        print(USAGE, file=sys.stdout if args else sys.stderr)
+        return 0 if args else 2
+    exit_code = 0
+    for arg in args:
+        try:
+            print(manifest_slug(Path(arg)))
+        except Exception as exc:  # report every manifest, including YAML errors
+            print(f"[error] {arg}: {exc}", file=sys.stderr)
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+"""``generate-lesson watch``: regenerate lessons as their inputs change.
+
+A single long-running process keeps the service catalog, parse caches and
+generation cache warm, so an edit costs one incremental regeneration instead
+of a cold start. Changes are mapped back to the lessons they affect:
+
+- a manifest under the watched manifest directory regenerates that lesson
+- a file under ``services/<name>/`` rescans that service and regenerates the
+  lessons whose ``spec.services`` reference it
+- ``catalog/services.json`` is reloaded and every lesson that requests a
+  service is regenerated
+- a schema under ``schemas/`` re-runs the load, schema and structure stages
+  of ``generate-lesson check`` for every manifest; the generator never reads
+  schemas, so nothing is regenerated
+
+Changes are picked up with inotify on Linux and by polling file stats
+elsewhere (or with ``--watcher poll``).
+"""
+
+import argparse
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from . import cli
+from .cache import flush_parse_caches
+from .catalog import clear_service_catalogs
+from .deps import flush_dependency_indexes
+from .materialize import LINK_MODES
+from .pipeline import CheckResult, lint_manifest, schema_validator
+
+WATCHERS = ("auto", "inotify", "poll")
+
+DEFAULT_POLL_INTERVAL = 0.1
+# Editors save in bursts (write temp file, rename, chmod); coalesce them.
+DEBOUNCE_SECONDS = 0.02
+
+# Temp siblings of generate_lesson.emit and .materialize, plus editor swap,
+# backup and lock files. Other dotfiles (``.env.example``) are real inputs.
+_NOISE_SUFFIXES = (".swp", ".swx", ".swo", ".tmp", "~")
+_NOISE_PREFIXES = (".#",)
+
+# linux/inotify.h
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+)
+_EVENT = struct.Struct("iIII")
+
+
+def _is_noise(path: Path) -> bool:
+    name = path.name
+    return (
+        name.endswith(_NOISE_SUFFIXES)
+        or name.startswith(_NOISE_PREFIXES)
+        or (name.startswith("#") and name.endswith("#"))
+        or name == "4913"
+    )
+
+
+class PollingWatcher:
+    """Detects changes by comparing ``(mtime, size)`` snapshots of every file."""
+
+    name = "polling"
+
+    def __init__(self, roots: Sequence[Path], interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.roots = tuple(roots)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot: Dict[Path, Tuple[int, int]] = {}
+        for root in self.roots:
+            for dirpath, _dirnames, filenames in os.walk(root):
+                for filename in filenames:
+                    path = Path(dirpath) / filename
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        snapshot = self._scan()
+        previous, self._snapshot = self._snapshot, snapshot
+        changed = {path for path, state in snapshot.items() if previous.get(path) != state}
+        changed.update(path for path in previous if path not in snapshot)
+        return changed
+
+    def close(self) -> None:
+        return None
+
+
+class InotifyWatcher:
+    """Recursive inotify watcher driven through ``ctypes`` (Linux only)."""
+
+    name = "inotify"
+
+    def __init__(self, roots: Sequence[Path]) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify requires Linux")
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "libc does not provide inotify")
+        self._ctypes = ctypes
+        self._libc = libc
+        self.roots = tuple(roots)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            self._raise_errno()
+        self._paths: Dict[int, Path] = {}
+        try:
+            for root in self.roots:
+                self._add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _raise_errno(self) -> None:
+        code = self._ctypes.get_errno()
+        raise OSError(code, os.strerror(code))
+
+    def _add_tree(self, root: Path) -> None:
+        if not root.is_dir():
+            return
+        self._add_watch(root)
+        for dirpath, dirnames, _filenames in os.walk(root):
+            for dirname in dirnames:
+                self._add_watch(Path(dirpath) / dirname)
+
+    def _add_watch(self, path: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            if self._ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR):
+                return  # removed before we got to it
+            self._raise_errno()
+        self._paths[wd] = path
+
+    def _decode(self, data: bytes, changed: Set[Path]) -> None:
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                changed.update(self.roots)
+                continue
+            base = self._paths.get(wd)
+            if base is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self._paths[wd]
+                continue
+            path = base / os.fsdecode(name) if name else base
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                self._add_tree(path)
+            changed.add(path)
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        ready, _writable, _errored = select.select([self._fd], [], [], timeout)
+        changed: Set[Path] = set()
+        if not ready:
+            return changed
+        while True:
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            self._decode(data, changed)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def open_watcher(roots: Sequence[Path], kind: str = "auto", interval: float = DEFAULT_POLL_INTERVAL):
+    if kind not in WATCHERS:
+        raise ValueError(f"watcher must be one of {', '.join(WATCHERS)}; got {kind!r}")
+    if kind != "poll":
+        try:
+            return InotifyWatcher(roots)
+        except OSError as exc:
+            if kind == "inotify":
+                raise
+            print(f"[warn] inotify unavailable ({exc}); falling back to polling", file=sys.stderr)
+    return PollingWatcher(roots, interval)
+
+
+def _relative_parts(path: Path, base: Path) -> Optional[Tuple[str, ...]]:
+    try:
+        return path.relative_to(base).parts
+    except ValueError:
+        return None
+
+
+class WatchSession:
+    """Tracks which services each lesson uses and regenerates affected lessons."""
+
+    def __init__(self, manifest_dir: Path, options: cli.GenerateOptions = cli.GenerateOptions()) -> None:
+        self.root = cli.ROOT
+        self.manifest_dir = manifest_dir.resolve()
+        self.services_dir = self.root / "services"
+        self.catalog_dir = self.root / "catalog"
+        self.schemas_dir = self.root / "schemas"
+        self.options = options
+        # Manifest path -> service names it requests.
+        self.lessons: Dict[Path, FrozenSet[str]] = {}
+
+    @property
+    def roots(self) -> Tuple[Path, ...]:
+        candidates = (self.manifest_dir, self.services_dir, self.catalog_dir, self.schemas_dir)
+        return tuple(path for path in candidates if path.is_dir())
+
+    def affected(self, changed: Iterable[Path]) -> List[Path]:
+        """Refresh catalog state for ``changed`` paths and return the manifests to regenerate."""
+        manifests: Set[Path] = set()
+        services: Set[str] = set()
+        catalog_changed = False
+        everything = False
+        for path in changed:
+            if _is_noise(path):
+                continue
+            if path in (self.services_dir, self.manifest_dir, self.catalog_dir):
+                # The watcher lost track (queue overflow or a root was replaced).
+                clear_service_catalogs()
+                everything = True
+                continue
+            manifest_parts = _relative_parts(path, self.manifest_dir)
+            if manifest_parts is not None:
+                if path.suffix in {".yaml", ".yml"}:
+                    manifests.add(path)
+                continue
+            service_parts = _relative_parts(path, self.services_dir)
+            if service_parts:
+                services.add(service_parts[0])
+                continue
+            if _relative_parts(path, self.catalog_dir) == ("services.json",):
+                catalog_changed = True
+
+        catalog = cli.service_catalog()
+        for name in sorted(services):
+            catalog.refresh(name)
+        if catalog_changed:
+            catalog.refresh_metadata()
+            manifests.update(path for path, used in self.lessons.items() if used)
+        if everything:
+            manifests.update(cli.discover_manifests(str(self.manifest_dir)))
+            manifests.update(self.lessons)
+        manifests.update(path for path, used in self.lessons.items() if used & services)
+        return sorted(manifests)
+
+    def schemas_changed(self, changed: Iterable[Path]) -> bool:
+        return any(
+            _relative_parts(path, self.schemas_dir) is not None for path in changed if not _is_noise(path)
+        )
+
+    def validate(self, manifest_paths: Sequence[Path]) -> List[CheckResult]:
+        """Re-check ``manifest_paths`` against the current schema without regenerating them."""
+        try:
+            validator = schema_validator(self.root)
+        except Exception as exc:
+            print(f"[error] lesson schema is invalid: {type(exc).__name__}: {exc}", file=sys.stderr)
+            return []
+        if isinstance(validator, str):
+            print(f"[warn] schema changed but cannot be checked: {validator}", file=sys.stderr)
+            return []
+        results = []
+        for path in manifest_paths:
+            result, _manifest = lint_manifest(path, validator)
+            results.append(result)
+            label = result.slug or path.name
+            errors = [error for outcome in result.stages.values() for error in outcome.get("errors", ())]
+            if errors:
+                print(f"[error] {label} fails validation: {'; '.join(errors)}", file=sys.stderr)
+            else:
+                print(f"[ok] {label} validated")
+        sys.stdout.flush()
+        flush_parse_caches()
+        return results
+
+    def regenerate(self, manifest_paths: Sequence[Path]) -> List[cli.ManifestResult]:
+        results = []
+        for path in manifest_paths:
+            if not path.exists():
+                if self.lessons.pop(path, None) is not None:
+                    print(f"[watch] {path} removed; keeping its generated output")
+                continue
+            manifest, slug = cli._load_batch_entry(path)
+            spec = manifest.get("spec") if isinstance(manifest, dict) else None
+            services = spec.get("services") if isinstance(spec, dict) else None
+            self.lessons[path] = frozenset(cli.requested_service_names(services))
+            result = cli._run_captured(path, manifest, slug, self.options)
+            cli.record_generated_lessons([(str(path), manifest, slug)])
+            results.append(result)
+            status = "ok" if result.exit_code == 0 else "error"
+            label = result.slug or path.name
+            print(f"[{status}] {label} regenerated in {result.duration * 1000:.1f} ms")
+            sys.stdout.flush()
+            sys.stderr.write(result.stderr)
+            sys.stderr.flush()
+        flush_parse_caches()
+        flush_dependency_indexes()
+        return results
+
+    def run(self, watcher, max_batches: Optional[int] = None) -> int:
+        started = time.perf_counter()
+        self.regenerate(cli.discover_manifests(str(self.manifest_dir)))
+        print(
+            f"[watch] {len(self.lessons)} lessons ready in {time.perf_counter() - started:.2f}s;"
+            f" watching {', '.join(str(root) for root in self.roots)} ({watcher.name})"
+        )
+        batches = 0
+        try:
+            while max_batches is None or batches < max_batches:
+                changed = watcher.poll(None)
+                if not changed:
+                    continue
+                changed |= watcher.poll(DEBOUNCE_SECONDS)
+                targets = self.affected(changed)
+                revalidate = self.schemas_changed(changed)
+                if targets:
+                    self.regenerate(targets)
+                if revalidate:
+                    self.validate(cli.discover_manifests(str(self.manifest_dir)))
+                if targets or revalidate:
+                    batches += 1
+        except KeyboardInterrupt:
+            print("[watch] stopped")
+        finally:
+            watcher.close()
+            flush_parse_caches()
+        return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="generate-lesson watch")
+    parser.add_argument(
+        "--manifests",
+        default=str(cli.ROOT / "examples" / "lesson-manifests"),
+        help="Directory of lesson manifests to keep generated.",
+    )
+    parser.add_argument(
+        "--watcher",
+        choices=WATCHERS,
+        default="auto",
+        help="Change notification mechanism (default: inotify, falling back to polling).",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="Seconds between scans when polling (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="auto",
+        help="How service fragments are materialized into lessons (default: auto).",
+    )
+    args = parser.parse_args(argv)
+
+    manifest_dir = Path(args.manifests)
+    if not manifest_dir.is_dir():
+        print(f"[error] manifest directory not found: {manifest_dir}", file=sys.stderr)
+        return 1
+    session = WatchSession(manifest_dir, cli.GenerateOptions(link_mode=args.link_mode))
+    try:
+        watcher = open_watcher(session.roots, args.watcher, args.poll_interval)
+    except OSError as exc:
+        print(f"[error] cannot watch for changes: {exc}", file=sys.stderr)
+        return 1
+    return session.run(watcher)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
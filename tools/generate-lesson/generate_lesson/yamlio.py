@@ -0,0 +1,109 @@
+"""YAML loading backends for the lesson generator.
+
+Documents are parsed with the fastest backend available, in order:
+
+- ``libyaml``: PyYAML's C ``CSafeLoader`` (PyYAML built against libyaml)
+- ``pyyaml``: PyYAML's pure-Python ``SafeLoader``
+- ``simple``: :func:`~generate_lesson.simple_yaml.parse_simple_yaml`, a
+  dependency-free parser for the subset of YAML used by lesson manifests
+
+Set ``GENERATE_LESSON_YAML_BACKEND`` (or pass ``--yaml-backend``) to pin a
+backend, e.g. when comparing results or benchmarking.
+
+PyYAML is imported on first use, so commands that never parse YAML (``--help``,
+``slug`` on a plain manifest) do not pay for it.
+"""
+
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+from .simple_yaml import PARSER_VERSION as SIMPLE_PARSER_VERSION
+from .simple_yaml import YAMLSyntaxError, parse_simple_yaml  # noqa: F401 - re-exported
+
+YAML_BACKENDS = ("libyaml", "pyyaml", "simple")
+
+_UNLOADED = object()
+_yaml = _UNLOADED
+
+
+def pyyaml():
+    """Return the PyYAML module, or ``None`` when it is not installed."""
+    global _yaml
+    if _yaml is _UNLOADED:
+        try:
+            import yaml  # type: ignore
+        except ModuleNotFoundError:  # pragma: no cover - fallback when PyYAML is unavailable
+            yaml = None
+        _yaml = yaml
+    return _yaml
+
+
+def _pyyaml_loader(loader_class) -> Callable[[str], object]:
+    def load(text: str):
+        return pyyaml().load(text, Loader=loader_class)
+
+    return load
+
+
+def available_yaml_backends() -> Tuple[str, ...]:
+    available = []
+    yaml = pyyaml()
+    if yaml is not None:
+        if getattr(yaml, "__with_libyaml__", False) and hasattr(yaml, "CSafeLoader"):
+            available.append("libyaml")
+        available.append("pyyaml")
+    available.append("simple")
+    return tuple(available)
+
+
+def _loaders() -> Dict[str, Callable[[str], object]]:
+    loaders: Dict[str, Callable[[str], object]] = {"simple": parse_simple_yaml}
+    yaml = pyyaml()
+    if yaml is not None:
+        loaders["pyyaml"] = _pyyaml_loader(yaml.SafeLoader)
+        if "libyaml" in available_yaml_backends():
+            loaders["libyaml"] = _pyyaml_loader(yaml.CSafeLoader)
+    return loaders
+
+
+def yaml_loader(backend: str) -> Callable[[str], object]:
+    loaders = _loaders()
+    if backend not in loaders:
+        raise ValueError(
+            f"YAML backend {backend!r} is unavailable; choose from {', '.join(available_yaml_backends())}"
+        )
+    return loaders[backend]
+
+
+_backend: Optional[str] = None
+_loader: Optional[Callable[[str], object]] = None
+
+
+def set_yaml_backend(backend: Optional[str]) -> str:
+    """Select ``backend`` (or the fastest available one when ``None``/``"auto"``)."""
+    global _backend, _loader
+    if not backend or backend == "auto":
+        backend = available_yaml_backends()[0]
+    _loader = yaml_loader(backend)
+    _backend = backend
+    return backend
+
+
+def yaml_backend() -> str:
+    if _backend is None:
+        set_yaml_backend(os.environ.get("GENERATE_LESSON_YAML_BACKEND"))
+    return _backend
+
+
+def yaml_namespace() -> str:
+    """Identity of the active parser, used to key persistent parse caches."""
+    backend = yaml_backend()
+    if backend == "simple":
+        return f"simple-{SIMPLE_PARSER_VERSION}"
+    return f"{backend}-{pyyaml().__version__}"
+
+
+def load_yaml_text(text: str):
+    if _loader is None:
+        yaml_backend()
+    return _loader(text)
@@ -0,0 +1,102 @@
+import io
+import sys
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import generate_lesson
+from generate_lesson import catalog, cli, deps
+
+MANIFEST = {
+    "metadata": {"org": "acme", "course": "math", "lesson": "algebra"},
+    "spec": {
+        "base_preset": "full",
+        "image_tag_strategy": "ubuntu-24.04",
+        "services": [{"name": "redis", "vars": {"REDIS_PASSWORD": "classroom"}}, "ghost"],
+        "secrets_placeholders": ["API_TOKEN"],
+    },
+}
+PRESET = "images/presets/generated/acme-math-algebra"
+TEMPLATE = "templates/generated/acme-math-algebra"
+
+
+class RenderTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name).resolve()
+        self.repo_root = self.tmp / "repo"
+        service_dir = self.repo_root / "services" / "redis"
+        service_dir.mkdir(parents=True)
+        (service_dir / "docker-compose.redis.yml").write_text(
+            "services:\n  redis:\n    image: redis:7\n", encoding="utf-8"
+        )
+        (service_dir / ".env.example").write_text("REDIS_PASSWORD=\n", encoding="utf-8")
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.addCleanup(deps._INDEXES.clear)
+
+    def test_render_returns_artifacts_without_writing(self):
+        bundle = generate_lesson.render(MANIFEST)
+
+        self.assertEqual(bundle.slug, "acme-math-algebra")
+        self.assertIn(f"{PRESET}/services/redis/docker-compose.redis.yml", bundle)
+        self.assertIn(f"{PRESET}/.env.example-redis", bundle)
+        self.assertIn(f"{TEMPLATE}/stack.lock.json", bundle)
+        self.assertEqual(bundle[f"{TEMPLATE}/stack.lock.json"], bundle[f"{PRESET}/stack.lock.json"])
+        self.assertIn('REDIS_PASSWORD: "classroom"', bundle.text(f"{PRESET}/docker-compose.classroom.yml"))
+        self.assertEqual(list(bundle.paths()), sorted(bundle.paths()))
+        self.assertEqual(
+            [record["code"] for record in bundle.diagnostics if record["severity"] == "warn"],
+            ["service-missing"],
+        )
+        self.assertFalse((self.repo_root / "images").exists())
+        self.assertFalse((self.repo_root / "templates").exists())
+        self.assertEqual(MANIFEST["spec"]["services"][1], "ghost")
+
+    def test_sinks_write_the_same_files(self):
+        bundle = generate_lesson.render(MANIFEST)
+        expected = {artifact.path: artifact.data for artifact in bundle}
+
+        with generate_lesson.DirectorySink(self.tmp / "out") as sink:
+            bundle.write(sink)
+        self.assertEqual(sink.written, len(bundle))
+        self.assertTrue((self.tmp / "out" / PRESET / "services").is_dir())
+        with generate_lesson.DirectorySink(self.tmp / "out") as sink:
+            bundle.write(sink)
+        self.assertEqual(sink.written, 0)
+
+        stream = io.BytesIO()
+        with generate_lesson.TarSink(stream) as sink:
+            bundle.write(sink)
+        stream.seek(0)
+        with tarfile.open(fileobj=stream) as archive:
+            files = {member.name: archive.extractfile(member).read() for member in archive if member.isfile()}
+        self.assertEqual(files, expected)
+
+        stream = io.BytesIO()
+        with generate_lesson.ZipSink(stream) as sink:
+            bundle.write(sink)
+        with zipfile.ZipFile(stream) as archive:
+            files = {name: archive.read(name) for name in archive.namelist() if not name.endswith("/")}
+        self.assertEqual(files, expected)
+
+    def test_invalid_manifest_raises_with_diagnostics(self):
+        with self.assertRaises(generate_lesson.RenderError) as caught:
+            generate_lesson.render({"metadata": {"org": "acme"}, "spec": {}})
+        self.assertIn(
+            "manifest.metadata.course is required",
+            [record["message"] for record in caught.exception.diagnostics],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import cache, cli
+
+
+class ParseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+        self.source = self.root / "manifest.yaml"
+        self.source.write_text("metadata:\n  org: acme\n", encoding="utf-8")
+        self.calls = []
+
+    def parse(self, text):
+        self.calls.append(text)
+        return cli.parse_simple_yaml(text)
+
+    def test_parses_are_reused_across_instances(self):
+        first = cache.ParseCache(self.root / "cache", "test")
+        self.assertEqual(first.load(self.source, self.parse), {"metadata": {"org": "acme"}})
+        first.flush()
+
+        second = cache.ParseCache(self.root / "cache", "test")
+        self.assertEqual(second.load(self.source, self.parse), {"metadata": {"org": "acme"}})
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(second.hits, 1)
+
+        other_namespace = cache.ParseCache(self.root / "cache", "other")
+        other_namespace.load(self.source, self.parse)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_content_changes_are_reparsed(self):
+        parse_cache = cache.ParseCache(self.root / "cache", "test")
+        parse_cache.load(self.source, self.parse)
+        self.source.write_text("metadata:\n  org: globex\n", encoding="utf-8")
+        os.utime(self.source, ns=(1, 1))
+        self.assertEqual(parse_cache.load(self.source, self.parse)["metadata"]["org"], "globex")
+        self.assertEqual(len(self.calls), 2)
+
+    def test_flush_evicts_least_recently_used_objects(self):
+        parse_cache = cache.ParseCache(self.root / "cache", "test", max_bytes=1)
+        for index in range(3):
+            path = self.root / f"doc-{index}.yaml"
+            path.write_text(f"value: {index}\n", encoding="utf-8")
+            parse_cache.load(path, self.parse)
+        parse_cache.flush()
+        remaining = list((self.root / "cache" / "objects").iterdir())
+        self.assertLessEqual(len(remaining), 1)
+
+
+class LessonCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+        self.output_dir = self.root / "generated" / "lesson"
+        self.output_dir.mkdir(parents=True)
+        self.output = self.output_dir / "compose.yaml"
+        self.output.write_text("ports:\n  - 8080\n", encoding="utf-8")
+        # Pin an old mtime so a rewrite is distinguishable even on coarse-timestamp filesystems.
+        os.utime(self.output, ns=(10**9, 10**9))
+        self.lesson_cache = cache.LessonCache(self.root / "cache")
+        self.lesson_cache.store("lesson", "key", self.root, [self.output_dir])
+
+    def test_unchanged_outputs_are_fresh(self):
+        self.assertTrue(self.lesson_cache.is_fresh("lesson", "key", self.root))
+        self.assertFalse(self.lesson_cache.is_fresh("lesson", "other-key", self.root))
+
+    def test_same_size_edits_are_stale(self):
+        self.output.write_text("ports:\n  - 8081\n", encoding="utf-8")
+        self.assertFalse(self.lesson_cache.is_fresh("lesson", "key", self.root))
+
+    def test_missing_outputs_are_stale(self):
+        self.output.unlink()
+        self.assertFalse(self.lesson_cache.is_fresh("lesson", "key", self.root))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli
+
+
+class ServiceCatalogTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+        redis_dir = self.root / "services" / "redis"
+        (redis_dir / "conf").mkdir(parents=True)
+        (redis_dir / "docker-compose.redis.yml").write_text(
+            "services:\n  redis:\n    image: redis:7\n", encoding="utf-8"
+        )
+        (redis_dir / ".env.example").write_text("REDIS_PASSWORD=\n", encoding="utf-8")
+        (redis_dir / "conf" / "redis.conf").write_text("save 60 1\n", encoding="utf-8")
+        (self.root / "catalog").mkdir()
+        (self.root / "catalog" / "services.json").write_text(
+            json.dumps({"services": [{"id": "redis", "label": "Redis", "ports": [6379]}]}),
+            encoding="utf-8",
+        )
+
+    def test_scan_indexes_files_fragments_and_metadata(self):
+        index = catalog.ServiceCatalog.scan(self.root, cli.load_yaml_document)
+        entry = index.get("redis")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.files, ("conf/redis.conf", "docker-compose.redis.yml"))
+        self.assertEqual(entry.fragments, ("docker-compose.redis.yml",))
+        self.assertEqual(entry.env_example, self.root / "services" / "redis" / ".env.example")
+        self.assertEqual(index.metadata("redis")["ports"], [6379])
+        self.assertNotIn("kafka", index)
+
+    def test_compose_documents_are_parsed_once(self):
+        calls = []
+
+        def loader(path):
+            calls.append(path)
+            return cli.load_yaml_document(path)
+
+        index = catalog.ServiceCatalog.scan(self.root, loader)
+        for _ in range(3):
+            self.assertEqual(
+                index.image_reference("redis", "docker-compose.redis.yml", "redis"), "redis:7"
+            )
+        self.assertIsNone(index.image_reference("redis", "docker-compose.missing.yml", "redis"))
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
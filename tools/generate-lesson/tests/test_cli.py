@@ -1,16 +1,17 @@
 import io
 import json
+import shutil
 import sys
 import tempfile
 import textwrap
 import unittest
 from pathlib import Path
 
-from contextlib import redirect_stderr
+from contextlib import redirect_stderr, redirect_stdout
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from generate_lesson import cli
+from generate_lesson import catalog, cli
 
 
 class CLITests(unittest.TestCase):
@@ -291,6 +292,115 @@ class CLITests(unittest.TestCase):
                 readme_content,
             )
 
+    def test_generation_cache_skips_unchanged_lessons(self):
+        manifest_text = textwrap.dedent(
+            """
+            metadata:
+              org: acme
+              course: math
+              lesson: algebra
+            spec:
+              base_preset: full
+              image_tag_strategy: ubuntu-24.04
+              services:
+                - name: redis
+            """
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            repo_root = Path(tmp) / "repo"
+            services_dir = repo_root / "services" / "redis"
+            services_dir.mkdir(parents=True)
+            compose_path = services_dir / "docker-compose.redis.yml"
+            compose_path.write_text("services:\n  redis:\n    image: redis:7\n", encoding="utf-8")
+            manifest_path = repo_root / "manifest.yaml"
+            manifest_path.write_text(manifest_text, encoding="utf-8")
+            slug_dir = repo_root / "images" / "presets" / "generated" / "acme-math-algebra"
+
+            original_root = cli.ROOT
+            cli.ROOT = repo_root
+            try:
+                with redirect_stdout(io.StringIO()):
+                    self.assertEqual(cli.main(["--manifest", str(manifest_path)]), 0)
+                dockerfile_mtime = (slug_dir / "Dockerfile").stat().st_mtime_ns
+                lock_mtime = (slug_dir / "stack.lock.json").stat().st_mtime_ns
+
+                buffer = io.StringIO()
+                with redirect_stdout(buffer):
+                    self.assertEqual(cli.main(["--manifest", str(manifest_path)]), 0)
+                self.assertIn("generation cache hit", buffer.getvalue())
+
+                compose_path.write_text("services:\n  redis:\n    image: redis:8\n", encoding="utf-8")
+                catalog.clear_service_catalogs()
+                buffer = io.StringIO()
+                with redirect_stdout(buffer):
+                    self.assertEqual(cli.main(["--manifest", str(manifest_path)]), 0)
+            finally:
+                cli.ROOT = original_root
+
+            self.assertNotIn("generation cache hit", buffer.getvalue())
+            self.assertEqual((slug_dir / "Dockerfile").stat().st_mtime_ns, dockerfile_mtime)
+            self.assertNotEqual((slug_dir / "stack.lock.json").stat().st_mtime_ns, lock_mtime)
+            lock = json.loads((slug_dir / "stack.lock.json").read_text(encoding="utf-8"))
+            self.assertEqual(lock["images"]["redis:redis"]["tag"], "8")
+
+    def test_batch_mode_matches_sequential_output(self):
+        def snapshot(directory: Path) -> dict:
+            return {
+                str(path.relative_to(directory)): path.read_bytes()
+                for path in sorted(directory.rglob("*"))
+                if path.is_file()
+            }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            repo_root = Path(tmp) / "repo"
+            services_dir = repo_root / "services" / "redis"
+            services_dir.mkdir(parents=True)
+            (services_dir / "docker-compose.redis.yml").write_text(
+                "services:\n  redis:\n    image: redis:7\n", encoding="utf-8"
+            )
+            manifests_dir = repo_root / "manifests"
+            manifests_dir.mkdir()
+            for lesson in ("algebra", "geometry", "calculus"):
+                (manifests_dir / f"{lesson}.yaml").write_text(
+                    textwrap.dedent(
+                        f"""
+                        metadata:
+                          org: acme
+                          course: math
+                          lesson: {lesson}
+                        spec:
+                          base_preset: full
+                          image_tag_strategy: ubuntu-24.04
+                          services:
+                            - name: redis
+                        """
+                    ),
+                    encoding="utf-8",
+                )
+
+            original_root = cli.ROOT
+            cli.ROOT = repo_root
+            try:
+                with redirect_stdout(io.StringIO()):
+                    for manifest_path in sorted(manifests_dir.glob("*.yaml")):
+                        self.assertEqual(cli.main(["--manifest", str(manifest_path)]), 0)
+                sequential = snapshot(repo_root / "images") | snapshot(repo_root / "templates")
+                shutil.rmtree(repo_root / "images")
+                shutil.rmtree(repo_root / "templates")
+
+                buffer = io.StringIO()
+                with redirect_stdout(buffer):
+                    exit_code = cli.main(["--manifests", str(manifests_dir), "--jobs", "2"])
+                batched = snapshot(repo_root / "images") | snapshot(repo_root / "templates")
+            finally:
+                cli.ROOT = original_root
+
+            self.assertEqual(exit_code, 0)
+            self.assertEqual(batched, sequential)
+            output = buffer.getvalue()
+            self.assertIn("acme-math-geometry", output)
+            self.assertIn("[ok] Generated 3 manifests", output)
+
 
 if __name__ == "__main__":
     unittest.main()
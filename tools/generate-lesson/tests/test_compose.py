@@ -0,0 +1,146 @@
+import io
+import sys
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, compose, deps, registry
+from generate_lesson.simple_yaml import parse_simple_yaml
+
+BASE_FRAGMENT = textwrap.dedent(
+    """
+    services:
+      base:
+        image: example/app:1
+        command: ["serve", "--port", "8000"]
+        environment:
+          - MODE=dev
+          - LOG_LEVEL=info
+        ports: ["8000:8000"]
+        volumes:
+          - app-data:/data
+          - ./config:/etc/app
+        env_file: .env
+        healthcheck:
+          test: ["CMD", "true"]
+          interval: 10s
+      app:
+        extends:
+          service: base
+        command: ["serve", "--port", "9000"]
+        environment:
+          LOG_LEVEL: debug
+        ports: ["9000:9000"]
+        volumes:
+          - ./override:/etc/app
+      loop-a:
+        extends: loop-b
+      loop-b:
+        extends: loop-a
+    volumes:
+      app-data:
+        driver: local
+    """
+)
+
+
+class ComposeMergeTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo_root = Path(tmp.name).resolve() / "repo"
+        service_dir = self.repo_root / "services" / "demo"
+        service_dir.mkdir(parents=True)
+        (service_dir / "docker-compose.demo.yml").write_text(BASE_FRAGMENT, encoding="utf-8")
+        worker_dir = self.repo_root / "services" / "worker"
+        worker_dir.mkdir()
+        (worker_dir / "docker-compose.worker.yml").write_text(
+            textwrap.dedent(
+                """
+                services:
+                  worker:
+                    extends:
+                      file: ../demo/docker-compose.demo.yml
+                      service: base
+                    build:
+                      context: ../..
+                      dockerfile: services/worker/Dockerfile
+                """
+            ),
+            encoding="utf-8",
+        )
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.addCleanup(deps._INDEXES.clear)
+        self.catalog = cli.service_catalog()
+
+    def test_extends_merge_follows_compose_rules(self):
+        app = compose.resolve_service(self.catalog, "demo", "docker-compose.demo.yml", "app")
+        self.assertNotIn("extends", app)
+        self.assertEqual(app["image"], "example/app:1")
+        self.assertEqual(app["command"], ["serve", "--port", "9000"])
+        self.assertEqual(app["environment"], {"MODE": "dev", "LOG_LEVEL": "debug"})
+        self.assertEqual(app["ports"], ["8000:8000", "9000:9000"])
+        self.assertEqual(app["volumes"], ["app-data:/data", "./services/demo/override:/etc/app"])
+        self.assertEqual(app["env_file"], "./services/demo/.env")
+        self.assertEqual(app["healthcheck"], {"test": ["CMD", "true"], "interval": "10s"})
+
+    def test_cross_fragment_extends_rebases_each_level(self):
+        worker = compose.resolve_service(self.catalog, "worker", "docker-compose.worker.yml", "worker")
+        self.assertEqual(worker["build"], {"context": ".", "dockerfile": "services/worker/Dockerfile"})
+        self.assertIn("./services/demo/config:/etc/app", worker["volumes"])
+        self.assertEqual(worker["env_file"], "./services/demo/.env")
+
+    def test_extends_cycle_is_an_error(self):
+        with self.assertRaisesRegex(ValueError, "extends cycle"):
+            compose.resolve_service(self.catalog, "demo", "docker-compose.demo.yml", "loop-a")
+
+    def test_dump_yaml_round_trips(self):
+        document = {
+            "services": {
+                "app": {
+                    "environment": {"FLAG": "True", "ZIP": "08", "EMPTY": "", "on": "yes"},
+                    "ports": ["8000:8000"],
+                    "healthcheck": {"test": ["CMD", "true"], "retries": 5, "disable": False},
+                    "ulimits": {},
+                    "volumes": [{"type": "bind", "source": "./x", "target": "/x"}],
+                }
+            },
+            "volumes": {"app-data": None, "cache": {"driver": "local"}},
+        }
+        self.assertEqual(parse_simple_yaml(compose.dump_yaml(document)), document)
+
+    def test_aggregate_compose_is_flattened_with_vars_and_volumes(self):
+        out_dir = self.repo_root / "out"
+        artifacts = cli.ServiceArtifacts(("demo",), {}, {}, {"demo": {"LOG_LEVEL": "warn"}}, ())
+        record = registry.ServiceRecord(
+            "demo", (("docker-compose.demo.yml", "app"), ("docker-compose.demo.yml", "gone")), ("app-data",)
+        )
+        patcher = mock.patch.object(cli, "service_registry", return_value=registry.ServiceRegistry({"demo": record}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            path = cli.generate_aggregate_compose({"spec": {}}, out_dir, artifacts)
+        self.assertIn("does not define gone", stderr.getvalue())
+        document = parse_simple_yaml(path.read_text(encoding="utf-8"))
+        self.assertEqual(list(document["services"]), ["app"])
+        self.assertEqual(document["services"]["app"]["environment"]["LOG_LEVEL"], "warn")
+        self.assertEqual(document["volumes"], {"app-data": {"driver": "local"}})
+
+        path = cli.generate_aggregate_compose({"spec": {}}, out_dir, artifacts, compose_mode="extends")
+        self.assertIn("file: ./services/demo/docker-compose.demo.yml", path.read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+import io
+import json
+import sys
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, conflicts, deps
+from generate_lesson.simple_yaml import parse_simple_yaml
+
+FRAGMENTS = {
+    "alpha": """
+        services:
+          alpha:
+            image: example/alpha:1
+            container_name: lab
+            ports:
+              - "${ALPHA_PORT:-8000}:8000"
+            volumes:
+              - shared-data:/data
+    """,
+    "beta": """
+        services:
+          beta:
+            image: example/beta:1
+            container_name: lab
+            ports:
+              - "127.0.0.1:8000:80"
+              - target: 53
+                published: 8001
+                protocol: udp
+            volumes:
+              - shared-data:/var/lib/beta
+    """,
+}
+
+
+class PortBindingTests(unittest.TestCase):
+    def test_short_and_long_syntax(self):
+        bindings = conflicts.port_bindings(
+            {"ports": ["${WEB:-8080}:80", "9000", "127.0.0.1:5432:5432", "53:53/udp", {"target": 80, "published": 81}]}
+        )
+        self.assertEqual(
+            [(binding.host_port, binding.protocol, binding.index, binding.variable) for binding in bindings],
+            [(8080, "tcp", 0, "WEB"), (5432, "tcp", 2, None), (53, "udp", 3, None), (81, "tcp", 4, None)],
+        )
+
+    def test_remap_rewrites_entries_and_keeps_variables(self):
+        definition = {"ports": ["${WEB:-8080}:80", "127.0.0.1:8080:81/tcp", {"target": 82, "published": 8080}]}
+        remaps = [conflicts.PortRemap("web", "web", "tcp", 8080, 8081)]
+        conflicts.apply_port_remap("web", definition, remaps)
+        self.assertEqual(
+            definition["ports"],
+            ["${WEB:-8081}:80", "127.0.0.1:8081:81/tcp", {"target": 82, "published": 8081}],
+        )
+
+
+class ConflictIndexTests(unittest.TestCase):
+    def test_published_ports_error_and_labels_warn(self):
+        index = conflicts.build_lesson_index(
+            ("alpha", "beta", "gamma"),
+            [("alpha", "alpha", {"ports": ["3000:3000"]}), ("beta", "beta", {"ports": ["3000:80"]})],
+            {"alpha": {3000: "Alpha UI"}, "gamma": {9000: "Gamma UI"}},
+            {"beta": [9000]},
+        )
+        found = {(conflict.code, conflict.key, conflict.severity) for conflict in index.conflicts()}
+        self.assertEqual(found, {("port-conflict", "3000", "error"), ("port-conflict", "9000", "warn")})
+        self.assertEqual(index.remap_ports(), [conflicts.PortRemap("beta", "beta", "tcp", 3000, 3001)])
+
+    def test_remap_skips_claimed_ports(self):
+        index = conflicts.build_lesson_index(
+            ("alpha", "beta"),
+            [("alpha", "alpha", {"ports": ["3000:3000"]}), ("beta", "beta", {"ports": ["3000:3000"]})],
+            {},
+            {"alpha": [3001]},
+        )
+        self.assertEqual([remap.new_port for remap in index.remap_ports()], [3002])
+
+    def test_networks_with_different_settings_warn(self):
+        index = conflicts.build_lesson_index(
+            ("alpha", "beta"),
+            [],
+            {},
+            {},
+            [("alpha", {"classroom": {"name": "classroom"}}), ("beta", {"lab": {"name": "classroom", "internal": True}})],
+        )
+        self.assertEqual([(c.code, c.severity) for c in index.conflicts()], [("network-conflict", "warn")])
+
+
+class ConflictGenerationTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo_root = Path(tmp.name).resolve() / "repo"
+        for name, fragment in FRAGMENTS.items():
+            service_dir = self.repo_root / "services" / name
+            service_dir.mkdir(parents=True)
+            (service_dir / f"docker-compose.{name}.yml").write_text(textwrap.dedent(fragment), encoding="utf-8")
+        (self.repo_root / "catalog").mkdir()
+        (self.repo_root / "catalog" / "services.json").write_text(
+            json.dumps(
+                {
+                    "services": [
+                        {"id": name, "label": name.title(), "portLabels": {"8000": f"{name.title()} UI"}}
+                        for name in FRAGMENTS
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        self.manifest = self.repo_root / "lesson.yaml"
+        self.manifest.write_text(
+            textwrap.dedent(
+                """
+                metadata:
+                  org: acme
+                  course: net
+                  lesson: ports
+                spec:
+                  base_preset: full
+                  image_tag_strategy: ubuntu-24.04
+                  services:
+                    - alpha
+                    - beta
+                """
+            ),
+            encoding="utf-8",
+        )
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.addCleanup(deps._INDEXES.clear)
+
+    def generate(self, options):
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(output):
+            exit_code = cli.generate_from_manifest(self.manifest, options=options)
+        return exit_code, output.getvalue()
+
+    def test_collisions_fail_generation(self):
+        exit_code, output = self.generate(cli.GenerateOptions(use_cache=False))
+        self.assertEqual(exit_code, 1)
+        self.assertIn("[error] host port 8000 is claimed by alpha, beta", output)
+        self.assertIn("[error] container_name lab is claimed by alpha, beta", output)
+        self.assertIn("[warn] volume shared-data is claimed by alpha, beta", output)
+
+    def rename_containers(self):
+        for name in FRAGMENTS:
+            fragment = self.repo_root / "services" / name / f"docker-compose.{name}.yml"
+            text = fragment.read_text(encoding="utf-8")
+            fragment.write_text(text.replace("container_name: lab", f"container_name: {name}"), encoding="utf-8")
+        catalog.clear_service_catalogs()
+
+    def snapshot(self, directory):
+        return {path: path.read_bytes() for path in sorted(directory.rglob("*")) if path.is_file()}
+
+    def test_failed_checks_leave_previous_output_untouched(self):
+        self.rename_containers()
+        exit_code, output = self.generate(cli.GenerateOptions(use_cache=False, remap_ports=True))
+        self.assertEqual(exit_code, 0, output)
+        preset_dir, template_dir = cli.generated_dirs("acme-net-ports", self.repo_root)
+        before = {**self.snapshot(preset_dir), **self.snapshot(template_dir)}
+
+        text = self.manifest.read_text(encoding="utf-8")
+        self.manifest.write_text(text + "  env:\n    MODE: strict\n", encoding="utf-8")
+        exit_code, output = self.generate(cli.GenerateOptions(use_cache=False))
+        self.assertEqual(exit_code, 1)
+        self.assertIn("[error] host port 8000 is claimed by alpha, beta", output)
+        self.assertEqual({**self.snapshot(preset_dir), **self.snapshot(template_dir)}, before)
+
+    def test_warnings_repeat_on_cache_hits(self):
+        self.rename_containers()
+        options = cli.GenerateOptions(remap_ports=True)
+        for expect_hit in (False, True):
+            exit_code, output = self.generate(options)
+            self.assertEqual(exit_code, 0, output)
+            self.assertEqual("generation cache hit" in output, expect_hit)
+            self.assertIn("[warn] volume shared-data is claimed by alpha, beta", output)
+
+    def test_remap_writes_compose_and_ports_attributes(self):
+        self.rename_containers()
+
+        exit_code, output = self.generate(cli.GenerateOptions(use_cache=False, remap_ports=True))
+        self.assertEqual(exit_code, 0, output)
+        self.assertIn("Remapped beta (beta) host port 8000 to 8002", output)
+
+        preset_dir, template_dir = cli.generated_dirs("acme-net-ports", self.repo_root)
+        document = parse_simple_yaml((preset_dir / "docker-compose.classroom.yml").read_text(encoding="utf-8"))
+        self.assertEqual(document["services"]["alpha"]["ports"], ["${ALPHA_PORT:-8000}:8000"])
+        self.assertEqual(document["services"]["beta"]["ports"][0], "127.0.0.1:8002:80")
+
+        devcontainer = json.loads((template_dir / ".devcontainer" / "devcontainer.json").read_text(encoding="utf-8"))
+        self.assertEqual(
+            devcontainer["portsAttributes"],
+            {"8000": {"label": "Alpha UI"}, "8002": {"label": "Beta UI"}},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import io
+import json
+import sys
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, deps
+
+
+def _manifest(lesson: str, preset: str, services) -> str:
+    entries = "\n".join(f"    - {service}" for service in services) or "    []"
+    return textwrap.dedent(
+        f"""
+        metadata:
+          org: acme
+          course: math
+          lesson: {lesson}
+        spec:
+          base_preset: {preset}
+          image_tag_strategy: ubuntu-24.04
+          services:
+        """
+    ) + entries + "\n"
+
+
+class DependencyIndexTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo_root = Path(tmp.name).resolve() / "repo"
+        for service in ("redis", "supabase"):
+            service_dir = self.repo_root / "services" / service
+            service_dir.mkdir(parents=True)
+            (service_dir / f"docker-compose.{service}.yml").write_text(
+                f"services:\n  {service}:\n    image: {service}:1\n", encoding="utf-8"
+            )
+        self.manifests = self.repo_root / "manifests"
+        self.manifests.mkdir()
+        (self.manifests / "algebra.yaml").write_text(_manifest("algebra", "full", ["redis"]), encoding="utf-8")
+        (self.manifests / "geometry.yaml").write_text(
+            _manifest("geometry", "python", ["redis", "supabase"]), encoding="utf-8"
+        )
+        (self.manifests / "calculus.yaml").write_text(_manifest("calculus", "python", []), encoding="utf-8")
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.addCleanup(deps._INDEXES.clear)
+
+    def affected(self, *changed, output_format="slugs"):
+        deps._INDEXES.clear()  # each CLI run starts from the persisted index
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            exit_code = deps.main(
+                ["--manifests", str(self.manifests), "--format", output_format, "--changed", *changed]
+            )
+        self.assertEqual(exit_code, 0)
+        return buffer.getvalue().split()
+
+    def test_changed_paths_map_to_lessons(self):
+        self.assertEqual(
+            self.affected("services/supabase/docker-compose.supabase.yml"),
+            ["acme-math-geometry"],
+        )
+        self.assertEqual(
+            self.affected("services/redis/.env.example"),
+            ["acme-math-algebra", "acme-math-geometry"],
+        )
+        self.assertEqual(
+            self.affected("images/presets/python/Dockerfile"),
+            ["acme-math-calculus", "acme-math-geometry"],
+        )
+        self.assertEqual(self.affected("images/presets/generated/acme-math-algebra/Dockerfile"), [])
+        self.assertEqual(
+            self.affected(str(self.manifests / "algebra.yaml"), output_format="manifests"),
+            ["manifests/algebra.yaml"],
+        )
+        self.assertEqual(len(self.affected("tools/generate-lesson/generate_lesson/cli.py")), 3)
+        self.assertEqual(self.affected("catalog/services.json"), ["acme-math-algebra", "acme-math-geometry"])
+
+        index = json.loads((self.repo_root / ".cache" / "generate-lesson" / "deps.json").read_text())
+        self.assertEqual(index["services"]["redis"], ["acme-math-algebra", "acme-math-geometry"])
+        self.assertEqual(index["presets"]["full"], ["acme-math-algebra"])
+        self.assertEqual(
+            index["files"]["services/supabase/docker-compose.supabase.yml"], ["acme-math-geometry"]
+        )
+
+    def test_index_follows_manifest_edits_and_generation(self):
+        self.assertEqual(self.affected("services/supabase/x"), ["acme-math-geometry"])
+        (self.manifests / "geometry.yaml").unlink()
+        (self.manifests / "algebra.yaml").write_text(
+            _manifest("algebra", "full", ["supabase"]), encoding="utf-8"
+        )
+        self.assertEqual(self.affected("services/supabase/x"), ["acme-math-algebra"])
+
+        deps._INDEXES.clear()
+        trig = self.repo_root / "trig.yaml"
+        trig.write_text(_manifest("trig", "full", ["redis"]), encoding="utf-8")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(cli.main(["--manifest", str(trig)]), 0)
+        deps._INDEXES.clear()
+        index = cli.dependency_index()
+        self.assertEqual(index.lessons["trig.yaml"]["services"], ["redis"])
+        self.assertEqual(index.affected(["trig.yaml"]), ("acme-math-trig",))
+
+    def test_generation_records_each_lesson_once(self):
+        with mock.patch.object(cli, "record_lesson_dependencies", wraps=cli.record_lesson_dependencies) as record:
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(cli.main(["--manifests", str(self.manifests), "--jobs", "1"]), 0)
+                self.assertEqual(cli.main(["--manifest", str(self.manifests / "algebra.yaml")]), 0)
+        recorded = sorted(call.args[1] for call in record.call_args_list)
+        self.assertEqual(
+            recorded, ["acme-math-algebra", "acme-math-algebra", "acme-math-calculus", "acme-math-geometry"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
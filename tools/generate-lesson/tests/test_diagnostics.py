@@ -0,0 +1,103 @@
+import io
+import json
+import sys
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, deps
+
+MANIFEST = textwrap.dedent(
+    """
+    metadata:
+      org: acme
+      course: math
+      lesson: algebra
+    spec:
+      base_preset: full
+      image_tag_strategy: ubuntu-24.04
+      telemetry: true
+      services:
+        - ghost
+    """
+)
+
+
+class DiagnosticsOutputTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo_root = Path(tmp.name).resolve() / "repo"
+        (self.repo_root / "services").mkdir(parents=True)
+        self.manifest = self.repo_root / "algebra.yaml"
+        self.manifest.write_text(MANIFEST, encoding="utf-8")
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.addCleanup(deps._INDEXES.clear)
+
+    def run_cli(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            exit_code = cli.main(["--no-cache", *args])
+        self.assertEqual(exit_code, 0)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_text_format_keeps_classic_lines(self):
+        stdout, stderr = self.run_cli("--manifest", str(self.manifest))
+        self.assertEqual(
+            stderr.splitlines(),
+            [
+                "[warn] spec.telemetry is not recognized and will be ignored.",
+                "[warn] spec.services requested 'ghost', but no matching fragment exists under services/ghost",
+            ],
+        )
+        self.assertIn(f"[ok] Generated preset ctx: {self.repo_root}/images/presets/generated/acme-math-algebra", stdout)
+
+    def test_ndjson_records_and_summary(self):
+        stdout, stderr = self.run_cli("--manifests", str(self.repo_root / "*.yaml"), "--format", "ndjson", "--jobs", "1")
+        self.assertEqual(stderr, "")
+        records = [json.loads(line) for line in stdout.splitlines()]
+        by_code = {record.get("code"): record for record in records}
+
+        unknown = by_code["spec-field-unknown"]
+        self.assertEqual(unknown["severity"], "warn")
+        self.assertEqual(unknown["field"], "spec.telemetry")
+        self.assertEqual(unknown["slug"], "acme-math-algebra")
+        self.assertEqual(unknown["manifest"], str(self.manifest))
+        self.assertIn("elapsed_ms", unknown)
+        self.assertEqual(by_code["service-missing"]["field"], "spec.services")
+        self.assertEqual(by_code["preset-generated"]["type"], "artifact")
+
+        self.assertEqual(records[-2]["type"], "result")
+        self.assertEqual(records[-2]["exit_code"], 0)
+        summary = records[-1]
+        self.assertEqual(summary["type"], "summary")
+        self.assertEqual(summary["manifests"], 1)
+        self.assertEqual(summary["failed"], 0)
+        self.assertEqual(summary["counts"]["warn"], 2)
+
+    def test_single_manifest_result_carries_the_slug(self):
+        stdout, _stderr = self.run_cli("--manifest", str(self.manifest), "--format", "ndjson")
+        records = [json.loads(line) for line in stdout.splitlines()]
+        result = records[-2]
+        self.assertEqual(result["type"], "result")
+        self.assertEqual(result["slug"], "acme-math-algebra")
+        self.assertEqual({record["slug"] for record in records[:-1]}, {"acme-math-algebra"})
+
+    def test_json_format_is_one_document(self):
+        stdout, _stderr = self.run_cli("--manifest", str(self.manifest), "--format", "json")
+        records = json.loads(stdout)
+        self.assertEqual(records[-1]["type"], "summary")
+        self.assertEqual(records[-1]["counts"]["ok"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
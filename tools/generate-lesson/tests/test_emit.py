@@ -0,0 +1,54 @@
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import emit
+
+
+class EmitTests(unittest.TestCase):
+    def test_emit_text_skips_identical_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "nested" / "file.txt"
+            self.assertTrue(emit.emit_text(target, "hello\n"))
+            inode = target.stat().st_ino
+            self.assertFalse(emit.emit_text(target, "hello\n"))
+            self.assertEqual(target.stat().st_ino, inode)
+            self.assertTrue(emit.emit_text(target, "hello world\n"))
+            self.assertEqual(target.read_text(encoding="utf-8"), "hello world\n")
+            self.assertEqual(sorted(os.listdir(target.parent)), ["file.txt"])
+
+    def test_emit_bytes_preserves_existing_mode(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "script.sh"
+            target.write_text("#!/bin/sh\n", encoding="utf-8")
+            target.chmod(0o755)
+            self.assertTrue(emit.emit_bytes(target, b"#!/bin/sh\necho hi\n"))
+            self.assertEqual(stat.S_IMODE(target.stat().st_mode), 0o755)
+
+    def test_new_files_follow_the_umask_without_touching_it(self):
+        previous = os.umask(0o027)
+        self.addCleanup(os.umask, previous)
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "file.txt"
+            with mock.patch.object(emit.os, "umask", side_effect=AssertionError("umask changed")):
+                self.assertTrue(emit.emit_text(target, "hello\n"))
+            self.assertEqual(stat.S_IMODE(target.stat().st_mode), 0o640)
+
+    def test_emit_copy_preserves_mtime_and_skips_current_copies(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "src.yml"
+            dst = Path(tmp) / "out" / "dst.yml"
+            src.write_text("services: {}\n", encoding="utf-8")
+            self.assertTrue(emit.emit_copy(src, dst))
+            self.assertEqual(dst.stat().st_mtime_ns, src.stat().st_mtime_ns)
+            self.assertFalse(emit.emit_copy(src, dst))
+
+
+if __name__ == "__main__":
+    unittest.main()
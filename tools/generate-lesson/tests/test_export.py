@@ -0,0 +1,106 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, deps, export
+from generate_lesson.__main__ import main as entry_point
+
+MANIFEST = textwrap.dedent(
+    """
+    metadata:
+      org: acme
+      course: math
+      lesson: algebra
+    spec:
+      base_preset: full
+      image_tag_strategy: ubuntu-24.04
+      services:
+        - redis
+    """
+)
+
+
+class ExportTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name).resolve()
+        self.repo_root = self.tmp / "repo"
+        service_dir = self.repo_root / "services" / "redis"
+        service_dir.mkdir(parents=True)
+        fragment = service_dir / "docker-compose.redis.yml"
+        fragment.write_text("services:\n  redis:\n    image: redis:7\n", encoding="utf-8")
+        os.chmod(fragment, 0o664)
+        self.manifest = self.repo_root / "algebra.yaml"
+        self.manifest.write_text(MANIFEST, encoding="utf-8")
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.addCleanup(deps._INDEXES.clear)
+
+    def export(self, name, *args):
+        output = self.tmp / name
+        stdout = io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+            exit_code = entry_point(["export", str(self.manifest), "--output", str(output), *args])
+        self.assertEqual(exit_code, 0)
+        return output.read_bytes(), json.loads(stdout.getvalue())
+
+    def test_layer_is_reproducible_and_described(self):
+        first, descriptor = self.export("first.tar.gz")
+        with mock.patch("time.time", return_value=2_000_000_000.0):
+            second, _ = self.export("second.tar.gz")
+        self.assertEqual(first, second)
+
+        self.assertEqual(descriptor["mediaType"], "application/vnd.oci.image.layer.v1.tar+gzip")
+        self.assertEqual(descriptor["digest"], "sha256:" + hashlib.sha256(first).hexdigest())
+        self.assertEqual(descriptor["size"], len(first))
+        self.assertEqual(descriptor["diff_id"], "sha256:" + hashlib.sha256(gzip.decompress(first)).hexdigest())
+
+        with tarfile.open(fileobj=io.BytesIO(first)) as archive:
+            members = archive.getmembers()
+        names = [member.name for member in members]
+        self.assertEqual(names[:3], ["images", "images/presets", "images/presets/generated"])
+        self.assertIn("templates/generated/acme-math-algebra/stack.lock.json", names)
+        self.assertEqual({(member.uid, member.gid, member.uname, member.mtime) for member in members}, {(0, 0, "", 0)})
+        fragment = next(member for member in members if member.name.endswith("docker-compose.redis.yml"))
+        self.assertEqual(fragment.mode, 0o644)
+
+    def test_scaffold_part_is_rooted_at_the_scaffold(self):
+        data, descriptor = self.export("scaffold.tar", "--part", "scaffold", "--format", "tar")
+        self.assertEqual(descriptor["digest"], descriptor["diff_id"])
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            names = archive.getnames()
+        self.assertEqual(names, [".devcontainer", ".devcontainer/devcontainer.json", "stack.lock.json"])
+
+    def test_source_date_epoch_sets_mtimes(self):
+        with mock.patch.dict(os.environ, {"SOURCE_DATE_EPOCH": "1700000000"}):
+            data, _ = self.export("dated.tar", "--format", "tar")
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            self.assertEqual({member.mtime for member in archive}, {1700000000})
+
+    def test_select_part_preset(self):
+        bundle = export.render(self.manifest)
+        preset = export.select_part(bundle, "preset")
+        self.assertIn("docker-compose.classroom.yml", preset)
+        self.assertIn("services", preset.directories)
+        self.assertFalse(any(path.startswith("images/") for path in preset.paths()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import materialize
+
+
+class MaterializeTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+        self.src = self.root / "services" / "redis" / "docker-compose.redis.yml"
+        self.src.parent.mkdir(parents=True)
+        self.src.write_text("services:\n  redis:\n    image: redis:7\n", encoding="utf-8")
+        self.dst = self.root / "out" / "services" / "redis" / "docker-compose.redis.yml"
+
+    def test_hardlink_shares_inode_and_is_idempotent(self):
+        strategy, changed = materialize.materialize_file(self.src, self.dst, "hardlink")
+        self.assertEqual(strategy, "hardlink")
+        self.assertTrue(changed)
+        self.assertTrue(os.path.samefile(self.src, self.dst))
+        self.assertEqual(materialize.materialize_file(self.src, self.dst, "hardlink"), ("hardlink", False))
+
+    def test_copy_breaks_existing_hardlink(self):
+        materialize.materialize_file(self.src, self.dst, "hardlink")
+        strategy, changed = materialize.materialize_file(self.src, self.dst, "copy")
+        self.assertEqual((strategy, changed), ("copy", True))
+        self.assertFalse(os.path.samefile(self.src, self.dst))
+        self.assertEqual(self.dst.read_bytes(), self.src.read_bytes())
+
+    def test_symlink_is_relative(self):
+        strategy, _ = materialize.materialize_file(self.src, self.dst, "symlink")
+        self.assertEqual(strategy, "symlink")
+        self.assertTrue(self.dst.is_symlink())
+        self.assertFalse(os.path.isabs(os.readlink(self.dst)))
+        self.assertEqual(self.dst.read_bytes(), self.src.read_bytes())
+
+    def test_auto_never_shares_the_catalog_inode(self):
+        strategy, _ = materialize.materialize_file(self.src, self.dst, "auto")
+        self.assertIn(strategy, {"reflink", "copy"})
+        self.assertFalse(self.dst.is_symlink())
+        self.assertFalse(os.path.samefile(self.src, self.dst))
+        self.assertEqual(self.dst.read_bytes(), self.src.read_bytes())
+
+    def test_auto_replaces_an_earlier_hardlink(self):
+        materialize.materialize_file(self.src, self.dst, "hardlink")
+        _strategy, changed = materialize.materialize_file(self.src, self.dst, "auto")
+        self.assertTrue(changed)
+        self.assertFalse(os.path.samefile(self.src, self.dst))
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            materialize.materialize_file(self.src, self.dst, "teleport")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import json
+import sys
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, deps, pipeline
+
+
+def _manifest(lesson: str) -> str:
+    return textwrap.dedent(
+        f"""
+        metadata:
+          org: acme
+          course: math
+          lesson: {lesson}
+        spec:
+          base_preset: full
+          image_tag_strategy: ubuntu-24.04
+          services:
+            - redis
+        """
+    )
+
+
+class CheckPipelineTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo_root = Path(tmp.name).resolve() / "repo"
+        service_dir = self.repo_root / "services" / "redis"
+        service_dir.mkdir(parents=True)
+        (service_dir / "docker-compose.redis.yml").write_text(
+            "services:\n  redis:\n    image: redis:7\n", encoding="utf-8"
+        )
+        self.manifests = self.repo_root / "manifests"
+        self.manifests.mkdir()
+        (self.manifests / "algebra.yaml").write_text(_manifest("algebra"), encoding="utf-8")
+        (self.manifests / "blank.yaml").write_text(_manifest("''"), encoding="utf-8")
+        (self.manifests / "broken.yaml").write_text("metadata: [unclosed\n", encoding="utf-8")
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.addCleanup(deps._INDEXES.clear)
+
+    def run_check(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+            exit_code = pipeline.main(["--manifests", str(self.manifests), "--jobs", "1"])
+        return exit_code, {Path(row["manifest"]).name: row for row in map(json.loads, stdout.getvalue().splitlines())}
+
+    def test_each_manifest_is_loaded_once_and_reported(self):
+        with mock.patch.object(cli, "load_manifest", wraps=cli.load_manifest) as load:
+            exit_code, rows = self.run_check()
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(load.call_count, 3)
+        self.assertEqual(list(rows), ["algebra.yaml", "blank.yaml", "broken.yaml"])
+
+        algebra = rows["algebra.yaml"]
+        self.assertTrue(algebra["ok"])
+        self.assertEqual(algebra["slug"], "acme-math-algebra")
+        self.assertEqual(
+            [algebra["stages"][stage]["status"] for stage in pipeline.STAGES],
+            ["ok", "skipped", "ok", "ok", "ok"],
+        )
+        self.assertEqual(algebra["outputs"]["preset"], "images/presets/generated/acme-math-algebra")
+        self.assertTrue((self.repo_root / algebra["outputs"]["preset"] / "Dockerfile").is_file())
+
+        blank = rows["blank.yaml"]
+        self.assertFalse(blank["ok"])
+        self.assertEqual(blank["stages"]["structure"]["errors"], ["manifest.metadata.lesson is required"])
+        self.assertNotIn("generate", blank["stages"])
+
+        broken = rows["broken.yaml"]
+        self.assertEqual(broken["stages"]["load"]["status"], "error")
+        self.assertEqual(list(broken["stages"]), ["load"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import io
+import json
+import pstats
+import sys
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, deps, profiling
+
+MANIFEST = textwrap.dedent(
+    """
+    metadata:
+      org: acme
+      course: math
+      lesson: algebra
+    spec:
+      base_preset: full
+      image_tag_strategy: ubuntu-24.04
+    """
+)
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo_root = Path(tmp.name).resolve() / "repo"
+        (self.repo_root / "services").mkdir(parents=True)
+        self.manifest = self.repo_root / "algebra.yaml"
+        self.manifest.write_text(MANIFEST, encoding="utf-8")
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.addCleanup(deps._INDEXES.clear)
+        self.addCleanup(profiling.disable)
+
+    def run_cli(self, *args):
+        stderr = io.StringIO()
+        with redirect_stdout(io.StringIO()), redirect_stderr(stderr):
+            self.assertEqual(cli.main(["--manifest", str(self.manifest), *args]), 0)
+        return stderr.getvalue()
+
+    def test_hooks_are_inert_when_disabled(self):
+        self.assertIsNone(profiling.active())
+        self.assertIs(profiling.stage("anything"), profiling.stage("else"))
+        profiling.count("bytes_written", 10)
+        self.run_cli()
+        self.assertIsNone(profiling.active())
+
+    def test_profile_breakdown_and_trace(self):
+        trace = self.repo_root / "profile" / "trace.json"
+        stderr = self.run_cli("--profile", "--profile-output", str(trace))
+        self.assertIn("generate_manifest", stderr)
+        self.assertIn("collect_service_images", stderr)
+        self.assertIn("lessons_generated: 1", stderr)
+        self.assertIsNone(profiling.active())
+
+        payload = json.loads(trace.read_text(encoding="utf-8"))
+        names = {event["name"] for event in payload["traceEvents"]}
+        self.assertTrue({"generate_manifest", "merge_services", "emit_json", "parse_manifest"} <= names)
+        self.assertTrue(all(event["ph"] == "X" for event in payload["traceEvents"]))
+        self.assertGreater(payload["otherData"]["counters"]["bytes_written"], 0)
+
+        stderr = self.run_cli("--profile-output", str(self.repo_root / "profile.pstats"))
+        self.assertIn("lesson_cache_hits: 1", stderr)
+        stats = pstats.Stats(str(self.repo_root / "profile.pstats"))
+        self.assertTrue(any(key[2] == "generate_from_manifest" for key in stats.stats))
+
+
+if __name__ == "__main__":
+    unittest.main()
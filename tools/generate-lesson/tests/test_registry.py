@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, profiling, registry
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+class ServiceRegistryTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name).resolve()
+        store_dir = self.root / "services" / "store"
+        store_dir.mkdir(parents=True)
+        self.fragment = store_dir / "docker-compose.store.yml"
+        self.fragment.write_text(
+            textwrap.dedent(
+                """
+                services:
+                  store:
+                    image: example/store:1
+                    ports:
+                      - "${STORE_PORT:-9000}:9000"
+                      - "9001:9001"
+                    volumes:
+                      - store-data:/data
+                    networks: [classroom]
+                  store-admin:
+                    image: example/admin:1
+                    profiles: [admin]
+                volumes:
+                  store-data:
+                """
+            ),
+            encoding="utf-8",
+        )
+        mail_dir = self.root / "services" / "mail"
+        mail_dir.mkdir()
+        (mail_dir / "docker-compose.mail.yml").write_text(
+            "services:\n  mail:\n    image: example/mail:1\n    ports: ['2500:2500']\n", encoding="utf-8"
+        )
+        (self.root / "catalog").mkdir()
+        (self.root / "catalog" / "services.json").write_text(
+            json.dumps(
+                {
+                    "services": [
+                        {"id": "store", "label": "Store", "ports": [9000, 9001], "portLabels": {"9001": "Console"}},
+                        {"id": "mail", "label": "Mail"},
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        self.catalog = catalog.ServiceCatalog.scan(self.root, cli.load_yaml_document)
+
+    def test_records_are_derived_from_fragments_and_catalog(self):
+        built = registry.build_service_registry(self.catalog)
+        store = built.get("store")
+        self.assertEqual(
+            store.extends,
+            (("docker-compose.store.yml", "store"), ("docker-compose.store.yml", "store-admin")),
+        )
+        self.assertEqual(store.volumes, ("store-data",))
+        self.assertEqual(store.port_labels, {9001: "Console"})
+        self.assertTrue(store.classroom_network)
+        self.assertEqual(built.port_labels("mail"), {2500: "Mail"})
+        self.assertFalse(built.requires_classroom_network("mail"))
+        self.assertEqual(built.extends("unknown"), ())
+
+    def test_snapshot_is_reused_until_inputs_change(self):
+        snapshot = self.root / "registry.json"
+        profiler = profiling.enable()
+        self.addCleanup(profiling.disable)
+
+        first = registry.load_service_registry(self.catalog, snapshot)
+        second = registry.load_service_registry(self.catalog, snapshot)
+        self.assertEqual(second.to_json(), first.to_json())
+        self.assertEqual(profiler.counters["registry_snapshot_misses"], 1)
+        self.assertEqual(profiler.counters["registry_snapshot_hits"], 1)
+
+        self.fragment.write_text(self.fragment.read_text(encoding="utf-8").replace("store-data", "blobs"))
+        stat = self.fragment.stat()
+        os.utime(self.fragment, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.catalog.refresh("store")
+        rebuilt = registry.load_service_registry(self.catalog, snapshot)
+        self.assertEqual(rebuilt.volumes("store"), ("blobs",))
+        self.assertEqual(profiler.counters["registry_snapshot_misses"], 2)
+
+
+class CatalogConsistencyTests(unittest.TestCase):
+    def test_catalog_matches_the_service_fragments(self):
+        index = catalog.ServiceCatalog.scan(REPO_ROOT, cli.load_yaml_document)
+        built = registry.build_service_registry(index)
+        for name in index:
+            with self.subTest(service=name):
+                metadata = index.metadata(name)
+                self.assertTrue(metadata, f"catalog/services.json has no entry for {name}")
+                containers = {service for _file, service in built.extends(name)}
+                self.assertTrue(set(metadata.get("resources", {})) <= containers)
+                published = set()
+                for file_name, service in built.extends(name):
+                    definition = index.compose_service(name, file_name, service)
+                    published.update(registry._published_ports(definition))
+                self.assertTrue(set(metadata.get("ports", ())) <= published)
+                self.assertTrue(set(built.port_labels(name)) <= published)
+
+
+if __name__ == "__main__":
+    unittest.main()
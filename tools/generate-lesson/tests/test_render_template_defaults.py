@@ -0,0 +1,211 @@
+import io
+import json
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import render_template_defaults as renderer  # noqa: E402
+
+
+class CompiledRendererTests(unittest.TestCase):
+    def test_matches_legacy_for_every_template_and_combination(self):
+        metadata_paths = sorted((REPO_ROOT / "templates").glob("*/devcontainer-template.json"))
+        self.assertTrue(metadata_paths)
+        for metadata_path in metadata_paths:
+            defaults = renderer.load_defaults(metadata_path)
+            combinations = [{}] + renderer.option_matrix(renderer.load_options(metadata_path), None)
+            for path in sorted((metadata_path.parent / ".template").rglob("*")):
+                if not path.is_file() or not renderer.needs_rendering(path):
+                    continue
+                content = renderer.decode_template(path.read_bytes())
+                compiled = renderer.compile_template(content)
+                for overrides in combinations:
+                    options = dict(defaults, **overrides)
+                    with self.subTest(template=metadata_path.parent.name, file=path.name, overrides=overrides):
+                        self.assertEqual(
+                            compiled.render(options).encode("utf-8"),
+                            renderer.render_text_legacy(content, options).encode("utf-8"),
+                        )
+
+    def test_nested_sections_compile_to_one_pass(self):
+        content = (
+            "{{#templateOption.a}}A{{^templateOption.b}}not b {{templateOption.c}}{{/templateOption.b}}"
+            "{{/templateOption.a}}|{{templateOption.missing}}|{{^templateOption.a}}no a{{/templateOption.a}}"
+        )
+        compiled = renderer.compile_template(content)
+        self.assertIsNotNone(compiled.program)
+        for options in ({"a": True, "b": False, "c": 3}, {"a": True, "b": True}, {"a": False}, {}):
+            with self.subTest(options=options):
+                self.assertEqual(compiled.render(options), renderer.render_text_legacy(content, options))
+        self.assertEqual(compiled.render({"a": True, "b": False, "c": 3}), "Anot b 3|{{templateOption.missing}}|")
+
+
+class LegacyFallbackTests(unittest.TestCase):
+    CASES = {
+        "same option nested": "{{#templateOption.a}}x{{#templateOption.a}}y{{/templateOption.a}}z{{/templateOption.a}}",
+        "crossed sections": "{{#templateOption.a}}{{#templateOption.b}}x{{/templateOption.a}}{{/templateOption.b}}",
+        "unclosed section": "{{#templateOption.a}}x",
+        "stray closing tag": "x{{/templateOption.a}}",
+        "bare option text": "templateOption.a is {{templateOption.a}}",
+        "regex key": "{{#templateOption.a.b}}x{{/templateOption.a.b}}",
+    }
+
+    def test_unsupported_constructs_fall_back_to_legacy(self):
+        for label, content in self.CASES.items():
+            with self.subTest(label):
+                self.assertIsNone(renderer.compile_program(content))
+                for options in ({"a": True, "b": True, "a.b": True}, {"a": False}, {}):
+                    self.assertEqual(
+                        renderer.render_text(content, options), renderer.render_text_legacy(content, options)
+                    )
+
+
+class RenderFileTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def test_binaries_and_untagged_files_are_skipped(self):
+        binary = self.root / "logo.png"
+        binary.write_bytes(b"\x89PNG\0\0{{templateOption.a}}")
+        large_binary = self.root / "font.woff"
+        large_binary.write_bytes(b"\0" + b"{{templateOption.a}}" * (renderer.MMAP_THRESHOLD // 8))
+        plain = self.root / "README.md"
+        plain.write_text("no tags here\n" * 10_000, encoding="utf-8")
+        for path in (binary, large_binary, plain):
+            with self.subTest(path.name):
+                before = path.read_bytes()
+                self.assertFalse(renderer.needs_rendering(path))
+                self.assertFalse(renderer.render_file(path, {"a": True}))
+                self.assertEqual(path.read_bytes(), before)
+
+        large_text = self.root / "settings.json"
+        large_text.write_text(" " * renderer.MMAP_THRESHOLD + "{{templateOption.a}}", encoding="utf-8")
+        self.assertTrue(renderer.needs_rendering(large_text))
+
+    def test_unchanged_output_is_not_rewritten(self):
+        path = self.root / "devcontainer.json"
+        path.write_text('{"image": "{{templateOption.image}}"}\n', encoding="utf-8")
+        path.chmod(0o755)
+        self.assertTrue(renderer.render_file(path, {"image": "node:20"}))
+        self.assertEqual(path.read_text(encoding="utf-8"), '{"image": "node:20"}\n')
+        self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o755)
+
+        inode = path.stat().st_ino
+        self.assertFalse(renderer.write_if_changed(path, b'{"image": "node:20"}\n'))
+        self.assertEqual(path.stat().st_ino, inode)
+        self.assertFalse(renderer.render_file(path, {"image": "node:20"}))
+        self.assertEqual(sorted(os.listdir(self.root)), ["devcontainer.json"])
+
+    def test_new_files_are_written_atomically_with_umask_mode(self):
+        umask = os.umask(0o022)
+        self.addCleanup(os.umask, umask)
+        path = self.root / "out" / "nested" / "file.txt"
+        self.assertTrue(renderer.write_if_changed(path, b"hello\n"))
+        self.assertEqual(path.read_bytes(), b"hello\n")
+        self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o644)
+        self.assertEqual(os.listdir(path.parent), ["file.txt"])
+
+
+TEMPLATE_OPTIONS = {
+    "id": "sample",
+    "options": {
+        "telemetry": {"type": "boolean", "default": False},
+        "flavor": {"type": "string", "enum": ["lite", "full"], "default": "lite"},
+        "port": {"type": "string", "default": "3000"},
+    },
+}
+
+
+class BatchTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        template = self.root / "templates" / "sample"
+        source = template / ".template" / ".devcontainer"
+        source.mkdir(parents=True)
+        (template / "devcontainer-template.json").write_text(json.dumps(TEMPLATE_OPTIONS), encoding="utf-8")
+        (source / "devcontainer.json").write_text(
+            '{"flavor": "{{templateOption.flavor}}", "port": {{templateOption.port}}'
+            "{{#templateOption.telemetry}}, \"telemetry\": true{{/templateOption.telemetry}}}\n",
+            encoding="utf-8",
+        )
+        (source / "icon.bin").write_bytes(b"\0\1\2")
+        self.metadata = template / "devcontainer-template.json"
+        self.options = renderer.load_options(self.metadata)
+
+    def test_option_matrix(self):
+        self.assertEqual(
+            renderer.option_matrix(self.options, None),
+            [
+                {"telemetry": True, "flavor": "lite"},
+                {"telemetry": True, "flavor": "full"},
+                {"telemetry": False, "flavor": "lite"},
+                {"telemetry": False, "flavor": "full"},
+            ],
+        )
+        self.assertEqual(
+            renderer.option_matrix(self.options, {"port": ["80", "81"], "unknown": [1]}),
+            [{"port": "80"}, {"port": "81"}],
+        )
+        self.assertEqual(
+            renderer.option_matrix(self.options, [{"port": "80"}, {"port": "80", "unknown": 1}, "junk"]),
+            [{"port": "80"}],
+        )
+        self.assertEqual(renderer.option_matrix(self.options, {"unknown": [1]}), [{}])
+        with self.assertRaises(ValueError):
+            renderer.option_matrix(self.options, "telemetry")
+
+    def test_large_matrices_are_split_across_workers(self):
+        combinations = [{"port": str(port)} for port in range(10)]
+        planned = renderer.plan_jobs([("a", "src-a", "out-a", combinations), ("b", "src-b", "out-b", [{}])], 4)
+        self.assertEqual([index for index, _job in planned], [0, 0, 0, 0, 1])
+        self.assertEqual([combo for index, job in planned if index == 0 for combo in job[3]], combinations)
+        self.assertEqual(len(renderer.plan_jobs([("a", "src-a", "out-a", combinations)], 1)), 1)
+
+    def run_batch(self, output, *args):
+        with redirect_stdout(io.StringIO()):
+            exit_code = renderer.batch_main([str(self.metadata.parent), "--output", str(output), *args])
+        self.assertEqual(exit_code, 0)
+        return json.loads((output / "manifest.json").read_text(encoding="utf-8"))
+
+    def test_manifest_records_every_combination(self):
+        output = self.root / "out"
+        manifest = self.run_batch(output, "--jobs", "1")
+        (template,) = manifest["templates"]
+        self.assertEqual(template["id"], "sample")
+        records = template["combinations"]
+        self.assertEqual(len(records), 4)
+        overrides = {"telemetry": True, "flavor": "full"}
+        full_telemetry = next(record for record in records if record["overrides"] == overrides)
+        self.assertEqual(full_telemetry["options"], dict(overrides, port="3000"))
+        rendered = Path(full_telemetry["path"]) / "devcontainer.json"
+        self.assertEqual(
+            rendered.read_text(encoding="utf-8"), '{"flavor": "full", "port": 3000, "telemetry": true}\n'
+        )
+        for record in records:
+            self.assertEqual(record["written"], 2)
+            for relative, digest in record["files"].items():
+                data = (Path(record["path"]) / relative).read_bytes()
+                self.assertEqual(digest, renderer.hashlib.sha256(data).hexdigest())
+
+        parallel = self.run_batch(self.root / "parallel", "--jobs", "3")
+        self.assertEqual(
+            [record["files"] for record in parallel["templates"][0]["combinations"]],
+            [record["files"] for record in records],
+        )
+        rerun = self.run_batch(output, "--jobs", "2")
+        self.assertEqual({record["written"] for record in rerun["templates"][0]["combinations"]}, {0})
+
+
+if __name__ == "__main__":
+    unittest.main()
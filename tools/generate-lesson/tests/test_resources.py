@@ -0,0 +1,166 @@
+import io
+import json
+import sys
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, deps, resources
+from generate_lesson.simple_yaml import parse_simple_yaml
+
+GIB = 1024**3
+
+CATALOG = {
+    "services": [
+        {
+            "id": "db",
+            "label": "Database",
+            "templatePath": "services/db",
+            "stability": "stable",
+            "resources": {
+                "db": {"cpu": 1, "memory": "1gb", "disk": "2gb"},
+                "db-admin": {"cpu": 0.5, "memory": "512mb"},
+            },
+        },
+        {"id": "cache", "label": "Cache", "templatePath": "services/cache", "stability": "stable"},
+    ]
+}
+
+
+class FootprintTests(unittest.TestCase):
+    def test_sizes_round_trip(self):
+        self.assertEqual(resources.parse_size("512mb"), 512 * 1024**2)
+        self.assertEqual(resources.parse_size("1.5GiB"), int(1.5 * GIB))
+        self.assertEqual(resources.parse_size("4G"), 4 * GIB)
+        self.assertEqual(resources.format_size(4 * GIB), "4gb")
+        self.assertEqual(resources.format_size(int(4.25 * GIB)), "4.25gb")
+        with self.assertRaisesRegex(ValueError, "invalid size"):
+            resources.parse_size("lots")
+
+    def test_estimate_and_budget(self):
+        metadata = {entry["id"]: entry for entry in CATALOG["services"]}
+        estimate = resources.estimate_lesson(("db", "cache"), metadata, resources.Footprint(2, 4 * GIB, 16 * GIB))
+        self.assertEqual(estimate.unknown, ("cache",))
+        self.assertEqual(estimate.total, resources.Footprint(3.5, int(5.5 * GIB), 18 * GIB))
+        self.assertEqual(
+            resources.over_budget(estimate.total, {"cpu": "4", "memory": "4gb"}),
+            [("memory", "5.5gb", "4gb")],
+        )
+        self.assertEqual(
+            resources.suggested_resources(estimate.total),
+            {"cpu": "4", "memory": "6gb", "disk": "18gb"},
+        )
+
+    def test_limits_keep_fragment_settings(self):
+        definition = {"deploy": {"replicas": 1}}
+        resources.apply_compose_limits(definition, resources.Footprint(0.5, 512 * 1024**2))
+        self.assertEqual(
+            definition["deploy"],
+            {"replicas": 1, "resources": {"limits": {"cpus": "0.5", "memory": "512mb"}}},
+        )
+        pinned = {"deploy": {"resources": {"limits": {"memory": "2g"}}}}
+        resources.apply_compose_limits(pinned, resources.Footprint(1, GIB))
+        self.assertEqual(pinned["deploy"]["resources"]["limits"], {"memory": "2g"})
+
+
+class ResourceBudgetTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo_root = Path(tmp.name).resolve() / "repo"
+        service_dir = self.repo_root / "services" / "db"
+        service_dir.mkdir(parents=True)
+        (service_dir / "docker-compose.db.yml").write_text(
+            "services:\n  db:\n    image: postgres:16\n  db-admin:\n    image: dpage/pgadmin4:8\n",
+            encoding="utf-8",
+        )
+        (self.repo_root / "catalog").mkdir()
+        (self.repo_root / "catalog" / "services.json").write_text(json.dumps(CATALOG), encoding="utf-8")
+        preset_dir = self.repo_root / "images" / "presets" / "python"
+        preset_dir.mkdir(parents=True)
+        (preset_dir / "devcontainer.json").write_text(
+            json.dumps({"hostRequirements": {"cpus": 2, "memory": "4gb", "storage": "16gb"}}), encoding="utf-8"
+        )
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.addCleanup(deps._INDEXES.clear)
+
+    def generate(self, resources_block, options=cli.GenerateOptions(use_cache=False)):
+        manifest = self.repo_root / "lesson.yaml"
+        manifest.write_text(
+            textwrap.dedent(
+                """
+                metadata:
+                  org: acme
+                  course: data
+                  lesson: sizing
+                spec:
+                  base_preset: python
+                  image_tag_strategy: ubuntu-24.04
+                  services:
+                    - db
+                """
+            )
+            + textwrap.indent(textwrap.dedent(resources_block), "  "),
+            encoding="utf-8",
+        )
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(output):
+            exit_code = cli.generate_from_manifest(manifest, options=options)
+        return exit_code, output.getvalue()
+
+    def test_missing_budget_suggests_resources_and_limits_compose(self):
+        exit_code, output = self.generate("")
+        self.assertEqual(exit_code, 0, output)
+        self.assertIn("need about 3.5 CPU, 5.5gb memory, 18gb disk (suggested: cpu: 4, memory: 6gb, disk: 18gb)", output)
+
+        preset_dir, _template_dir = cli.generated_dirs("acme-data-sizing", self.repo_root)
+        document = parse_simple_yaml((preset_dir / "docker-compose.classroom.yml").read_text(encoding="utf-8"))
+        self.assertEqual(document["services"]["db"]["deploy"]["resources"]["limits"], {"cpus": "1", "memory": "1gb"})
+        self.assertEqual(
+            document["services"]["db-admin"]["deploy"]["resources"]["limits"], {"cpus": "0.5", "memory": "512mb"}
+        )
+
+    def test_undersized_budget_warns_or_fails(self):
+        budget = """
+            resources:
+              cpu: "2"
+              memory: "8gb"
+              disk: "32gb"
+        """
+        exit_code, output = self.generate(budget)
+        self.assertEqual(exit_code, 0, output)
+        self.assertIn("[warn] spec.resources.cpu is 2, but the base preset and services need 3.5", output)
+        self.assertNotIn("spec.resources.memory is", output)
+
+        exit_code, output = self.generate(budget, cli.GenerateOptions(use_cache=False, enforce_resources=True))
+        self.assertEqual(exit_code, 1)
+        self.assertIn("[error] spec.resources.cpu is 2", output)
+
+    def test_budget_is_checked_on_cache_hits(self):
+        budget = """
+            resources:
+              cpu: "2"
+        """
+        for expect_hit in (False, True):
+            exit_code, output = self.generate(budget, cli.GenerateOptions())
+            self.assertEqual(exit_code, 0, output)
+            self.assertEqual("generation cache hit" in output, expect_hit)
+            self.assertIn("[warn] spec.resources.cpu is 2, but the base preset and services need 3.5", output)
+
+        for _run in range(2):
+            exit_code, output = self.generate(budget, cli.GenerateOptions(enforce_resources=True))
+            self.assertEqual(exit_code, 1)
+            self.assertIn("[error] spec.resources.cpu is 2", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import random
+import string
+import sys
+import textwrap
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson.simple_yaml import YAMLSyntaxError, parse_simple_yaml
+
+try:
+    import yaml  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - differential tests need PyYAML
+    yaml = None
+
+_WORDS = ["redis", "classroom", "6379:6379", "yes", "off", "0x1f", "010", "1.5", "~", "a b", "x#y", "it's"]
+
+
+def _random_scalar(rng):
+    kind = rng.randrange(6)
+    if kind == 0:
+        return rng.randint(-10_000, 10_000)
+    if kind == 1:
+        return rng.choice([True, False, None])
+    if kind == 2:
+        return round(rng.uniform(-100, 100), 3)
+    if kind == 3:
+        return rng.choice(_WORDS)
+    return "".join(rng.choice(string.ascii_letters + string.digits + " -_:#'\"/.") for _ in range(rng.randint(0, 12)))
+
+
+def _random_document(rng, depth=0):
+    if depth > 4 or rng.random() < 0.25:
+        return _random_scalar(rng)
+    if rng.random() < 0.5:
+        return [_random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    keys = {_random_scalar(rng) for _ in range(rng.randint(0, 4))}
+    # Empty keys are dumped as complex ("? ''") keys, which the parser rejects.
+    return {key: _random_document(rng, depth + 1) for key in keys if key != "" and not isinstance(key, float)}
+
+
+@unittest.skipIf(yaml is None, "PyYAML is required for differential tests")
+class DifferentialTests(unittest.TestCase):
+    def assert_matches_pyyaml(self, text):
+        self.assertEqual(parse_simple_yaml(text), yaml.safe_load(text), text)
+
+    def test_random_documents_match_pyyaml(self):
+        rng = random.Random(20240611)
+        for _ in range(400):
+            document = _random_document(rng)
+            for flow_style in (False, None, True):
+                text = yaml.safe_dump(document, default_flow_style=flow_style, width=1 << 16, sort_keys=False)
+                self.assert_matches_pyyaml(text)
+
+    def test_manifest_features_match_pyyaml(self):
+        self.assert_matches_pyyaml(
+            textwrap.dedent(
+                """
+                ---
+                metadata: {org: acme, course: "math 101", lesson: 'it''s'}  # inline
+                spec:
+                  services:
+                  - name: redis
+                    vars:
+                      REDIS_PASSWORD: "s3cr#t"
+                  - supabase
+                  ports: [
+                    "6379:6379",
+                    8080,   # comment inside flow
+                  ]
+                  "quoted key": on
+                  env:
+                    EMPTY:
+                    OCTAL: 0755
+                    HEX: 0x1F
+                    SEXAGESIMAL: 1:30
+                    FLOAT: 1e3
+                    EXP: 1.0e+3
+                    NAN_LIKE: .inf
+                    URL: http://example.com:8080/x
+                ...
+                """
+            )
+        )
+
+
+class ParserTests(unittest.TestCase):
+    def test_errors_report_line_and_column(self):
+        cases = {
+            "a: 1\nb: &anchor 2\n": (2, 4),
+            "a:\n  b: 1\n   c: 2\n": (3, 4),
+            "a: [1, 2\n": (1, 4),
+            "a: b: c\n": (1, 5),
+            "a: 1\n\tb: 2\n": (2, 1),
+            "a: 'unterminated\n": (1, 4),
+            "- a\nb: 1\n": (2, 1),
+        }
+        for text, (line, column) in cases.items():
+            with self.subTest(text=text):
+                with self.assertRaises(YAMLSyntaxError) as caught:
+                    parse_simple_yaml(text)
+                self.assertEqual((caught.exception.line, caught.exception.column), (line, column))
+                self.assertIn(f"line {line}, column {column}", str(caught.exception))
+
+    def test_deep_nesting_does_not_recurse(self):
+        depth = 5000
+        block = "".join(f"{' ' * level}k{level}:\n" for level in range(depth)) + f"{' ' * depth}leaf: 1\n"
+        node = parse_simple_yaml(block)
+        for level in range(depth):
+            node = node[f"k{level}"]
+        self.assertEqual(node, {"leaf": 1})
+
+        flow = parse_simple_yaml("[" * depth + "]" * depth)
+        for _ in range(depth - 1):
+            (flow,) = flow
+        self.assertEqual(flow, [])
+
+    def test_fuzzed_input_only_raises_syntax_errors(self):
+        rng = random.Random(7)
+        alphabet = " \t\n-:#'\"[]{},&*!|>?abc12."
+        for _ in range(3000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            try:
+                parse_simple_yaml(text)
+            except YAMLSyntaxError:
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
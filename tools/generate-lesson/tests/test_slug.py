@@ -0,0 +1,78 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import __main__ as entry
+from generate_lesson import cli, slug
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+EXAMPLES = cli.ROOT / "examples" / "lesson-manifests"
+
+# Modules `generate-lesson slug` must not import for a plain manifest.
+HEAVY_MODULES = ("yaml", "json", "argparse", "generate_lesson.cli", "concurrent.futures")
+
+
+class SlugTests(unittest.TestCase):
+    def test_scanner_matches_full_parse_for_examples(self):
+        manifests = sorted(EXAMPLES.glob("*.yaml"))
+        self.assertTrue(manifests)
+        for path in manifests:
+            with self.subTest(manifest=path.name):
+                text = path.read_text(encoding="utf-8")
+                scanned = slug.scan_metadata(text)
+                self.assertIsNotNone(scanned)
+                parsed = cli.load_manifest(path)
+                self.assertEqual(slug.manifest_slug(path), cli.derive_lesson_slug(parsed["metadata"]))
+
+    def test_unusual_metadata_falls_back_to_full_parse(self):
+        texts = {
+            "metadata: {org: Acme, course: Math, lesson: One}\n": "acme-math-one",
+            "metadata:\n  org: \"Acme \\u0041\"\n  course: math\n  lesson: 'it''s'\n": "acme-a-math-it-s",
+            "metadata:\n  org: acme\n  course: math\n  lesson: long\n    title\n": "acme-math-long-title",
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            for index, (text, expected) in enumerate(texts.items()):
+                with self.subTest(text=text):
+                    self.assertIsNone(slug.scan_metadata(text))
+                    path = Path(tmp) / f"{index}.yaml"
+                    path.write_text(text, encoding="utf-8")
+                    self.assertEqual(slug.manifest_slug(path), expected)
+
+    def test_dispatcher_routes_slug_subcommand(self):
+        path = sorted(EXAMPLES.glob("*.yaml"))[0]
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            exit_code = entry.main(["slug", str(path)])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(buffer.getvalue().strip(), slug.manifest_slug(path))
+
+    def test_slug_startup_skips_heavy_imports(self):
+        manifests = [str(path) for path in sorted(EXAMPLES.glob("*.yaml"))]
+        env = dict(os.environ, PYTHONPATH=str(PACKAGE_ROOT))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "generate_lesson", "slug", *manifests],
+            capture_output=True,
+            text=True,
+            env=env,
+            check=True,
+        )
+        imported = {
+            line.rsplit("|", 1)[-1].strip()
+            for line in result.stderr.splitlines()
+            if line.startswith("import time:")
+        }
+        self.assertIn("generate_lesson.slug", imported)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported)
+        self.assertEqual(len(result.stdout.split()), len(manifests))
+
+
+if __name__ == "__main__":
+    unittest.main()
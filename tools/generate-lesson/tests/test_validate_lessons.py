@@ -0,0 +1,126 @@
+import json
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+sys.path.insert(0, str(REPO_ROOT / "tools" / "generate-lesson"))
+
+try:
+    import jsonschema
+except ImportError:  # pragma: no cover - validation is optional here
+    jsonschema = None
+else:
+    import validate_lessons
+
+SCHEMA = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "type": "object",
+    "required": ["metadata"],
+    "properties": {"metadata": {"type": "object", "required": ["lesson"]}},
+}
+
+
+@unittest.skipIf(jsonschema is None, "jsonschema is required to run validation")
+class ValidateLessonsTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name).resolve()
+        self.schema = self.root / "schema.json"
+        self.schema.write_text(json.dumps(SCHEMA), encoding="utf-8")
+        self.manifests = self.root / "manifests"
+        self.manifests.mkdir()
+        for index in range(4):
+            self.write(f"lesson{index}.yaml", f"lesson{index}")
+        self.write("broken.yaml", None)
+
+        patcher = mock.patch.object(validate_lessons, "ROOT", self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        validate_lessons._VALIDATORS.clear()
+        self.addCleanup(validate_lessons._VALIDATORS.clear)
+        self.state_path = self.root / ".cache" / "validate-lessons" / "state.json"
+
+    def write(self, name, lesson):
+        body = f"metadata:\n  lesson: {lesson}\n" if lesson else "metadata:\n  org: acme\n"
+        (self.manifests / name).write_text(body, encoding="utf-8")
+
+    def validate(self, state=None, changed_only=False, jobs=1):
+        paths = sorted(self.manifests.glob("*.yaml"))
+        return validate_lessons.validate_documents(paths, self.schema, state, changed_only, jobs)
+
+    def test_state_round_trips_and_resets_on_jsonschema_upgrade(self):
+        state = validate_lessons.ValidationState(self.state_path)
+        state.mark_checked("schema-a")
+        state.record("manifests/a.yaml", "content", "schema-a", True)
+        state.record("manifests/b.yaml", "content", "schema-a", True)
+        state.record("manifests/b.yaml", "content", "schema-a", False)
+        state.save()
+        self.assertFalse(state.dirty)
+
+        reloaded = validate_lessons.ValidationState(self.state_path)
+        self.assertEqual(reloaded.checked_schemas, {"schema-a"})
+        self.assertTrue(reloaded.is_current("manifests/a.yaml", "content", "schema-a"))
+        self.assertFalse(reloaded.is_current("manifests/a.yaml", "content", "schema-b"))
+        self.assertFalse(reloaded.is_current("manifests/b.yaml", "content", "schema-a"))
+
+        with mock.patch.object(validate_lessons, "_jsonschema_version", return_value="0.0.0"):
+            upgraded = validate_lessons.ValidationState(self.state_path)
+        self.assertEqual((upgraded.checked_schemas, upgraded.files), (set(), {}))
+
+    def test_changed_only_revalidates_edited_and_failing_files(self):
+        state = validate_lessons.ValidationState(self.state_path)
+        errors = self.validate(state, changed_only=True)
+        self.assertEqual(errors, ["manifests/broken.yaml: 'lesson' is a required property"])
+        state.save()
+
+        state = validate_lessons.ValidationState(self.state_path)
+        with mock.patch.object(
+            validate_lessons, "_document_errors", wraps=validate_lessons._document_errors
+        ) as document_errors, mock.patch.object(
+            validate_lessons.Draft202012Validator, "check_schema"
+        ) as check_schema:
+            self.write("lesson2.yaml", "renamed")
+            self.assertEqual(len(self.validate(state, changed_only=True)), 1)
+            validated = sorted(call.args[0].name for call in document_errors.call_args_list)
+            self.assertEqual(validated, ["broken.yaml", "lesson2.yaml"])
+            check_schema.assert_not_called()
+
+            document_errors.reset_mock()
+            self.assertEqual(len(self.validate(state)), 1)
+            self.assertEqual(document_errors.call_count, 5)
+
+    def test_pool_matches_serial_validation(self):
+        serial_state = validate_lessons.ValidationState(self.root / "serial.json")
+        serial = self.validate(serial_state)
+        with mock.patch.object(validate_lessons, "PARALLEL_THRESHOLD", 2):
+            pooled_state = validate_lessons.ValidationState(self.root / "pooled.json")
+            pooled = self.validate(pooled_state, jobs=2)
+        self.assertEqual(pooled, serial)
+        self.assertEqual(pooled_state.files, serial_state.files)
+        self.assertEqual(len(pooled_state.files), 4)
+
+    def test_startup_does_not_import_the_generator_cli(self):
+        script = textwrap.dedent(
+            """
+            import sys
+            sys.path.insert(0, "scripts")
+            import validate_lessons
+            print(sorted(name for name in sys.modules if name.startswith("generate_lesson.")))
+            """
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        self.assertNotIn("generate_lesson.cli", output)
+        self.assertIn("generate_lesson.cache", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
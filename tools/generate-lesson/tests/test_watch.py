@@ -0,0 +1,164 @@
+import io
+import json
+import sys
+import tempfile
+import textwrap
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import catalog, cli, watch
+
+try:
+    import jsonschema
+except ImportError:  # pragma: no cover - validation is optional here
+    jsonschema = None
+
+
+def _manifest(lesson: str, service: str) -> str:
+    return textwrap.dedent(
+        f"""
+        metadata:
+          org: acme
+          course: math
+          lesson: {lesson}
+        spec:
+          base_preset: full
+          image_tag_strategy: ubuntu-24.04
+          services:
+            - {service}
+        """
+    )
+
+
+class WatchSessionTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo_root = Path(tmp.name).resolve() / "repo"
+        for service in ("redis", "kafka"):
+            service_dir = self.repo_root / "services" / service
+            service_dir.mkdir(parents=True)
+            (service_dir / f"docker-compose.{service}.yml").write_text(
+                f"services:\n  {service}:\n    image: {service}:1\n", encoding="utf-8"
+            )
+        self.manifests = self.repo_root / "manifests"
+        self.manifests.mkdir()
+        (self.manifests / "algebra.yaml").write_text(_manifest("algebra", "redis"), encoding="utf-8")
+        (self.manifests / "geometry.yaml").write_text(_manifest("geometry", "kafka"), encoding="utf-8")
+
+        original_root = cli.ROOT
+        cli.ROOT = self.repo_root
+        catalog.clear_service_catalogs()
+        self.addCleanup(catalog.clear_service_catalogs)
+        self.addCleanup(setattr, cli, "ROOT", original_root)
+        self.session = watch.WatchSession(self.manifests)
+        with redirect_stdout(io.StringIO()):
+            self.session.regenerate(cli.discover_manifests(str(self.manifests)))
+
+    def test_service_change_only_regenerates_dependent_lessons(self):
+        compose = self.repo_root / "services" / "redis" / "docker-compose.redis.yml"
+        compose.write_text("services:\n  redis:\n    image: redis:2\n", encoding="utf-8")
+
+        targets = self.session.affected({compose, compose.with_name(".docker-compose.redis.yml.swp")})
+        self.assertEqual(targets, [self.manifests / "algebra.yaml"])
+
+        buffer = io.StringIO()
+        with redirect_stdout(buffer), redirect_stderr(io.StringIO()):
+            results = self.session.regenerate(targets)
+        self.assertEqual([result.exit_code for result in results], [0])
+        self.assertIn("[ok] acme-math-algebra regenerated", buffer.getvalue())
+        lock_path = self.repo_root / "images" / "presets" / "generated" / "acme-math-algebra" / "stack.lock.json"
+        lock = json.loads(lock_path.read_text(encoding="utf-8"))
+        self.assertEqual(lock["images"]["redis:redis"]["tag"], "2")
+
+    def test_env_example_change_regenerates_dependent_lessons(self):
+        env_example = self.repo_root / "services" / "redis" / ".env.example"
+        env_example.write_text("REDIS_PORT=6380\n", encoding="utf-8")
+        noise = {env_example.with_name(".env.example.1234.tmp"), env_example.with_name(".#.env.example")}
+
+        targets = self.session.affected({env_example} | noise)
+        self.assertEqual(targets, [self.manifests / "algebra.yaml"])
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            self.session.regenerate(targets)
+        generated = self.repo_root / "images" / "presets" / "generated" / "acme-math-algebra"
+        self.assertEqual((generated / ".env.example-redis").read_text(encoding="utf-8"), "REDIS_PORT=6380\n")
+        self.assertEqual(self.session.affected(noise), [])
+
+    def test_catalog_change_regenerates_lessons_with_services(self):
+        catalog_file = self.repo_root / "catalog" / "services.json"
+        catalog_file.parent.mkdir()
+        catalog_file.write_text(
+            json.dumps({"services": [{"id": "redis", "label": "Cache", "resources": {"redis": {"memory": "256mb"}}}]}),
+            encoding="utf-8",
+        )
+        (self.manifests / "empty.yaml").write_text(_manifest("empty", "redis").replace("- redis", "[]"))
+        with redirect_stdout(io.StringIO()):
+            self.session.regenerate([self.manifests / "empty.yaml"])
+
+        self.assertIn(self.repo_root / "catalog", watch.WatchSession(self.manifests).roots)
+        targets = self.session.affected({catalog_file})
+        self.assertEqual(targets, [self.manifests / "algebra.yaml", self.manifests / "geometry.yaml"])
+        self.assertEqual(cli.service_catalog().metadata("redis")["label"], "Cache")
+
+        buffer = io.StringIO()
+        with redirect_stdout(buffer), redirect_stderr(io.StringIO()):
+            self.session.regenerate(targets[:1])
+        self.assertNotIn("cache hit", buffer.getvalue())
+        preset_dir, _template_dir = cli.generated_dirs("acme-math-algebra", self.repo_root)
+        compose = (preset_dir / "docker-compose.classroom.yml").read_text(encoding="utf-8")
+        self.assertIn('memory: "256mb"', compose)
+
+    def test_manifest_changes_regenerate(self):
+        edited = self.manifests / "geometry.yaml"
+        edited.write_text(_manifest("geometry", "redis"), encoding="utf-8")
+        self.assertEqual(self.session.affected({edited}), [edited])
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            self.session.regenerate([edited])
+        self.assertEqual(self.session.lessons[edited], frozenset({"redis"}))
+
+    @unittest.skipIf(jsonschema is None, "jsonschema is required to run validation")
+    def test_schema_changes_revalidate_without_regenerating(self):
+        schema = self.repo_root / "schemas" / "lesson-env.schema.json"
+        schema.parent.mkdir()
+        schema.write_text(
+            json.dumps({"type": "object", "properties": {"metadata": {"required": ["org", "term"]}}}),
+            encoding="utf-8",
+        )
+        self.assertIn(schema.parent, watch.WatchSession(self.manifests).roots)
+        self.assertEqual(self.session.affected({schema}), [])
+        self.assertTrue(self.session.schemas_changed({schema}))
+        self.assertFalse(self.session.schemas_changed({schema.with_name(".lesson-env.schema.json.swp")}))
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            results = self.session.validate(cli.discover_manifests(str(self.manifests)))
+        self.assertEqual([result.stages["schema"]["status"] for result in results], ["error", "error"])
+        self.assertIn("[error] algebra.yaml fails validation: 'term' is a required property", stderr.getvalue())
+        self.assertNotIn("regenerated", stdout.getvalue())
+
+    def test_watchers_report_file_changes(self):
+        compose = self.repo_root / "services" / "kafka" / "docker-compose.kafka.yml"
+        watchers = [watch.PollingWatcher([self.repo_root / "services"], interval=0.01)]
+        try:
+            watchers.append(watch.InotifyWatcher([self.repo_root / "services"]))
+        except OSError:
+            pass
+        for watcher in watchers:
+            with self.subTest(watcher=watcher.name):
+                try:
+                    compose.write_text(f"services:\n  kafka:\n    image: kafka:{watcher.name}\n", encoding="utf-8")
+                    changed = set()
+                    for _attempt in range(50):
+                        changed |= watcher.poll(0.1)
+                        if compose in changed:
+                            break
+                    self.assertIn(compose, changed)
+                finally:
+                    watcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
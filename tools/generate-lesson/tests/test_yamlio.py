@@ -0,0 +1,58 @@
+import sys
+import textwrap
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from generate_lesson import yamlio
+
+MANIFEST = textwrap.dedent(
+    """
+    metadata:
+      org: acme
+      course: math
+      lesson: algebra
+    spec:
+      base_preset: full
+      services:
+        - redis
+        - supabase
+      env:
+        NODE_ENV: development
+      resources:
+        cpu: 4
+    """
+)
+
+
+class YamlBackendTests(unittest.TestCase):
+    def tearDown(self):
+        yamlio.set_yaml_backend(None)
+
+    def test_fastest_backend_is_selected_by_default(self):
+        available = yamlio.available_yaml_backends()
+        self.assertEqual(available[-1], "simple")
+        self.assertEqual(yamlio.set_yaml_backend("auto"), available[0])
+        if yamlio.pyyaml() is not None and yamlio.pyyaml().__with_libyaml__:
+            self.assertEqual(available[0], "libyaml")
+
+    def test_backends_agree_on_manifest_subset(self):
+        results = {
+            backend: yamlio.yaml_loader(backend)(MANIFEST)
+            for backend in yamlio.available_yaml_backends()
+        }
+        expected = results.pop("simple")
+        for backend, parsed in results.items():
+            self.assertEqual(parsed, expected, backend)
+
+    def test_namespace_tracks_backend(self):
+        yamlio.set_yaml_backend("simple")
+        self.assertEqual(yamlio.yaml_backend(), "simple")
+        self.assertEqual(yamlio.yaml_namespace(), f"simple-{yamlio.SIMPLE_PARSER_VERSION}")
+        with self.assertRaises(ValueError):
+            yamlio.set_yaml_backend("ruamel")
+
+
+if __name__ == "__main__":
+    unittest.main()